@@ -0,0 +1,64 @@
+"""
+Benchmark: tempo de inicialização (cold start) de cada Lambda.
+
+Cada medição roda em um interpretador novo. Compara:
+- lazy: import do index.py, com clientes criados sob demanda (atual)
+- eager: import + criação de todos os clientes do módulo, como era
+  feito antes com `boto3.client(...)` no nível do módulo
+
+Uso:
+    python benchmarks/bench_cold_start.py [--runs 10]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from common import LAMBDAS_DIR, SHARED_DIR, percentile
+
+LAMBDAS = ['criar-pedido', 'listar-pedidos', 'processar-pedido', 'relay-outbox']
+
+SNIPPET = """
+import contextlib, io, json, os, sys, time
+sys.path[:0] = [{shared!r}, {lambda_dir!r}]
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import index
+lazy = time.perf_counter() - start
+from aws_clients import LazyClient, get_client
+for value in list(vars(index).values()):
+    if isinstance(value, LazyClient):
+        get_client(value._service)
+eager = time.perf_counter() - start
+print(json.dumps([lazy * 1000, eager * 1000]))
+"""
+
+
+def measure(name, runs):
+    lazy, eager = [], []
+    code = SNIPPET.format(shared=SHARED_DIR, lambda_dir=f"{LAMBDAS_DIR}/{name}")
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        lazy_ms, eager_ms = json.loads(output.stdout.strip().splitlines()[-1])
+        lazy.append(lazy_ms)
+        eager.append(eager_ms)
+    return lazy, eager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"Cold start (mediana de {args.runs} interpretadores novos)")
+    print("| lambda                   | eager ms |  lazy ms |")
+    print("|--------------------------|----------|----------|")
+    for name in LAMBDAS:
+        lazy, eager = measure(name, args.runs)
+        print(f"| {name:<24} | {percentile(eager, 50):8.1f} | {percentile(lazy, 50):8.1f} |")
+
+
+if __name__ == '__main__':
+    main()
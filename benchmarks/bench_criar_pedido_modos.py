@@ -0,0 +1,86 @@
+"""
+Benchmark: latência de POST /pedidos nos modos sequencial e paralelo.
+
+Stand-ins simulam o round trip de `put_item` (DynamoDB) e
+`send_message` (SQS). No modo sequencial a latência é a soma dos dois;
+no paralelo, o máximo.
+
+Uso:
+    python benchmarks/bench_criar_pedido_modos.py [--requests 300]
+"""
+import argparse
+import json
+import time
+
+from common import SimulatedLatency, format_row, load_lambda, quiet
+
+
+class ConditionalCheckFailedException(Exception):
+    pass
+
+
+class FakeDynamoDB:
+    class exceptions:
+        ConditionalCheckFailedException = ConditionalCheckFailedException
+    
+    def __init__(self, latency):
+        self.latency = latency
+        self.items = {}
+    
+    def put_item(self, TableName, Item, **kwargs):
+        self.latency.wait()
+        self.items[Item['id']['S']] = Item
+        return {}
+    
+    def update_item(self, **kwargs):
+        # Contadores de estatísticas (ADD)
+        self.latency.wait()
+        return {}
+
+
+class FakeSQS:
+    def __init__(self, latency):
+        self.latency = latency
+        self.messages = []
+    
+    def send_message(self, QueueUrl, **kwargs):
+        self.latency.wait()
+        self.messages.append(kwargs)
+        return {'MessageId': str(len(self.messages))}
+
+
+def run(module, modo, requests, dynamodb_ms, sqs_ms):
+    module.CRIAR_PEDIDO_MODO = modo
+    module.dynamodb_client = FakeDynamoDB(SimulatedLatency(dynamodb_ms, seed=1))
+    module.sqs = FakeSQS(SimulatedLatency(sqs_ms, seed=2))
+    
+    event = {'body': json.dumps({'cliente': 'Cliente Benchmark', 'mesa': 7, 'itens': ['Pizza', 'Suco']})}
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = quiet(module.handler, event, None)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response['statusCode'] == 201, response
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--dynamodb-ms', type=float, default=8.0, help='mediana do put_item')
+    parser.add_argument('--sqs-ms', type=float, default=10.0, help='mediana do send_message')
+    args = parser.parse_args()
+    
+    module = quiet(load_lambda, 'criar-pedido')
+    
+    print(f"POST /pedidos - {args.requests} requisições "
+          f"(put_item ~{args.dynamodb_ms}ms, send_message ~{args.sqs_ms}ms)")
+    print("| modo                     |  p50 ms  |  p99 ms  |")
+    print("|--------------------------|----------|----------|")
+    for modo in ('sequencial', 'paralelo'):
+        samples = run(module, modo, args.requests, args.dynamodb_ms, args.sqs_ms)
+        print(format_row(modo, samples))
+
+
+if __name__ == '__main__':
+    main()
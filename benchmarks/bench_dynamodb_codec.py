@@ -0,0 +1,76 @@
+"""
+Benchmark: conversão de pedidos para/do formato do DynamoDB.
+
+Compara o codec enxuto de `shared/dynamodb_codec.py` com o
+`TypeSerializer`/`TypeDeserializer` do boto3 em um pedido típico
+(5 itens com nome, quantidade, preço e observação).
+
+O boto3 não aceita float: no lado dele os preços já são `Decimal`
+(a conversão não entra na medição).
+
+Uso:
+    python benchmarks/bench_dynamodb_codec.py [--iteracoes 20000]
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from common import SHARED_DIR  # noqa: F401 (coloca shared/ no sys.path)
+from dynamodb_codec import marshal_item, unmarshal_item
+
+
+def build_pedido(number_type):
+    itens = [
+        {'nome': f'Item {i}', 'quantidade': i + 1, 'preco': number_type('12.5') * (i + 1), 'observacao': 'sem cebola'}
+        for i in range(5)
+    ]
+    return {
+        'id': 'pedido-01J9ZK3Q1M8W6X2Y4T7V5R0N9C',
+        'cliente': 'Maria Silva',
+        'itens': itens,
+        'mesa': 7,
+        'status': 'pendente',
+        'timestamp': '2024-10-01T12:00:00.000000'
+    }
+
+
+def per_call_us(func, value, iteracoes):
+    start = time.perf_counter()
+    for _ in range(iteracoes):
+        func(value)
+    return (time.perf_counter() - start) / iteracoes * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iteracoes', type=int, default=20000)
+    args = parser.parse_args()
+
+    serializer = TypeSerializer()
+    deserializer = TypeDeserializer()
+
+    def boto3_marshal(values):
+        return {key: serializer.serialize(value) for key, value in values.items()}
+
+    def boto3_unmarshal(item):
+        return {key: deserializer.deserialize(value) for key, value in item.items()}
+
+    pedido_float = build_pedido(float)
+    pedido_decimal = build_pedido(Decimal)
+    item = marshal_item(pedido_float)
+    assert boto3_unmarshal(item)['itens'][1]['preco'] == Decimal('25.0')
+    assert unmarshal_item(item) == pedido_float
+
+    print(f"Pedido com 5 itens ({args.iteracoes} iterações)")
+    print("| operação                 |  codec us |  boto3 us |")
+    print("|--------------------------|-----------|-----------|")
+    print(f"| {'serializar':<24} | {per_call_us(marshal_item, pedido_float, args.iteracoes):9.2f} "
+          f"| {per_call_us(boto3_marshal, pedido_decimal, args.iteracoes):9.2f} |")
+    print(f"| {'desserializar':<24} | {per_call_us(unmarshal_item, item, args.iteracoes):9.2f} "
+          f"| {per_call_us(boto3_unmarshal, item, args.iteracoes):9.2f} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: exportação completa de pedidos (GET /pedidos/export) em uma
+tabela sintética.
+
+Compara:
+- documento: monta a lista de pedidos, gera um único JSON e comprime no fim
+  (o que a listagem faria se devolvesse a tabela inteira)
+- streaming: `export_to_s3` (o que roda na invocação assíncrona de
+  destino=s3); cada pedido vira uma linha NDJSON comprimida na hora, e o
+  arquivo sobe em partes (multipart upload)
+
+O Scan reaproveita a tabela gerada sob demanda de `bench_listar_top_k.py`, e
+o S3 é um stand-in que só conta os bytes recebidos. Cada estratégia roda em
+um interpretador novo para medir o pico de memória (RSS).
+
+Uso:
+    python benchmarks/bench_export.py [--itens 500000]
+"""
+import argparse
+import gzip
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from bench_listar_top_k import FakeScanDynamoDB
+from common import load_lambda, quiet
+
+
+class FakeS3:
+    """Multipart upload que descarta as partes e guarda só o total de bytes."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.partes = 0
+
+    def create_multipart_upload(self, **params):
+        return {'UploadId': 'bench'}
+
+    def upload_part(self, **params):
+        self.bytes += len(params['Body'])
+        self.partes += 1
+        return {'ETag': f'"{self.partes}"'}
+
+    def complete_multipart_upload(self, **params):
+        return {}
+
+    def abort_multipart_upload(self, **params):
+        return {}
+
+
+def documento(module):
+    pedidos = [module.parse_dynamodb_item(item) for item in module.scan_pedidos()]
+    return len(pedidos), len(gzip.compress(module.json_codec.dumps_bytes(pedidos), compresslevel=6))
+
+
+def streaming(module):
+    module.s3_client = FakeS3()
+    resultado = module.export_to_s3(None, None, 'exports/bench.ndjson.gz')
+    return resultado['count'], resultado['bytes']
+
+
+def run_estrategia(nome, total):
+    module = quiet(load_lambda, 'listar-pedidos')
+    module.dynamodb_client = FakeScanDynamoDB(total, mesas=1)
+    # A tabela sintética não divide o Scan em segmentos
+    module.SCAN_TOTAL_SEGMENTS = 1
+    func = documento if nome == 'documento' else streaming
+
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    count, tamanho = quiet(func, module)
+    elapsed = time.perf_counter() - start
+    rss_final = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'segundos': elapsed,
+        'pico_mb': (rss_final - rss_inicial) / 1024,
+        'count': count,
+        'gzip_mb': tamanho / (1024 * 1024)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--itens', type=int, default=500_000)
+    parser.add_argument('--estrategia', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.estrategia:
+        run_estrategia(args.estrategia, args.itens)
+        return
+
+    print(f"Tabela sintética com {args.itens} pedidos")
+    print("| estratégia |  tempo s | memória MB | gzip MB |")
+    print("|------------|----------|------------|---------|")
+    for estrategia in ('documento', 'streaming'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--estrategia', estrategia, '--itens', str(args.itens)],
+            capture_output=True, text=True, check=True
+        )
+        resultado = json.loads(output.stdout.strip().splitlines()[-1])
+        assert resultado['count'] == args.itens
+        print(f"| {estrategia:<10} | {resultado['segundos']:8.2f} | {resultado['pico_mb']:10.1f} | {resultado['gzip_mb']:7.1f} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: json (biblioteca padrão) x orjson nos payloads reais dos handlers.
+
+Cenários:
+- body da API (POST /pedidos): loads
+- resposta de GET /pedidos com 50 pedidos: dumps
+- mensagem SQS do pedido: dumps
+- notificação SNS dentro de mensagem SQS (proxy get_queue_messages): loads duplo
+
+O lado "json" usa as mesmas opções do fallback de `shared/json_codec.py`
+(`ensure_ascii=False`, separadores compactos).
+
+Uso:
+    python benchmarks/bench_json_codec.py [--iteracoes 20000]
+"""
+import argparse
+import json
+import time
+
+from common import SHARED_DIR  # noqa: F401 (coloca shared/ no sys.path)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def build_pedido(i):
+    return {
+        'id': f'pedido-01J9ZK3Q1M8W6X2Y4T7V5R{i:04d}',
+        'cliente': 'João da Conceição',
+        'itens': [
+            {'nome': 'Pizza Margherita', 'quantidade': 2, 'preco': 30.0, 'observacao': 'sem cebola'},
+            {'nome': 'Refrigerante', 'quantidade': 1, 'preco': 6.5}
+        ],
+        'mesa': i % 20 + 1,
+        'status': 'processado',
+        'timestamp': '2024-10-01T12:00:00.000000',
+        'comprovante_url': f'comprovantes/pedido-{i}.pdf'
+    }
+
+
+def stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def per_call_us(func, value, iteracoes):
+    start = time.perf_counter()
+    for _ in range(iteracoes):
+        func(value)
+    return (time.perf_counter() - start) / iteracoes * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iteracoes', type=int, default=20000)
+    args = parser.parse_args()
+
+    pedido = build_pedido(1)
+    api_body = stdlib_dumps({'cliente': pedido['cliente'], 'mesa': pedido['mesa'], 'itens': pedido['itens']})
+    lista = {'pedidos': [build_pedido(i) for i in range(50)], 'count': 50}
+    sqs_message = {k: pedido[k] for k in ('cliente', 'itens', 'mesa', 'timestamp')}
+    sns_in_sqs = stdlib_dumps({'Type': 'Notification', 'Message': stdlib_dumps(pedido)})
+
+    def stdlib_double(body):
+        return json.loads(json.loads(body)['Message'])
+
+    def orjson_double(body):
+        return orjson.loads(orjson.loads(body)['Message'])
+
+    cenarios = [
+        ('loads body da API', json.loads, orjson and orjson.loads, api_body),
+        ('dumps lista (50)', stdlib_dumps, orjson and orjson.dumps, lista),
+        ('dumps mensagem SQS', stdlib_dumps, orjson and orjson.dumps, sqs_message),
+        ('loads SNS em SQS', stdlib_double, orjson and orjson_double, sns_in_sqs),
+    ]
+
+    if orjson:
+        assert orjson.dumps(lista).decode() == stdlib_dumps(lista)
+
+    print(f"json x orjson ({args.iteracoes} iterações por cenário)")
+    print("| cenário                  |   json us | orjson us |")
+    print("|--------------------------|-----------|-----------|")
+    for label, stdlib_func, orjson_func, value in cenarios:
+        stdlib_us = per_call_us(stdlib_func, value, args.iteracoes)
+        orjson_us = f"{per_call_us(orjson_func, value, args.iteracoes):9.2f}" if orjson else '        -'
+        print(f"| {label:<24} | {stdlib_us:9.2f} | {orjson_us} |")
+
+    if not orjson:
+        print("\norjson não instalado: json_codec usa o json da biblioteca padrão (pip install orjson)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: listagem por filtro sem índice (GET /pedidos?mesa=N) em uma
+tabela sintética de 1M pedidos.
+
+Compara:
+- acumular: como era antes; junta todas as páginas do Scan, converte todos
+  os itens, ordena a lista inteira e corta em `limit`
+- top-k: `list_pedidos_scan` do listar-pedidos; consome as páginas em
+  streaming com heapq.nlargest (memória O(limit)) e só converte os `limit`
+  itens selecionados
+
+O Scan é simulado em memória: as páginas são geradas sob demanda (a tabela
+não fica residente), com o filtro aplicado como o DynamoDB faria. Cada
+estratégia roda em um interpretador novo para medir o pico de memória (RSS).
+
+Uso:
+    python benchmarks/bench_listar_top_k.py [--itens 1000000] [--limit 50]
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from common import load_lambda, quiet
+
+ITENS_POR_PAGINA = 3000
+STATUS = ('pendente', 'processado', 'erro')
+
+
+class FakeScanDynamoDB:
+    """Scan paginado sobre uma tabela sintética gerada sob demanda."""
+
+    def __init__(self, total, mesas):
+        self.total = total
+        self.mesas = mesas
+
+    def build_item(self, i):
+        # Timestamps fora de ordem, como no Scan real
+        segundos = (i * 7919) % self.total
+        return {
+            'id': {'S': f'pedido-{i:08d}'},
+            'cliente': {'S': f'Cliente {i % 1000}'},
+            'mesa': {'N': str(i % self.mesas + 1)},
+            'status': {'S': STATUS[i % 3]},
+            'timestamp': {'S': f'2024-01-{segundos // 86400 + 1:02d}T{segundos % 86400 // 3600:02d}:'
+                               f'{segundos % 3600 // 60:02d}:{segundos % 60:02d}.{i % 1000000:06d}'},
+            'itens': {'L': [{'M': {'nome': {'S': 'Pizza'}, 'quantidade': {'N': '1'}, 'preco': {'N': '30.0'}}}]}
+        }
+
+    def scan(self, **params):
+        start_key = params.get('ExclusiveStartKey')
+        inicio = int(start_key['id']['S'].split('-')[1]) + 1 if start_key else 0
+        fim = min(inicio + ITENS_POR_PAGINA, self.total)
+        mesa = params.get('ExpressionAttributeValues', {}).get(':mesa', {}).get('N')
+
+        items = []
+        for i in range(inicio, fim):
+            item = self.build_item(i)
+            if mesa is None or item['mesa']['N'] == mesa:
+                items.append(item)
+
+        response = {'Items': items, 'Count': len(items)}
+        if fim < self.total:
+            response['LastEvaluatedKey'] = {'id': {'S': f'pedido-{fim - 1:08d}'}}
+        return response
+
+
+def acumular(module, mesa, limit):
+    """Implementação anterior: acumula, converte e ordena tudo."""
+    scan_params = {
+        'TableName': module.DYNAMODB_TABLE,
+        'FilterExpression': '#mesa = :mesa',
+        'ExpressionAttributeNames': {'#mesa': 'mesa'},
+        'ExpressionAttributeValues': {':mesa': {'N': str(mesa)}}
+    }
+    all_items = []
+    while True:
+        response = module.dynamodb_client.scan(**scan_params)
+        all_items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    pedidos = [module.parse_dynamodb_item(item) for item in all_items]
+    pedidos.sort(key=lambda x: x['timestamp'], reverse=True)
+    return pedidos[:limit]
+
+
+def top_k(module, mesa, limit):
+    pedidos, _ = module.list_pedidos_scan(mesa, None, limit)
+    return pedidos
+
+
+def run_estrategia(nome, total, mesas, limit):
+    module = quiet(load_lambda, 'listar-pedidos')
+    module.dynamodb_client = FakeScanDynamoDB(total, mesas)
+    func = acumular if nome == 'acumular' else top_k
+
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    pedidos = func(module, 1, limit)
+    elapsed = time.perf_counter() - start
+    rss_final = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps({
+        'segundos': elapsed,
+        'pico_mb': (rss_final - rss_inicial) / 1024,
+        'ids': [p['id'] for p in pedidos]
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--itens', type=int, default=1_000_000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--estrategia', help=argparse.SUPPRESS)
+    parser.add_argument('--mesas', type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.estrategia:
+        run_estrategia(args.estrategia, args.itens, args.mesas, args.limit)
+        return
+
+    print(f"Tabela sintética com {args.itens} pedidos, limit={args.limit}")
+    print("| filtro                   | estratégia |  tempo s | memória MB |")
+    print("|--------------------------|------------|----------|------------|")
+    for mesas, label in ((20, 'mesa=1 (5% dos itens)'), (1, 'mesa=1 (100% dos itens)')):
+        resultados = {}
+        for estrategia in ('acumular', 'top-k'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--estrategia', estrategia, '--itens', str(args.itens),
+                 '--limit', str(args.limit), '--mesas', str(mesas)],
+                capture_output=True, text=True, check=True
+            )
+            resultado = json.loads(output.stdout.strip().splitlines()[-1])
+            resultados[estrategia] = resultado['ids']
+            print(f"| {label:<24} | {estrategia:<10} | {resultado['segundos']:8.2f} | {resultado['pico_mb']:10.1f} |")
+        assert resultados['acumular'] == resultados['top-k']
+
+
+if __name__ == '__main__':
+    main()
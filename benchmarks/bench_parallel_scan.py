@@ -0,0 +1,109 @@
+"""
+Benchmark: Scan sequencial x Scan paralelo (Segment/TotalSegments).
+
+Tabela simulada em memória com latência por página (~25ms, como um Scan de
+1MB). Mede o tempo total para varrer a tabela com 1, 2, 4 e 8 segmentos e,
+em um segundo cenário, com uma tabela que só aguenta 3 Scans simultâneos
+(os excedentes recebem ProvisionedThroughputExceededException): o
+AdaptiveLimiter reduz a concorrência até parar de sofrer throttling.
+
+Uso:
+    python benchmarks/bench_parallel_scan.py [--itens 200000]
+"""
+import argparse
+import threading
+import time
+
+from common import SimulatedLatency, load_lambda, quiet
+
+ITENS_POR_PAGINA = 2000
+
+
+class ThrottlingError(Exception):
+    """Imita o ClientError do botocore para ProvisionedThroughputExceededException."""
+
+    def __init__(self):
+        super().__init__('Throughput excedido')
+        self.response = {'Error': {'Code': 'ProvisionedThroughputExceededException'}}
+
+
+class FakeSegmentedTable:
+    """Scan paginado por segmento, com latência e capacidade de concorrência opcionais."""
+
+    def __init__(self, total, latency_ms=25, capacidade=None):
+        self.total = total
+        self.capacidade = capacidade
+        self.latency = SimulatedLatency(latency_ms, seed=7)
+        self.em_voo = 0
+        self.throttlings = 0
+        self._lock = threading.Lock()
+
+    def scan(self, **params):
+        with self._lock:
+            self.em_voo += 1
+            excedeu = self.capacidade is not None and self.em_voo > self.capacidade
+            if excedeu:
+                self.throttlings += 1
+        try:
+            self.latency.wait()
+            if excedeu:
+                raise ThrottlingError()
+
+            segment = params.get('Segment', 0)
+            total_segments = params.get('TotalSegments', 1)
+            # Itens do segmento: i % total_segments == segment
+            start_key = params.get('ExclusiveStartKey')
+            inicio = int(start_key['id']['S']) + total_segments if start_key else segment
+            fim = min(inicio + ITENS_POR_PAGINA * total_segments, self.total)
+            ids = range(inicio, fim, total_segments)
+
+            response = {'Items': [{'id': {'S': str(i)}} for i in ids]}
+            if fim < self.total:
+                response['LastEvaluatedKey'] = {'id': {'S': str(ids[-1])}}
+            return response
+        finally:
+            with self._lock:
+                self.em_voo -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--itens', type=int, default=200000)
+    args = parser.parse_args()
+
+    module = quiet(load_lambda, 'listar-pedidos')
+    from parallel_scan import AdaptiveLimiter, parallel_scan
+
+    scan_params = {'TableName': 'Pedidos'}
+
+    print(f"Scan de {args.itens} itens ({ITENS_POR_PAGINA} por página, ~25ms por página)")
+    print("| segmentos                |  tempo s |  itens   |")
+    print("|--------------------------|----------|----------|")
+    for segments in (1, 2, 4, 8):
+        table = FakeSegmentedTable(args.itens)
+        module.dynamodb_client = table
+        start = time.perf_counter()
+        if segments == 1:
+            module.SCAN_TOTAL_SEGMENTS = 1
+            total = sum(1 for _ in module.scan_pedidos('attribute_exists(id)', {}, {}))
+        else:
+            total = sum(1 for _ in parallel_scan(table, scan_params, segments))
+        elapsed = time.perf_counter() - start
+        assert total == args.itens
+        print(f"| {segments:<24} | {elapsed:8.2f} | {total:8d} |")
+
+    print()
+    print("Tabela com capacidade para 3 Scans simultâneos, 8 segmentos")
+    print("| concorrência             |  tempo s | throttlings | limite final |")
+    print("|--------------------------|----------|-------------|--------------|")
+    table = FakeSegmentedTable(args.itens, capacidade=3)
+    limiter = AdaptiveLimiter(8)
+    start = time.perf_counter()
+    total = sum(1 for _ in parallel_scan(table, scan_params, 8, limiter=limiter))
+    elapsed = time.perf_counter() - start
+    assert total == args.itens
+    print(f"| {'adaptativa (máx. 8)':<24} | {elapsed:8.2f} | {table.throttlings:11d} | {limiter.limite:12d} |")
+
+
+if __name__ == '__main__':
+    main()
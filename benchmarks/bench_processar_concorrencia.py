@@ -0,0 +1,119 @@
+"""
+Benchmark: duração de um batch SQS no processar-pedido conforme
+PROCESSAR_CONCORRENCIA.
+
+Cada record gera o PDF de verdade (fpdf2) e passa por stand-ins que
+simulam o round trip de `put_object` (S3), `update_item` (DynamoDB, status
+e contadores de estatísticas) e `publish` (SNS). Com concorrência 1 os
+records são processados um de cada vez, como antes do pool de threads.
+
+Uso:
+    python benchmarks/bench_processar_concorrencia.py [--batches 20] [--batch-size 10]
+"""
+import argparse
+import json
+import threading
+import time
+
+from common import SimulatedLatency, format_row, load_lambda, quiet
+
+
+class ThreadSafeLatency:
+    """SimulatedLatency compartilhada entre as threads do pool."""
+
+    def __init__(self, median_ms, seed):
+        self._latency = SimulatedLatency(median_ms, seed=seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            delay_ms = self._latency.median_ms * self._latency._random.lognormvariate(0, self._latency.sigma)
+        time.sleep(delay_ms / 1000)
+
+
+class FakeS3:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def put_object(self, **kwargs):
+        self.latency.wait()
+        return {}
+
+
+class FakeDynamoDB:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def update_item(self, **kwargs):
+        self.latency.wait()
+        return {'Attributes': {'status': {'S': 'pendente'}}}
+
+
+class FakeSNS:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def publish(self, **kwargs):
+        self.latency.wait()
+        return {'MessageId': '1'}
+
+
+def build_event(batch_size, batch):
+    records = []
+    for i in range(batch_size):
+        pedido = {
+            'pedidoId': f'pedido-bench-{batch}-{i}',
+            'cliente': 'Cliente Benchmark',
+            'mesa': i % 10 + 1,
+            'itens': [
+                {'nome': 'Pizza', 'quantidade': 2, 'preco': 30.0, 'observacao': 'sem cebola'},
+                {'nome': 'Suco', 'quantidade': 1, 'preco': 8.0}
+            ],
+            'timestamp': '2024-11-12T01:02:03'
+        }
+        records.append({'messageId': f'm{batch}-{i}', 'body': json.dumps(pedido)})
+    return {'Records': records}
+
+
+def run(module, concorrencia, batches, batch_size, s3_ms, dynamodb_ms, sns_ms):
+    module.PROCESSAR_CONCORRENCIA = concorrencia
+    module._executor = None
+    module.s3_client = FakeS3(ThreadSafeLatency(s3_ms, seed=1))
+    module.dynamodb_client = FakeDynamoDB(ThreadSafeLatency(dynamodb_ms, seed=2))
+    module.sns_client = FakeSNS(ThreadSafeLatency(sns_ms, seed=3))
+
+    # Aquecimento: import do fpdf e criação do pool
+    quiet(module.handler, build_event(batch_size, -1), None)
+
+    samples = []
+    for batch in range(batches):
+        start = time.perf_counter()
+        result = quiet(module.handler, build_event(batch_size, batch), None)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert result['batchItemFailures'] == [], result
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--s3-ms', type=float, default=25.0, help='mediana do put_object')
+    parser.add_argument('--dynamodb-ms', type=float, default=8.0, help='mediana do update_item')
+    parser.add_argument('--sns-ms', type=float, default=12.0, help='mediana do publish')
+    args = parser.parse_args()
+
+    module = quiet(load_lambda, 'processar-pedido')
+
+    print(f"processar-pedido - {args.batches} batches de {args.batch_size} mensagens "
+          f"(put_object ~{args.s3_ms}ms, update_item ~{args.dynamodb_ms}ms x2, publish ~{args.sns_ms}ms)")
+    print("| concorrência             |  p50 ms  |  p99 ms  | pedidos/s |")
+    print("|--------------------------|----------|----------|-----------|")
+    for concorrencia in (1, 2, 4, 8):
+        samples = run(module, concorrencia, args.batches, args.batch_size, args.s3_ms, args.dynamodb_ms, args.sns_ms)
+        throughput = args.batch_size * len(samples) / (sum(samples) / 1000)
+        print(f"{format_row(str(concorrencia), samples)} {throughput:9.1f} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks rodam sem LocalStack: as Lambdas são carregadas direto de
+`src/lambdas/<nome>/index.py` e os clientes boto3 são trocados por
+stand-ins em memória que simulam a latência de rede dos serviços.
+"""
+import importlib.util
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDAS_DIR = os.path.join(ROOT_DIR, 'src', 'lambdas')
+SHARED_DIR = os.path.join(LAMBDAS_DIR, 'shared')
+
+# No deploy os módulos compartilhados vão para a raiz do pacote da Lambda
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+# Credenciais fictícias: nenhum benchmark acessa a AWS de verdade
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+
+def load_lambda(name, module_name=None):
+    """Importa o index.py de uma Lambda como módulo isolado."""
+    lambda_dir = os.path.join(LAMBDAS_DIR, name)
+    if lambda_dir not in sys.path:
+        sys.path.insert(0, lambda_dir)
+
+    module_name = module_name or name.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(lambda_dir, 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class SimulatedLatency:
+    """Latência log-normal (mediana em ms), reproduzível via seed."""
+
+    def __init__(self, median_ms, sigma=0.35, seed=42):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self._random = random.Random(seed)
+
+    def wait(self):
+        delay_ms = self.median_ms * self._random.lognormvariate(0, self.sigma)
+        time.sleep(delay_ms / 1000)
+
+
+def percentile(samples, pct):
+    """Percentil por interpolação linear."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def format_row(label, samples_ms):
+    """Linha de tabela com p50/p99 de uma série de latências."""
+    return f"| {label:<24} | {percentile(samples_ms, 50):8.2f} | {percentile(samples_ms, 99):8.2f} |"
+
+
+def quiet(func, *args, **kwargs):
+    """Executa a função descartando o que ela imprime no stdout."""
+    devnull = open(os.devnull, 'w')
+    stdout = sys.stdout
+    sys.stdout = devnull
+    try:
+        return func(*args, **kwargs)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
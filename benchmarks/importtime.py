@@ -0,0 +1,165 @@
+"""
+Perfil de import (cold start) das Lambdas via `python -X importtime`.
+
+Para cada Lambda, importa o `index.py` em um interpretador novo (com
+`src/lambdas/shared` no PYTHONPATH, como no pacote de deploy), lê o
+relatório do `-X importtime` e mostra o custo por módulo. O tempo total
+de init é comparado com o orçamento em `cold_start_budget.json`; se
+alguma Lambda passar do orçamento, o script termina com código 1.
+
+Uso:
+    python benchmarks/importtime.py                   # todas as Lambdas
+    python benchmarks/importtime.py processar-pedido --top 15
+    python benchmarks/importtime.py --check           # só o resumo + orçamento
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+from common import LAMBDAS_DIR, SHARED_DIR, percentile
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cold_start_budget.json')
+
+# Formato: "import time:       123 |       4567 |   package.module"
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)')
+
+
+def list_lambdas():
+    return sorted(
+        name for name in os.listdir(LAMBDAS_DIR)
+        if os.path.isfile(os.path.join(LAMBDAS_DIR, name, 'index.py'))
+    )
+
+
+def parse_importtime(stderr):
+    """
+    Converte a saída do `-X importtime` em lista de módulos.
+    
+    Cada item tem nome, profundidade na árvore de imports, tempo próprio
+    e cumulativo (em ms).
+    """
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append({
+            'module': name,
+            'depth': (len(indent) - 1) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+    return modules
+
+
+def profile_lambda(name):
+    """Importa o index.py da Lambda com -X importtime e retorna os módulos."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = SHARED_DIR
+    env.setdefault('AWS_ACCESS_KEY_ID', 'test')
+    env.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+    
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import index'],
+        cwd=os.path.join(LAMBDAS_DIR, name),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {name}:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def index_subtree(modules):
+    """
+    Módulos importados (direta ou indiretamente) pelo index.
+    
+    No relatório do -X importtime os filhos aparecem antes do pai, com
+    indentação maior; módulos do startup do interpretador ficam de fora.
+    """
+    for position, module in enumerate(modules):
+        if module['module'] == 'index':
+            subtree = []
+            for child in reversed(modules[:position]):
+                if child['depth'] <= module['depth']:
+                    break
+                subtree.append(child)
+            return list(reversed(subtree))
+    return []
+
+
+def init_time_ms(modules):
+    """Tempo cumulativo do import do index (init da Lambda)."""
+    for module in modules:
+        if module['module'] == 'index':
+            return module['cumulative_ms']
+    return 0.0
+
+
+def load_budgets():
+    with open(BUDGET_FILE) as f:
+        return json.load(f)
+
+
+def print_report(name, modules, top):
+    """Top módulos por tempo cumulativo, abaixo do index."""
+    print(f"\n{name}")
+    print(f"  {'cumulativo ms':>13}  {'próprio ms':>10}  módulo")
+    ranked = sorted(
+        index_subtree(modules),
+        key=lambda m: m['cumulative_ms'],
+        reverse=True
+    )
+    for module in ranked[:top]:
+        indent = '  ' * module['depth']
+        print(f"  {module['cumulative_ms']:13.2f}  {module['self_ms']:10.2f}  {indent}{module['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('lambdas', nargs='*', help='Lambdas a perfilar (padrão: todas)')
+    parser.add_argument('--runs', type=int, default=5, help='execuções por Lambda (usa a mediana)')
+    parser.add_argument('--top', type=int, default=10, help='módulos exibidos por Lambda')
+    parser.add_argument('--check', action='store_true', help='não exibe o detalhamento por módulo')
+    args = parser.parse_args()
+    
+    budgets = load_budgets()
+    default_budget = budgets.get('default')
+    estourados = []
+    resumo = []
+    
+    for name in args.lambdas or list_lambdas():
+        runs = [profile_lambda(name) for _ in range(args.runs)]
+        totals = [init_time_ms(modules) for modules in runs]
+        total = percentile(totals, 50)
+        budget = budgets.get(name, default_budget)
+        
+        if not args.check:
+            # Detalhamento da execução mais próxima da mediana
+            representative = min(runs, key=lambda modules: abs(init_time_ms(modules) - total))
+            print_report(name, representative, args.top)
+        
+        resumo.append((name, total, budget))
+        if budget is not None and total > budget:
+            estourados.append(name)
+    
+    print("\n| lambda                   |  init ms | orçamento ms |")
+    print("|--------------------------|----------|--------------|")
+    for name, total, budget in resumo:
+        status = '' if budget is None or total <= budget else '  ❌ acima do orçamento'
+        budget_text = f"{budget:12.1f}" if budget is not None else f"{'-':>12}"
+        print(f"| {name:<24} | {total:8.2f} | {budget_text} |{status}")
+    
+    if estourados:
+        print(f"\n❌ Cold start acima do orçamento: {', '.join(estourados)}")
+        sys.exit(1)
+    print("\n✅ Cold start dentro do orçamento")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,11 +11,28 @@ from http.server import HTTPServer, SimpleHTTPRequestHandler
 import urllib.request
 import urllib.error
 
+try:
+    import orjson  # opcional: acelera o parse das mensagens (pip install orjson)
+except ImportError:
+    orjson = None
+
 PORT = 8080
 LOCALSTACK_ENDPOINT = "http://localhost:4566"
 API_NAME = "pedidos-api"
 SNS_TOPIC_NAME = "PedidosConcluidos"  # Nome do tópico SNS
 
+def json_loads(data):
+    """json.loads usando orjson quando disponível."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def json_dumps_bytes(data, indent=False):
+    """Serializa para bytes UTF-8 usando orjson quando disponível."""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
 def get_api_id():
     """Descobre o API ID do LocalStack automaticamente."""
     try:
@@ -72,7 +89,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Idempotency-Key, If-None-Match')
         self.end_headers()
     
     def do_GET(self):
@@ -115,6 +132,22 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             
             # Fazer requisição para o API Gateway
             headers = {'Content-Type': 'application/json'} if body else {}
+            
+            # Repassar a chave de idempotência para evitar pedidos duplicados em retries
+            idempotency_key = self.headers.get('Idempotency-Key')
+            if idempotency_key:
+                headers['Idempotency-Key'] = idempotency_key
+            
+            # Repassar a ETag guardada pelo navegador (a API responde 304 se nada mudou)
+            if_none_match = self.headers.get('If-None-Match')
+            if if_none_match:
+                headers['If-None-Match'] = if_none_match
+            
+            # Repassar as codificações aceitas: o body comprimido (gzip/br) volta
+            # como veio da API, e o navegador descomprime pelo Content-Encoding
+            accept_encoding = self.headers.get('Accept-Encoding')
+            if accept_encoding:
+                headers['Accept-Encoding'] = accept_encoding
             req = urllib.request.Request(url, data=body, headers=headers, method=method)
             
             with urllib.request.urlopen(req) as response:
@@ -123,17 +156,25 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 
                 # Enviar resposta
                 self.send_response(response.status)
-                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Type', response.headers.get('Content-Type', 'application/json'))
                 self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_api_headers(response.headers)
                 self.end_headers()
                 self.wfile.write(response_body)
                 
         except urllib.error.HTTPError as e:
-            # Erro HTTP da API
+            # Erro HTTP da API (o urllib também trata 304 Not Modified como erro)
             error_body = e.read()
             self.send_response(e.code)
+            if e.code == 304:
+                # 304 não tem body
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_api_headers(e.headers)
+                self.end_headers()
+                return
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_api_headers(e.headers)
             self.end_headers()
             self.wfile.write(error_body)
             
@@ -141,6 +182,13 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             # Erro inesperado
             self.send_error(500, f"Erro no proxy: {str(e)}")
     
+    def send_api_headers(self, api_headers):
+        """Repassa da resposta da API os headers de cache, codificação e download."""
+        for name in ('ETag', 'Cache-Control', 'Content-Encoding', 'Vary', 'Content-Disposition'):
+            value = api_headers.get(name)
+            if value:
+                self.send_header(name, value)
+    
     def get_sns_messages(self):
         """Busca atributos das últimas publicações SNS no CloudWatch Logs."""
         try:
@@ -164,7 +212,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 env=env
             )
             
-            topics = json.loads(result.stdout)
+            topics = json_loads(result.stdout)
             
             # Buscar o tópico de pedidos processados
             topic_arn = None
@@ -178,11 +226,11 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 self.send_header('Content-Type', 'application/json')
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
-                self.wfile.write(json.dumps({
+                self.wfile.write(json_dumps_bytes({
                     'messages': [],
                     'topic': None,
                     'info': 'Tópico SNS não encontrado'
-                }).encode())
+                }))
                 return
             
             # Buscar inscrições do tópico
@@ -199,7 +247,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 env=env
             )
             
-            subscriptions_data = json.loads(result.stdout)
+            subscriptions_data = json_loads(result.stdout)
             subscriptions = subscriptions_data.get('Subscriptions', [])
             
             # Responder com informações do SNS
@@ -222,7 +270,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'info': f'Tópico SNS configurado com {len(subscriptions)} inscrição(ões)'
             }
             
-            self.wfile.write(json.dumps(response_data, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(response_data, indent=True))
             
         except Exception as e:
             self.send_error(500, f"Erro ao buscar SNS: {str(e)}")
@@ -262,7 +310,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                                 end = next_line.index('\', message_attributes')
                                 json_str = next_line[start:end].replace('\\"', '"')
                                 
-                                msg_data = json.loads(json_str)
+                                msg_data = json_loads(json_str)
                                 
                                 messages.append({
                                     'timestamp': timestamp,
@@ -296,7 +344,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'info': f'Últimas {len(messages)} publicações SNS bem-sucedidas (status 200)'
             }
             
-            self.wfile.write(json.dumps(response_data, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(response_data, indent=True))
             
         except subprocess.CalledProcessError as e:
             self.send_error(500, f"Erro ao buscar logs do Docker: {str(e)}")
@@ -329,7 +377,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             if result.returncode != 0:
                 raise Exception(f"Erro ao buscar URL da fila: {result.stderr}")
             
-            queue_data = json.loads(result.stdout)
+            queue_data = json_loads(result.stdout)
             queue_url = queue_data.get('QueueUrl')
             
             if not queue_url:
@@ -358,7 +406,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             if not result.stdout.strip():
                 sqs_data = {}
             else:
-                sqs_data = json.loads(result.stdout)
+                sqs_data = json_loads(result.stdout)
             
             messages = sqs_data.get('Messages', [])
             
@@ -371,7 +419,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                     
                     # Tentar parsear como JSON
                     try:
-                        body = json.loads(body_str)
+                        body = json_loads(body_str)
                     except json.JSONDecodeError:
                         # Se não for JSON válido, adicionar como raw
                         processed_messages.append({
@@ -386,7 +434,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                     # Se for notificação SNS, extrair a mensagem interna
                     if 'Message' in body:
                         try:
-                            message_data = json.loads(body['Message'])
+                            message_data = json_loads(body['Message'])
                         except (json.JSONDecodeError, TypeError):
                             message_data = body
                     else:
@@ -422,7 +470,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'info': f'{len(processed_messages)} mensagem(s) na fila (últimas 10)'
             }
             
-            self.wfile.write(json.dumps(response_data, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(response_data, indent=True))
             
         except subprocess.CalledProcessError as e:
             # Retornar erro detalhado em JSON
@@ -436,7 +484,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'messages': [],
                 'count': 0
             }
-            self.wfile.write(json.dumps(error_response, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(error_response, indent=True))
         except Exception as e:
             # Retornar erro detalhado em JSON
             self.send_response(500)
@@ -449,7 +497,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'messages': [],
                 'count': 0
             }
-            self.wfile.write(json.dumps(error_response, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(error_response, indent=True))
     
     def log_message(self, format, *args):
         """Log customizado."""
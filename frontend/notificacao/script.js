@@ -3,8 +3,11 @@
 const API_BASE_URL = 'http://localhost:8080/api';
 let currentPage = 1;
 let lastKey = null;
+let nextToken = null;
 let pageHistory = [];
 let autoRefreshInterval = null;
+let syncWatermark = null;  // Watermark da sincronização incremental (GET /pedidos?since=)
+let syncedStatus = new Map();  // Último status conhecido de cada pedido alterado
 let snsAutoRefreshInterval = null;  // Novo: auto-refresh para SNS
 let lastSnsMessageCount = 0;  // Contador para detectar novas mensagens
 let queueAutoRefreshInterval = null;  // Novo: auto-refresh para fila SQS
@@ -123,23 +126,29 @@ async function listOrders(resetPagination = true) {
         if (resetPagination) {
             currentPage = 1;
             lastKey = null;
+            nextToken = null;
             pageHistory = [];
         }
         
         let url = `${baseUrl}/pedidos?limit=${limit}`;
         if (status) url += `&status=${status}`;
-        if (lastKey) url += `&lastKey=${lastKey}`;
+        if (lastKey) url += `&nextToken=${encodeURIComponent(lastKey)}`;
         
         showLoading('ordersContainer', 'Carregando pedidos...');
         
+        // Início da sincronização incremental (margem para o relógio do navegador)
+        const listedAt = new Date(Date.now() - 5000).toISOString();
+        
         const response = await fetch(url);
         const data = await response.json();
         
         if (response.ok) {
+            if (!syncWatermark) syncWatermark = listedAt;
             displayOrders(data.pedidos || []);
             
             // Atualizar paginação
-            if (data.lastKey) {
+            nextToken = data.nextToken || null;
+            if (nextToken) {
                 document.getElementById('pagination').style.display = 'flex';
                 document.getElementById('nextBtn').disabled = false;
             } else {
@@ -148,11 +157,6 @@ async function listOrders(resetPagination = true) {
             
             document.getElementById('prevBtn').disabled = currentPage === 1;
             document.getElementById('pageInfo').textContent = `Página ${currentPage}`;
-            
-            // Armazenar lastKey para próxima página
-            if (data.lastKey && !pageHistory.includes(data.lastKey)) {
-                pageHistory.push(data.lastKey);
-            }
         } else {
             showError('ordersContainer', `Erro ao carregar pedidos: ${data.error || 'Erro desconhecido'}`);
         }
@@ -184,7 +188,7 @@ function displayOrders(orders) {
             <div class="order-items">
                 <strong>Itens (${order.itens ? order.itens.length : 0}):</strong>
                 <ul>
-                    ${order.itens ? order.itens.slice(0, 3).map(item => `<li>${item}</li>`).join('') : ''}
+                    ${order.itens ? order.itens.slice(0, 3).map(item => `<li>${formatItem(item)}</li>`).join('') : ''}
                     ${order.itens && order.itens.length > 3 ? `<li>... e mais ${order.itens.length - 3}</li>` : ''}
                 </ul>
             </div>
@@ -192,10 +196,11 @@ function displayOrders(orders) {
     `).join('');
 }
 
-// Paginação
+// Paginação (lastKey: token da página atual; pageHistory: tokens das páginas anteriores)
 function nextPage() {
-    if (pageHistory.length > 0) {
-        lastKey = pageHistory[pageHistory.length - 1];
+    if (nextToken) {
+        pageHistory.push(lastKey);
+        lastKey = nextToken;
         currentPage++;
         listOrders(false);
     }
@@ -203,9 +208,8 @@ function nextPage() {
 
 function previousPage() {
     if (currentPage > 1) {
+        lastKey = pageHistory.pop();
         currentPage--;
-        pageHistory.pop();
-        lastKey = pageHistory.length > 0 ? pageHistory[pageHistory.length - 1] : null;
         listOrders(false);
     }
 }
@@ -222,13 +226,49 @@ function autoRefresh() {
         btn.style.background = '';
     } else {
         autoRefreshInterval = setInterval(() => {
-            listOrders(false);
+            syncOrders();
         }, 5000);
         icon.textContent = '⏸️';
         btn.style.background = 'var(--primary)';
     }
 }
 
+// Sincronização incremental: busca só os pedidos criados/alterados desde o
+// watermark e recarrega a página atual apenas quando há alguma mudança nova
+async function syncOrders() {
+    if (!syncWatermark) {
+        listOrders(false);
+        return;
+    }
+    
+    try {
+        const baseUrl = getApiUrl();
+        const response = await fetch(`${baseUrl}/pedidos?since=${encodeURIComponent(syncWatermark)}&fields=status`);
+        
+        if (response.status === 410) {
+            // Watermark antigo demais: recomeçar pela listagem completa
+            syncWatermark = null;
+            syncedStatus.clear();
+            listOrders(false);
+            return;
+        }
+        if (!response.ok) return;
+        
+        const data = await response.json();
+        syncWatermark = data.watermark;
+        
+        // Alterações recentes podem vir de novo na próxima sincronização
+        const changed = (data.pedidos || []).filter(order => syncedStatus.get(order.id) !== order.status);
+        changed.forEach(order => syncedStatus.set(order.id, order.status));
+        
+        if (changed.length > 0 || data.hasMore) {
+            listOrders(false);
+        }
+    } catch (error) {
+        console.error('Erro ao sincronizar pedidos:', error);
+    }
+}
+
 // Detalhes do pedido
 async function showOrderDetails(orderId) {
     try {
@@ -277,7 +317,7 @@ async function showOrderDetails(orderId) {
                 <div class="detail-row">
                     <strong>Itens do Pedido:</strong>
                     <ul class="detail-items">
-                        ${order.itens ? order.itens.map(item => `<li>🍴 ${item}</li>`).join('') : '<li>Nenhum item</li>'}
+                        ${order.itens ? order.itens.map(item => `<li>🍴 ${formatItem(item)}</li>`).join('') : '<li>Nenhum item</li>'}
                     </ul>
                 </div>
                 
@@ -318,6 +358,15 @@ async function downloadComprovante(pedidoId) {
 }
 
 // Utilitários
+// Formatar item do pedido (objeto {nome, quantidade, preco, observacao} ou string do formato antigo)
+function formatItem(item) {
+    if (typeof item === 'string') return item;
+    let texto = `${item.quantidade || 1}x ${item.nome}`;
+    if (item.preco != null) texto += ` - R$ ${Number(item.preco).toFixed(2)}`;
+    if (item.observacao) texto += ` (${item.observacao})`;
+    return texto;
+}
+
 function formatDate(dateString) {
     if (!dateString) return '-';
     
@@ -630,6 +679,25 @@ function closeNotificationsModal() {
 }
 
 // Carregar mensagens da fila SQS
+// Busca vários pedidos em uma única requisição (GET /pedidos?ids=a,b,c)
+async function fetchOrdersByIds(ids, fields = '') {
+    const unique = [...new Set(ids)];
+    if (unique.length === 0) return {};
+    
+    let url = `${getApiUrl()}/pedidos?ids=${unique.map(encodeURIComponent).join(',')}`;
+    if (fields) url += `&fields=${fields}`;
+    
+    const response = await fetch(url);
+    if (!response.ok) return {};
+    
+    const data = await response.json();
+    const orders = {};
+    (data.pedidos || []).forEach(order => {
+        if (order.encontrado !== false && !order.erro) orders[order.id] = order;
+    });
+    return orders;
+}
+
 async function loadQueueMessages() {
     try {
         const baseUrl = getApiUrl().replace('/api', '');
@@ -639,6 +707,10 @@ async function loadQueueMessages() {
         const response = await fetch(`${baseUrl}/queue/messages`);
         const data = await response.json();
         
+        // Status atual dos pedidos das mensagens (uma requisição para todos)
+        const pedidoIds = (data.messages || []).filter(msg => msg.data && msg.data.pedidoId).map(msg => msg.data.pedidoId);
+        const currentOrders = await fetchOrdersByIds(pedidoIds, 'status').catch(() => ({}));
+        
         // Detectar novas mensagens
         const hasNewMessages = data.count > lastQueueMessageCount && lastQueueMessageCount > 0;
         lastQueueMessageCount = data.count;
@@ -691,6 +763,7 @@ async function loadQueueMessages() {
                             ${msg.data.cliente ? `<strong>👤 Cliente:</strong> ${msg.data.cliente}<br>` : ''}
                             ${msg.data.mesa ? `<strong>🪑 Mesa:</strong> ${msg.data.mesa}<br>` : ''}
                             ${msg.data.status ? `<strong>📊 Status:</strong> <span class="badge badge-success">${msg.data.status}</span><br>` : ''}
+                            ${currentOrders[msg.data.pedidoId] ? `<strong>🔄 Status atual:</strong> ${currentOrders[msg.data.pedidoId].status}<br>` : ''}
                             ${msg.data.comprovante ? `<strong>📄 Comprovante:</strong> <code style="font-size: 0.85em;">${msg.data.comprovante}</code><br>` : ''}
                             ${msg.data.timestamp ? `<strong>🕐 Processado:</strong> ${formatDate(msg.data.timestamp)}` : ''}
                         </div>
@@ -11,11 +11,28 @@ from http.server import HTTPServer, SimpleHTTPRequestHandler
 import urllib.request
 import urllib.error
 
+try:
+    import orjson  # opcional: acelera o parse das mensagens (pip install orjson)
+except ImportError:
+    orjson = None
+
 PORT = 8080
 LOCALSTACK_ENDPOINT = "http://localhost:4566"
 API_NAME = "pedidos-api"
 SNS_TOPIC_NAME = "PedidosConcluidos"  # Nome do tópico SNS
 
+def json_loads(data):
+    """json.loads usando orjson quando disponível."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def json_dumps_bytes(data, indent=False):
+    """Serializa para bytes UTF-8 usando orjson quando disponível."""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
 def get_api_id():
     """Descobre o API ID do LocalStack automaticamente."""
     try:
@@ -72,7 +89,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Idempotency-Key, If-None-Match')
         self.end_headers()
     
     def do_GET(self):
@@ -117,6 +134,22 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             
             # Fazer requisição para o API Gateway
             headers = {'Content-Type': 'application/json'} if body else {}
+            
+            # Repassar a chave de idempotência para evitar pedidos duplicados em retries
+            idempotency_key = self.headers.get('Idempotency-Key')
+            if idempotency_key:
+                headers['Idempotency-Key'] = idempotency_key
+            
+            # Repassar a ETag guardada pelo navegador (a API responde 304 se nada mudou)
+            if_none_match = self.headers.get('If-None-Match')
+            if if_none_match:
+                headers['If-None-Match'] = if_none_match
+            
+            # Repassar as codificações aceitas: o body comprimido (gzip/br) volta
+            # como veio da API, e o navegador descomprime pelo Content-Encoding
+            accept_encoding = self.headers.get('Accept-Encoding')
+            if accept_encoding:
+                headers['Accept-Encoding'] = accept_encoding
             req = urllib.request.Request(url, data=body, headers=headers, method=method)
             
             with urllib.request.urlopen(req) as response:
@@ -125,17 +158,25 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 
                 # Enviar resposta
                 self.send_response(response.status)
-                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Type', response.headers.get('Content-Type', 'application/json'))
                 self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_api_headers(response.headers)
                 self.end_headers()
                 self.wfile.write(response_body)
                 
         except urllib.error.HTTPError as e:
-            # Erro HTTP da API
+            # Erro HTTP da API (o urllib também trata 304 Not Modified como erro)
             error_body = e.read()
             self.send_response(e.code)
+            if e.code == 304:
+                # 304 não tem body
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_api_headers(e.headers)
+                self.end_headers()
+                return
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_api_headers(e.headers)
             self.end_headers()
             self.wfile.write(error_body)
             
@@ -143,6 +184,13 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             # Erro inesperado
             self.send_error(500, f"Erro no proxy: {str(e)}")
     
+    def send_api_headers(self, api_headers):
+        """Repassa da resposta da API os headers de cache, codificação e download."""
+        for name in ('ETag', 'Cache-Control', 'Content-Encoding', 'Vary', 'Content-Disposition'):
+            value = api_headers.get(name)
+            if value:
+                self.send_header(name, value)
+    
     def get_sns_messages(self):
         """Busca atributos das últimas publicações SNS no CloudWatch Logs."""
         try:
@@ -166,7 +214,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 env=env
             )
             
-            topics = json.loads(result.stdout)
+            topics = json_loads(result.stdout)
             
             # Buscar o tópico de pedidos processados
             topic_arn = None
@@ -180,11 +228,11 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 self.send_header('Content-Type', 'application/json')
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
-                self.wfile.write(json.dumps({
+                self.wfile.write(json_dumps_bytes({
                     'messages': [],
                     'topic': None,
                     'info': 'Tópico SNS não encontrado'
-                }).encode())
+                }))
                 return
             
             # Buscar inscrições do tópico
@@ -201,7 +249,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 env=env
             )
             
-            subscriptions_data = json.loads(result.stdout)
+            subscriptions_data = json_loads(result.stdout)
             subscriptions = subscriptions_data.get('Subscriptions', [])
             
             # Responder com informações do SNS
@@ -224,7 +272,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'info': f'Tópico SNS configurado com {len(subscriptions)} inscrição(ões)'
             }
             
-            self.wfile.write(json.dumps(response_data, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(response_data, indent=True))
             
         except Exception as e:
             self.send_error(500, f"Erro ao buscar SNS: {str(e)}")
@@ -264,7 +312,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                                 end = next_line.index('\', message_attributes')
                                 json_str = next_line[start:end].replace('\\"', '"')
                                 
-                                msg_data = json.loads(json_str)
+                                msg_data = json_loads(json_str)
                                 
                                 messages.append({
                                     'timestamp': timestamp,
@@ -298,7 +346,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'info': f'Últimas {len(messages)} publicações SNS bem-sucedidas (status 200)'
             }
             
-            self.wfile.write(json.dumps(response_data, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(response_data, indent=True))
             
         except subprocess.CalledProcessError as e:
             self.send_error(500, f"Erro ao buscar logs do Docker: {str(e)}")
@@ -331,7 +379,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 env=env
             )
             
-            queue_data = json.loads(result.stdout)
+            queue_data = json_loads(result.stdout)
             queue_url = queue_data.get('QueueUrl')
             
             if not queue_url:
@@ -368,10 +416,10 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                     'info': '0 mensagem(ns) na fila'
                 }
                 
-                self.wfile.write(json.dumps(response_data).encode())
+                self.wfile.write(json_dumps_bytes(response_data))
                 return
             
-            messages_data = json.loads(result.stdout)
+            messages_data = json_loads(result.stdout)
             raw_messages = messages_data.get('Messages', [])
             
             # Processar mensagens
@@ -386,14 +434,14 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 
                 try:
                     # A mensagem do SNS vem como JSON dentro do Body
-                    body_data = json.loads(message_body)
+                    body_data = json_loads(message_body)
                     
                     # Extrair a mensagem real do SNS
                     sns_message = body_data.get('Message', '')
                     
                     # Tentar parsear a mensagem do SNS (que é um JSON stringificado)
                     try:
-                        message_data = json.loads(sns_message)
+                        message_data = json_loads(sns_message)
                         
                         processed_messages.append({
                             'messageId': message_id,
@@ -435,7 +483,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'info': f'{len(processed_messages)} mensagem(ns) na fila'
             }
             
-            self.wfile.write(json.dumps(response_data, indent=2).encode())
+            self.wfile.write(json_dumps_bytes(response_data, indent=True))
             
         except subprocess.CalledProcessError as e:
             error_msg = e.stderr if e.stderr else str(e)
@@ -455,7 +503,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                     'error': 'Queue not found'
                 }
                 
-                self.wfile.write(json.dumps(response_data, indent=2).encode())
+                self.wfile.write(json_dumps_bytes(response_data, indent=True))
             else:
                 self.send_error(500, f"Erro ao buscar mensagens da fila: {error_msg}")
         except ConnectionAbortedError:
@@ -482,7 +530,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
             # Ler dados do body
             content_length = int(self.headers.get('Content-Length', 0))
             body = self.rfile.read(content_length)
-            data = json.loads(body.decode())
+            data = json_loads(body.decode())
             
             queue_url = data.get('queueUrl')
             messages = data.get('messages', [])
@@ -533,7 +581,7 @@ class ProxyHandler(SimpleHTTPRequestHandler):
                 'total': len(messages)
             }
             
-            self.wfile.write(json.dumps(response_data).encode())
+            self.wfile.write(json_dumps_bytes(response_data))
             
         except Exception as e:
             self.send_error(500, f"Erro ao deletar mensagens: {str(e)}")
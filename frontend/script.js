@@ -3,6 +3,7 @@
 const API_BASE_URL = 'http://localhost:8080/api';
 let currentPage = 1;
 let lastKey = null;
+let nextToken = null;
 let pageHistory = [];
 let snsAutoRefreshInterval = null;
 let lastSnsMessageCount = 0;
@@ -182,8 +183,11 @@ async function listOrders(statusFilter = null, forceRefresh = false) {
         const status = statusFilter || (statusFilterElement ? statusFilterElement.value : '');
         const limit = limitFilterElement ? limitFilterElement.value : '10';
         
-        // Verificar cache (apenas para views de status específico)
-        if (status && !forceRefresh && ordersCache[status]) {
+        // Paginação (nextToken) apenas na view de pedidos pendentes
+        const pageToken = container === 'ordersContainer' ? lastKey : null;
+        
+        // Verificar cache (apenas para views de status específico, primeira página)
+        if (status && !forceRefresh && !pageToken && ordersCache[status]) {
             const now = Date.now();
             const cacheAge = now - ordersCache[status].timestamp;
             
@@ -198,6 +202,7 @@ async function listOrders(statusFilter = null, forceRefresh = false) {
         
         let url = `${baseUrl}/pedidos?limit=${limit}`;
         if (status) url += `&status=${status}`;
+        if (pageToken) url += `&nextToken=${encodeURIComponent(pageToken)}`;
         
         showLoading(container, 'Carregando pedidos...');
         
@@ -208,7 +213,7 @@ async function listOrders(statusFilter = null, forceRefresh = false) {
             const orders = data.pedidos || [];
             
             // Atualizar cache
-            if (status) {
+            if (status && !pageToken) {
                 ordersCache[status] = {
                     data: orders,
                     timestamp: Date.now()
@@ -221,7 +226,8 @@ async function listOrders(statusFilter = null, forceRefresh = false) {
             if (container === 'ordersContainer') {
                 const paginationElement = document.getElementById('pagination');
                 if (paginationElement) {
-                    if (data.lastKey) {
+                    nextToken = data.nextToken || null;
+                    if (nextToken) {
                         paginationElement.style.display = 'flex';
                         document.getElementById('nextBtn').disabled = false;
                     } else {
@@ -268,7 +274,7 @@ function displayOrders(orders, containerId = 'ordersContainer') {
             <div class="order-items">
                 <strong>Itens (${order.itens ? order.itens.length : 0}):</strong>
                 <ul>
-                    ${order.itens ? order.itens.slice(0, 3).map(item => `<li>${item}</li>`).join('') : ''}
+                    ${order.itens ? order.itens.slice(0, 3).map(item => `<li>${formatItem(item)}</li>`).join('') : ''}
                     ${order.itens && order.itens.length > 3 ? `<li>... e mais ${order.itens.length - 3}</li>` : ''}
                 </ul>
             </div>
@@ -276,21 +282,21 @@ function displayOrders(orders, containerId = 'ordersContainer') {
     `).join('');
 }
 
-// Paginação
+// Paginação (lastKey: token da página atual; pageHistory: tokens das páginas anteriores)
 function nextPage() {
-    if (pageHistory.length > 0) {
-        lastKey = pageHistory[pageHistory.length - 1];
+    if (nextToken) {
+        pageHistory.push(lastKey);
+        lastKey = nextToken;
         currentPage++;
-        listOrders(false);
+        listOrders('pendente', true);
     }
 }
 
 function previousPage() {
     if (currentPage > 1) {
+        lastKey = pageHistory.pop();
         currentPage--;
-        pageHistory.pop();
-        lastKey = pageHistory.length > 0 ? pageHistory[pageHistory.length - 1] : null;
-        listOrders(false);
+        listOrders('pendente', true);
     }
 }
 
@@ -359,7 +365,7 @@ async function showOrderDetails(orderId) {
                             ? order.itens.map((item, index) => `
                                 <div class="detail-item-card">
                                     <span class="item-number">${index + 1}</span>
-                                    <span class="item-name">🍴 ${item}</span>
+                                    <span class="item-name">🍴 ${formatItem(item)}</span>
                                 </div>
                             `).join('')
                             : '<div class="empty-state">📭 Nenhum item no pedido</div>'
@@ -437,6 +443,15 @@ async function downloadComprovante(pedidoId) {
 }
 
 // Utilitários
+// Formatar item do pedido (objeto {nome, quantidade, preco, observacao} ou string do formato antigo)
+function formatItem(item) {
+    if (typeof item === 'string') return item;
+    let texto = `${item.quantidade || 1}x ${item.nome}`;
+    if (item.preco != null) texto += ` - R$ ${Number(item.preco).toFixed(2)}`;
+    if (item.observacao) texto += ` (${item.observacao})`;
+    return texto;
+}
+
 function formatDate(dateString) {
     if (!dateString) return '-';
     
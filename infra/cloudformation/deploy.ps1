@@ -15,6 +15,7 @@ $TEMPLATE_FILE = Join-Path $PSScriptRoot "stack.yaml"
 $LAMBDA_BUCKET = "lambda-deployments"
 $PROJECT_ROOT = Split-Path -Parent (Split-Path -Parent $PSScriptRoot)
 $LAMBDAS_DIR = Join-Path $PROJECT_ROOT "src\lambdas"
+$SHARED_DIR = Join-Path $LAMBDAS_DIR "shared"
 
 # Configurar credenciais AWS (necessário para LocalStack)
 $env:AWS_ACCESS_KEY_ID = "test"
@@ -89,6 +90,11 @@ function Deploy-Lambda {
         Copy-Item $_.FullName -Destination $tempDir
     }
     
+    # Copiar módulos compartilhados (src/lambdas/shared) para a raiz do pacote
+    Get-ChildItem $SHARED_DIR -File -Filter "*.py" | ForEach-Object {
+        Copy-Item $_.FullName -Destination $tempDir
+    }
+    
     # Instalar dependências se existir requirements.txt (exceto boto3 que já vem no runtime)
     $requirementsFile = Join-Path $lambdaPath "requirements.txt"
     if (Test-Path $requirementsFile) {
@@ -109,11 +115,11 @@ function Deploy-Lambda {
             
             $ErrorActionPreference = "Continue"
             
-            # Verificar se precisa de Pillow (bibliotecas nativas)
-            $needsLinuxBuild = $requirements | Where-Object { $_ -match 'Pillow' }
+            # Verificar se precisa de bibliotecas nativas (Pillow, orjson, brotli)
+            $needsLinuxBuild = $requirements | Where-Object { $_ -match 'Pillow|orjson|brotli' }
             
             if ($needsLinuxBuild) {
-                Write-Host "     📦 Detectado Pillow - instalando para manylinux..." -ForegroundColor Cyan
+                Write-Host "     📦 Detectado pacote nativo - instalando para manylinux..." -ForegroundColor Cyan
                 # Instalar para plataforma Linux (manylinux) compatível com Lambda
                 pip install -r $tempRequirements -t $tempDir --platform manylinux2014_x86_64 --implementation cp --python-version 39 --only-binary=:all: --upgrade --no-cache-dir 2>&1 | Out-Null
             } else {
@@ -170,10 +176,11 @@ function Deploy-Lambda {
     Remove-Item $zipFile -Force
 }
 
-# Deploy das 3 lambdas
+# Deploy das lambdas
 Deploy-Lambda "criar-pedido"
 Deploy-Lambda "processar-pedido"
 Deploy-Lambda "listar-pedidos"
+Deploy-Lambda "relay-outbox"
 
 Write-Host ""
 Write-Host "✅ Todas as Lambdas foram empacotadas e enviadas ao S3!" -ForegroundColor Green
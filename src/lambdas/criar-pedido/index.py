@@ -1,31 +1,60 @@
+import hashlib
 import json
 import os
-import boto3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Configuração para LocalStack
-# Se estiver rodando dentro do container LocalStack, usar o hostname interno
-# Se estiver testando localmente, usar localhost
-LOCALSTACK_HOSTNAME = os.getenv('LOCALSTACK_HOSTNAME', 'localhost')
-LOCALSTACK_ENDPOINT = f'http://{LOCALSTACK_HOSTNAME}:4566'
-AWS_ENDPOINT_URL = os.getenv('AWS_ENDPOINT_URL', LOCALSTACK_ENDPOINT)
+import http_compression
+import json_codec
+from aws_clients import AWS_ENDPOINT_URL, LOCALSTACK_HOSTNAME, lazy_client
+from cache import BoundedLRU
+from dynamodb_batch import chunks, retry_unprocessed
+from dynamodb_codec import marshal
+from http_headers import get_header
+from pedido_id import new_pedido_id, new_seq_attributes
+from pedido_itens import normalize_item, validate_item
+from pedido_stats import apply_counters, creation_counters, transition_counters, update_params
+from structured_log import bind, get_logger, log_payload, start_request
 
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE', 'Pedidos')
 SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL', f'http://{LOCALSTACK_HOSTNAME}:4566/000000000000/pedidos-queue')
 
-print(f"Configuração: endpoint={AWS_ENDPOINT_URL}, table={DYNAMODB_TABLE}, queue={SQS_QUEUE_URL}")
+# Limites do endpoint de criação em lote (POST /pedidos/lote)
+MAX_PEDIDOS_LOTE = int(os.getenv('MAX_PEDIDOS_LOTE', '100'))
+BATCH_MAX_TENTATIVAS = int(os.getenv('BATCH_MAX_TENTATIVAS', '5'))
 
-# Clientes AWS - usar client em vez de resource para melhor compatibilidade
-dynamodb_client = boto3.client(
-    'dynamodb',
-    endpoint_url=AWS_ENDPOINT_URL,
-    region_name='us-east-1'
-)
-sqs = boto3.client(
-    'sqs',
-    endpoint_url=AWS_ENDPOINT_URL,
-    region_name='us-east-1'
-)
+# Modo de execução de POST /pedidos:
+# - sequencial: put_item e depois send_message (padrão)
+# - paralelo: put_item e send_message simultâneos, com compensação (opt-in;
+#   a mensagem pode chegar antes do pedido e depende do ReportBatchItemFailures
+#   do processar-pedido para ser reprocessada)
+# - outbox: pedido + registro de outbox em um TransactWriteItems
+CRIAR_PEDIDO_MODO = os.getenv('CRIAR_PEDIDO_MODO', 'sequencial')
+OUTBOX_TABLE = os.getenv('OUTBOX_TABLE', 'PedidosOutbox')
+
+# Idempotência de POST /pedidos (header Idempotency-Key)
+IDEMPOTENCY_TABLE = os.getenv('IDEMPOTENCY_TABLE', 'PedidosIdempotencia')
+IDEMPOTENCY_TTL_SEGUNDOS = int(os.getenv('IDEMPOTENCY_TTL_SEGUNDOS', '86400'))
+# Validade da reserva (em_andamento): acima do timeout da Lambda, para que uma
+# invocação interrompida entre a reserva e a conclusão não prenda a chave
+IDEMPOTENCY_LEASE_SEGUNDOS = int(os.getenv('IDEMPOTENCY_LEASE_SEGUNDOS', '60'))
+IDEMPOTENCY_CACHE_TAMANHO = int(os.getenv('IDEMPOTENCY_CACHE_TAMANHO', '1000'))
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Tentativas de gerar um novo ID caso o put condicional encontre um ID existente
+MAX_TENTATIVAS_ID = 3
+
+# Limites impostos pelas APIs da AWS
+DYNAMODB_BATCH_WRITE_LIMITE = 25
+SQS_BATCH_LIMITE = 10
+
+logger = get_logger('criar-pedido')
+logger.info("Configuração carregada", extra={'endpoint': AWS_ENDPOINT_URL, 'table': DYNAMODB_TABLE, 'queue': SQS_QUEUE_URL})
+
+# Clientes AWS (criados sob demanda, configuração compartilhada em aws_clients)
+dynamodb_client = lazy_client('dynamodb')
+sqs = lazy_client('sqs')
 
 
 def validate_pedido(data):
@@ -35,6 +64,8 @@ def validate_pedido(data):
     # Validar cliente
     if not data.get('cliente'):
         errors.append('Campo "cliente" é obrigatório')
+    elif not isinstance(data['cliente'], str):
+        errors.append('Campo "cliente" deve ser um texto')
     elif len(data['cliente'].strip()) < 3:
         errors.append('Campo "cliente" deve ter pelo menos 3 caracteres')
     
@@ -45,11 +76,14 @@ def validate_pedido(data):
         errors.append('Campo "itens" deve ser uma lista')
     elif len(data['itens']) == 0:
         errors.append('Deve haver pelo menos um item no pedido')
+    else:
+        for posicao, item in enumerate(data['itens'], start=1):
+            errors.extend(validate_item(item, posicao))
     
     # Validar mesa
     if not data.get('mesa'):
         errors.append('Campo "mesa" é obrigatório')
-    elif not isinstance(data['mesa'], int):
+    elif isinstance(data['mesa'], bool) or not isinstance(data['mesa'], int):
         errors.append('Campo "mesa" deve ser um número inteiro')
     elif data['mesa'] <= 0:
         errors.append('Campo "mesa" deve ser maior que zero')
@@ -57,120 +91,688 @@ def validate_pedido(data):
     return errors
 
 
-def create_response(status_code, body):
-    """Cria resposta HTTP padronizada."""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'POST, OPTIONS'
-        },
-        'body': json.dumps(body, ensure_ascii=False)
+# Respostas de requisições idempotentes já concluídas neste container
+idempotency_cache = BoundedLRU(IDEMPOTENCY_CACHE_TAMANHO)
+
+
+def create_response(status_code, body, extra_headers=None):
+    """Cria resposta HTTP padronizada (comprimida se o cliente aceitar)."""
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type, Idempotency-Key',
+        'Access-Control-Allow-Methods': 'POST, OPTIONS'
     }
+    if extra_headers:
+        headers.update(extra_headers)
+    
+    return http_compression.compress_response({
+        'statusCode': status_code,
+        'headers': headers,
+        'body': json_codec.dumps(body)
+    })
 
 
-def handler(event, context):
+def payload_fingerprint(body):
+    """Hash do payload, usado para detectar reuso de chave com outro conteúdo."""
+    # Sempre com o json da biblioteca padrão: o hash não pode mudar conforme o backend do json_codec
+    canonical = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def claim_idempotency_key(idempotency_key, fingerprint):
     """
-    Lambda handler para criar pedido.
+    Reserva a chave de idempotência com um put condicional.
     
-    Fluxo:
-    1. Valida payload
-    2. Gera ID único para o pedido
-    3. Salva no DynamoDB
-    4. Envia mensagem para SQS
-    5. Retorna resposta HTTP
+    Retorna None se a chave foi reservada por esta requisição, ou o
+    registro existente (estado, fingerprint, statusCode, body) caso
+    contrário. Registros expirados ainda não removidos pelo TTL são
+    tratados como inexistentes.
+    
+    A reserva vale IDEMPOTENCY_LEASE_SEGUNDOS (`lease_expires_at`); só a
+    conclusão grava a validade de IDEMPOTENCY_TTL_SEGUNDOS. Uma reserva
+    vencida (invocação interrompida antes de concluir ou liberar a chave)
+    pode ser retomada por uma nova tentativa.
     """
+    now = int(time.time())
     try:
-        # Parse do body
-        if 'body' in event:
-            body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
-        else:
-            body = event
+        dynamodb_client.put_item(
+            TableName=IDEMPOTENCY_TABLE,
+            Item={
+                'chave': {'S': idempotency_key},
+                'estado': {'S': 'em_andamento'},
+                'fingerprint': {'S': fingerprint},
+                'lease_expires_at': {'N': str(now + IDEMPOTENCY_LEASE_SEGUNDOS)},
+                'expires_at': {'N': str(now + IDEMPOTENCY_LEASE_SEGUNDOS)}
+            },
+            ConditionExpression='attribute_not_exists(chave) OR expires_at < :now OR lease_expires_at < :now',
+            ExpressionAttributeValues={':now': {'N': str(now)}}
+        )
+        return None
+    except dynamodb_client.exceptions.ConditionalCheckFailedException:
+        pass
+    
+    response = dynamodb_client.get_item(
+        TableName=IDEMPOTENCY_TABLE,
+        Key={'chave': {'S': idempotency_key}},
+        ConsistentRead=True
+    )
+    item = response.get('Item', {})
+    record = {
+        'estado': item.get('estado', {}).get('S', 'em_andamento'),
+        'fingerprint': item.get('fingerprint', {}).get('S', '')
+    }
+    if 'response_body' in item:
+        record['statusCode'] = int(item['status_code']['N'])
+        record['body'] = json_codec.loads(item['response_body']['S'])
+    return record
+
+
+def complete_idempotency_key(idempotency_key, record):
+    """Associa a resposta final à chave de idempotência (válida por IDEMPOTENCY_TTL_SEGUNDOS)."""
+    dynamodb_client.update_item(
+        TableName=IDEMPOTENCY_TABLE,
+        Key={'chave': {'S': idempotency_key}},
+        UpdateExpression='SET estado = :estado, status_code = :status_code, response_body = :body, expires_at = :expires_at REMOVE lease_expires_at',
+        ExpressionAttributeValues={
+            ':estado': {'S': 'concluido'},
+            ':status_code': {'N': str(record['statusCode'])},
+            ':body': {'S': json_codec.dumps(record['body'])},
+            ':expires_at': {'N': str(int(time.time()) + IDEMPOTENCY_TTL_SEGUNDOS)}
+        }
+    )
+
+
+def release_idempotency_key(idempotency_key):
+    """Libera a chave para que o cliente possa tentar novamente."""
+    try:
+        dynamodb_client.delete_item(
+            TableName=IDEMPOTENCY_TABLE,
+            Key={'chave': {'S': idempotency_key}}
+        )
+    except Exception as e:
+        logger.error("Erro ao liberar Idempotency-Key %s: %s", idempotency_key, e)
+
+
+def parse_body(event):
+    """Extrai o body da requisição (API Gateway ou invocação direta)."""
+    if 'body' in event:
+        body = http_compression.decode_request_body(event)
+        return json_codec.loads(body) if isinstance(body, str) else body
+    return event
+
+
+def is_lote_request(event):
+    """Indica se a requisição é para POST /pedidos/lote."""
+    resource = event.get('resource') or event.get('path') or ''
+    return resource.rstrip('/').endswith('/pedidos/lote')
+
+
+def build_pedido(data, pedido_id, timestamp):
+    """Monta o pedido a partir do payload já validado."""
+    return {
+        'id': pedido_id,
+        'cliente': data['cliente'].strip(),
+        'itens': [normalize_item(item) for item in data['itens']],
+        'mesa': data['mesa'],
+        'status': 'pendente',
+        'timestamp': timestamp.isoformat()
+    }
+
+
+def pedido_to_dynamodb_item(pedido):
+    """Converte o pedido para o formato de item do DynamoDB."""
+    return {
+        'id': {'S': pedido['id']},
+        'cliente': {'S': pedido['cliente']},
+        'itens': marshal(pedido['itens']),
+        'mesa': {'N': str(pedido['mesa'])},
+        'status': {'S': pedido['status']},
+        'timestamp': {'S': pedido['timestamp']},
+        # Partição do índice dia-timestamp-index (consultas por intervalo de horário)
+        'dia': {'S': pedido['timestamp'][:10]},
+        # Sequência de atualização (sincronização incremental, GET /pedidos?since=)
+        **new_seq_attributes()
+    }
+
+
+def pedido_to_sqs_message(pedido):
+    """Monta o corpo e os atributos da mensagem SQS do pedido."""
+    sqs_message = {
+        'pedidoId': pedido['id'],
+        'cliente': pedido['cliente'],
+        'itens': pedido['itens'],
+        'mesa': pedido['mesa'],
+        'timestamp': pedido['timestamp']
+    }
+    
+    return {
+        'MessageBody': json_codec.dumps(sqs_message),
+        'MessageAttributes': {
+            'pedidoId': {
+                'StringValue': pedido['id'],
+                'DataType': 'String'
+            },
+            'status': {
+                'StringValue': 'pendente',
+                'DataType': 'String'
+            }
+        }
+    }
+
+
+def put_pedido(pedido):
+    """Grava o pedido no DynamoDB sem sobrescrever um ID já existente."""
+    dynamodb_client.put_item(
+        TableName=DYNAMODB_TABLE,
+        Item=pedido_to_dynamodb_item(pedido),
+        ConditionExpression='attribute_not_exists(id)'
+    )
+
+
+def send_pedido_message(pedido):
+    """Envia a mensagem do pedido para a fila de processamento."""
+    sqs.send_message(
+        QueueUrl=SQS_QUEUE_URL,
+        **pedido_to_sqs_message(pedido)
+    )
+
+
+def record_stats(counters):
+    """Atualiza os contadores de estatísticas (falhas só são registradas no log)."""
+    try:
+        apply_counters(dynamodb_client, counters)
+    except Exception as e:
+        logger.error("Erro ao atualizar estatísticas: %s", e)
+
+
+def mark_pedido_erro(pedido):
+    """Marca como erro um pedido gravado que não pôde ser enfileirado."""
+    try:
+        seq = new_seq_attributes()
+        response = dynamodb_client.update_item(
+            TableName=DYNAMODB_TABLE,
+            Key={'id': {'S': pedido['id']}},
+            UpdateExpression='SET #status = :status, #seq = :seq, #seq_dia = :seq_dia',
+            ExpressionAttributeNames={'#status': 'status', '#seq': 'seq', '#seq_dia': 'seq_dia'},
+            ExpressionAttributeValues={':status': {'S': 'erro'}, ':seq': seq['seq'], ':seq_dia': seq['seq_dia']},
+            ReturnValues='UPDATED_OLD'
+        )
+    except Exception as e:
+        logger.error("Erro ao marcar pedido %s como erro: %s", pedido['id'], e)
+        return
+    
+    # Sem o status em Attributes, o valor não mudou
+    status_antigo = response.get('Attributes', {}).get('status', {}).get('S', 'erro')
+    record_stats(transition_counters(pedido['mesa'], status_antigo, 'erro'))
+
+
+# Pool de threads reaproveitado entre invocações (criado sob demanda)
+_executor = None
+
+
+def get_executor():
+    """Retorna o pool usado pelo modo paralelo e pelos contadores de estatísticas."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='criar-pedido')
+    return _executor
+
+
+def save_and_enqueue_parallel(pedido):
+    """
+    Grava o pedido e envia a mensagem ao mesmo tempo.
+    
+    A latência passa a ser a do mais lento dos dois round trips, em vez
+    da soma. Se apenas um dos lados falhar:
+    - gravou mas não enfileirou: reenvia a mensagem uma vez e, se falhar
+      de novo, marca o pedido como erro
+    - enfileirou mas não gravou: tenta gravar mais uma vez; se falhar, a
+      mensagem órfã é descartada pelo processar-pedido (o update exige
+      que o pedido exista) e acaba na DLQ
+    
+    Os contadores de estatísticas também são atualizados em paralelo; se o
+    pedido acabar não sendo gravado, os incrementos são desfeitos.
+    """
+    executor = get_executor()
+    counters = creation_counters([pedido])
+    put_future = executor.submit(put_pedido, pedido)
+    send_future = executor.submit(send_pedido_message, pedido)
+    stats_future = executor.submit(record_stats, counters)
+    
+    put_error = put_future.exception()
+    send_error = send_future.exception()
+    stats_future.result()
+    
+    if put_error is None and send_error is None:
+        return
+    
+    if put_error is None:
+        logger.warning("Falha ao enviar para SQS, reenviando: %s (%s)", pedido['id'], send_error)
+        try:
+            send_pedido_message(pedido)
+        except Exception:
+            mark_pedido_erro(pedido)
+            raise
+        return
+    
+    if send_error is None and not isinstance(put_error, dynamodb_client.exceptions.ConditionalCheckFailedException):
+        logger.warning("Falha ao salvar no DynamoDB, tentando novamente: %s (%s)", pedido['id'], put_error)
+        try:
+            put_pedido(pedido)
+            return
+        except Exception as e:
+            put_error = e
+    
+    # Pedido não gravado: desfazer os incrementos
+    record_stats({nome: -delta for nome, delta in counters.items()})
+    raise put_error
+
+
+def error_code(error):
+    """Código de erro de uma exceção do boto3 (None para outras exceções)."""
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def put_pedidos_individually(bloco, request_items):
+    """Grava com PutItem os pedidos de `bloco` ainda pendentes em `request_items`; retorna os IDs que falharam."""
+    pendentes = {request['PutRequest']['Item']['id']['S'] for request in request_items.get(DYNAMODB_TABLE, [])}
+    falhas = set()
+    for pedido in bloco:
+        if pedido['id'] not in pendentes:
+            continue
+        try:
+            put_pedido(pedido)
+        except Exception as e:
+            logger.warning("Erro ao gravar pedido %s: %s", pedido['id'], e)
+            falhas.add(pedido['id'])
+    return falhas
+
+
+def batch_write_pedidos(pedidos):
+    """
+    Grava os pedidos com BatchWriteItem (blocos de 25).
+    
+    BatchWriteItem não aceita ConditionExpression; a unicidade depende do
+    gerador de IDs (timestamp em ms + 80 bits aleatórios por container).
+    
+    Itens devolvidos em `UnprocessedItems` são reenviados com backoff
+    exponencial até BATCH_MAX_TENTATIVAS. Se o DynamoDB rejeitar o bloco
+    (ValidationException, que recusa o bloco inteiro por causa de um item),
+    os pedidos restantes são gravados um a um, para que só o inválido
+    falhe. Retorna o conjunto de IDs que não puderam ser gravados.
+    """
+    falhas = set()
+    
+    for bloco in chunks(pedidos, DYNAMODB_BATCH_WRITE_LIMITE):
+        request_items = {
+            DYNAMODB_TABLE: [
+                {'PutRequest': {'Item': pedido_to_dynamodb_item(pedido)}}
+                for pedido in bloco
+            ]
+        }
+        
+        def write(items):
+            try:
+                return dynamodb_client.batch_write_item(RequestItems=items)
+            except Exception as e:
+                if error_code(e) == 'ValidationException':
+                    logger.warning("BatchWriteItem rejeitado, gravando os pedidos um a um: %s", e)
+                    falhas.update(put_pedidos_individually(bloco, items))
+                    return {}
+                # Outros erros: o bloco inteiro entra na próxima tentativa
+                logger.warning("Erro no BatchWriteItem: %s", e)
+                return {'UnprocessedItems': items}
         
-        print(f"Payload recebido: {json.dumps(body)}")
+        request_items = retry_unprocessed(write, request_items, 'UnprocessedItems', BATCH_MAX_TENTATIVAS)
+        
+        # O que sobrou após todas as tentativas é considerado falha
+        for request in request_items.get(DYNAMODB_TABLE, []):
+            falhas.add(request['PutRequest']['Item']['id']['S'])
+    
+    return falhas
+
+
+def send_pedidos_batch(pedidos):
+    """
+    Envia as mensagens dos pedidos com SendMessageBatch (blocos de 10).
+    
+    Retorna um dicionário {pedido_id: mensagem de erro} com as entradas
+    que falharam.
+    """
+    falhas = {}
+    
+    for bloco in chunks(pedidos, SQS_BATCH_LIMITE):
+        # O Id de cada entrada é o índice no bloco (Ids do SQS aceitam só [A-Za-z0-9_-])
+        entries = [
+            dict(Id=str(i), **pedido_to_sqs_message(pedido))
+            for i, pedido in enumerate(bloco)
+        ]
+        
+        try:
+            response = sqs.send_message_batch(QueueUrl=SQS_QUEUE_URL, Entries=entries)
+        except Exception as e:
+            logger.error("Erro no SendMessageBatch: %s", e)
+            for pedido in bloco:
+                falhas[pedido['id']] = str(e)
+            continue
+        
+        for failed in response.get('Failed', []):
+            pedido = bloco[int(failed['Id'])]
+            falhas[pedido['id']] = failed.get('Message') or failed.get('Code', 'Falha no envio')
+    
+    return falhas
+
+
+def handle_lote(event):
+    """
+    Cria vários pedidos em uma única requisição (POST /pedidos/lote).
+    
+    Cada pedido é validado individualmente: pedidos inválidos ou que
+    falharem na gravação/envio aparecem como erro no resultado, sem
+    impedir a criação dos demais.
+    """
+    body = parse_body(event)
+    pedidos_payload = body.get('pedidos') if isinstance(body, dict) else None
+    
+    if not isinstance(pedidos_payload, list) or len(pedidos_payload) == 0:
+        return create_response(400, {
+            'error': 'Dados inválidos',
+            'details': ['Campo "pedidos" deve ser uma lista com pelo menos um pedido']
+        })
+    
+    if len(pedidos_payload) > MAX_PEDIDOS_LOTE:
+        return create_response(400, {
+            'error': 'Dados inválidos',
+            'details': [f'O lote deve ter no máximo {MAX_PEDIDOS_LOTE} pedidos']
+        })
+    
+    logger.info("Lote recebido com %d pedidos", len(pedidos_payload))
+    
+    resultados = []
+    validos = []
+    
+    for indice, data in enumerate(pedidos_payload):
+        try:
+            errors = validate_pedido(data) if isinstance(data, dict) else ['Pedido deve ser um objeto']
+            if not errors:
+                pedido_id = new_pedido_id()
+                pedido = build_pedido(data, pedido_id, datetime.utcnow())
+        except Exception as e:
+            # Um pedido malformado que escape da validação não derruba o lote
+            logger.warning("Pedido %d do lote inválido: %s", indice, e)
+            errors = ['Pedido malformado']
         
-        # Validar dados
-        errors = validate_pedido(body)
         if errors:
-            return create_response(400, {
+            resultados.append({
+                'indice': indice,
+                'status': 'erro',
                 'error': 'Dados inválidos',
                 'details': errors
             })
+            continue
         
-        # Gerar ID do pedido (timestamp + ms)
-        timestamp = datetime.utcnow()
-        pedido_id = f"pedido-{timestamp.strftime('%Y%m%d%H%M%S')}"
-        
-        # Montar item do pedido
-        pedido = {
-            'id': pedido_id,
-            'cliente': body['cliente'].strip(),
-            'itens': body['itens'],
-            'mesa': body['mesa'],
+        validos.append(pedido)
+        resultados.append({
+            'indice': indice,
+            'pedidoId': pedido_id,
             'status': 'pendente',
-            'timestamp': timestamp.isoformat()
-        }
+            'timestamp': pedido['timestamp']
+        })
+    
+    # Só enfileira o que foi efetivamente gravado no DynamoDB
+    falhas_dynamodb = batch_write_pedidos(validos) if validos else set()
+    gravados = [pedido for pedido in validos if pedido['id'] not in falhas_dynamodb]
+    falhas_sqs = send_pedidos_batch(gravados) if gravados else {}
+    
+    # Um único UpdateItem com os incrementos de todos os pedidos gravados
+    record_stats(creation_counters(gravados))
+    pedidos_por_id = {pedido['id']: pedido for pedido in gravados}
+    
+    for resultado in resultados:
+        pedido_id = resultado.get('pedidoId')
+        if pedido_id in falhas_dynamodb:
+            resultado.update({'status': 'erro', 'error': 'Falha ao salvar pedido'})
+        elif pedido_id in falhas_sqs:
+            # Pedido gravado mas não enfileirado: marcar como erro para não ficar pendente
+            mark_pedido_erro(pedidos_por_id[pedido_id])
+            resultado.update({
+                'status': 'erro',
+                'error': 'Falha ao enviar pedido para processamento',
+                'details': falhas_sqs[pedido_id]
+            })
+    
+    criados = sum(1 for r in resultados if r['status'] == 'pendente')
+    logger.info("Lote processado", extra={'criados': criados, 'falhas': len(resultados) - criados})
+    
+    # 201 se todos foram criados, 207 (Multi-Status) se houve falhas parciais
+    return create_response(201 if criados == len(resultados) else 207, {
+        'message': f'{criados} de {len(resultados)} pedidos criados',
+        'criados': criados,
+        'falhas': len(resultados) - criados,
+        'resultados': resultados
+    })
+
+
+def save_pedido_sequential(body):
+    """
+    Grava o pedido (put condicional) e depois envia a mensagem para o SQS.
+    
+    Em caso (improvável) de colisão de ID, gera outro ID em vez de
+    sobrescrever o pedido existente.
+    """
+    for tentativa in range(MAX_TENTATIVAS_ID):
+        pedido = build_pedido(body, new_pedido_id(), datetime.utcnow())
         
-        print(f"Criando pedido: {pedido_id}")
+        bind(pedidoId=pedido['id'])
+        logger.debug("Criando pedido: %s", pedido['id'])
         
-        # Salvar no DynamoDB usando client
-        dynamodb_client.put_item(
-            TableName=DYNAMODB_TABLE,
-            Item={
-                'id': {'S': pedido_id},
-                'cliente': {'S': pedido['cliente']},
-                'itens': {'L': [{'S': item} for item in pedido['itens']]},
-                'mesa': {'N': str(pedido['mesa'])},
-                'status': {'S': pedido['status']},
-                'timestamp': {'S': pedido['timestamp']}
-            }
-        )
-        print(f"Pedido salvo no DynamoDB: {pedido_id}")
+        try:
+            put_pedido(pedido)
+            break
+        except dynamodb_client.exceptions.ConditionalCheckFailedException:
+            logger.warning("ID já existente, gerando novo: %s", pedido['id'])
+    else:
+        raise RuntimeError('Não foi possível gerar um ID único para o pedido')
+    
+    logger.debug("Pedido salvo no DynamoDB: %s", pedido['id'])
+    
+    # Contadores de estatísticas em paralelo com o envio (não somam latência)
+    stats_future = get_executor().submit(record_stats, creation_counters([pedido]))
+    
+    # Enviar mensagem para SQS
+    send_pedido_message(pedido)
+    stats_future.result()
+    logger.info("Pedido criado (modo sequencial)")
+    
+    return pedido
+
+
+def save_pedido_with_outbox(pedido):
+    """
+    Grava o pedido, o registro de outbox e os contadores de estatísticas
+    em uma única transação.
+    
+    A mensagem é enviada ao SQS depois, pela Lambda relay-outbox. Assim
+    não existe janela em que o pedido fica gravado sem mensagem (ou o
+    contrário), e a API paga um único round trip ao DynamoDB.
+    """
+    message = pedido_to_sqs_message(pedido)
+    
+    dynamodb_client.transact_write_items(
+        TransactItems=[
+            {
+                'Put': {
+                    'TableName': DYNAMODB_TABLE,
+                    'Item': pedido_to_dynamodb_item(pedido),
+                    'ConditionExpression': 'attribute_not_exists(id)'
+                }
+            },
+            {
+                'Put': {
+                    'TableName': OUTBOX_TABLE,
+                    'Item': {
+                        'id': {'S': pedido['id']},
+                        'message_body': {'S': message['MessageBody']},
+                        'message_attributes': {'S': json_codec.dumps(message['MessageAttributes'])},
+                        'created_at': {'N': str(int(time.time()))}
+                    }
+                }
+            },
+            {'Update': update_params(creation_counters([pedido]))}
+        ]
+    )
+
+
+def create_pedido(body):
+    """
+    Cria um pedido a partir do payload e retorna a resposta HTTP.
+    
+    Fluxo:
+    1. Valida payload
+    2. Gera ID único para o pedido
+    3. Salva no DynamoDB
+    4. Envia mensagem para SQS
+    
+    Os passos 3 e 4 dependem de CRIAR_PEDIDO_MODO:
+    - sequencial: um após o outro
+    - paralelo: ao mesmo tempo, com compensação
+    - outbox: pedido + registro de outbox em uma transação; o envio é
+      feito pela Lambda relay-outbox
+    """
+    # Validar dados
+    errors = validate_pedido(body)
+    if errors:
+        return create_response(400, {
+            'error': 'Dados inválidos',
+            'details': errors
+        })
+    
+    if CRIAR_PEDIDO_MODO == 'paralelo':
+        pedido = build_pedido(body, new_pedido_id(), datetime.utcnow())
+        bind(pedidoId=pedido['id'])
         
-        # Enviar mensagem para SQS
-        sqs_message = {
-            'pedidoId': pedido_id,
-            'cliente': pedido['cliente'],
-            'itens': pedido['itens'],
-            'mesa': pedido['mesa'],
-            'timestamp': pedido['timestamp']
-        }
+        save_and_enqueue_parallel(pedido)
+        logger.info("Pedido criado (modo paralelo)")
+    
+    elif CRIAR_PEDIDO_MODO == 'outbox':
+        pedido = build_pedido(body, new_pedido_id(), datetime.utcnow())
+        bind(pedidoId=pedido['id'])
         
-        sqs.send_message(
-            QueueUrl=SQS_QUEUE_URL,
-            MessageBody=json.dumps(sqs_message, ensure_ascii=False),
-            MessageAttributes={
-                'pedidoId': {
-                    'StringValue': pedido_id,
-                    'DataType': 'String'
-                },
-                'status': {
-                    'StringValue': 'pendente',
-                    'DataType': 'String'
-                }
+        save_pedido_with_outbox(pedido)
+        logger.info("Pedido criado (modo outbox)")
+    
+    else:
+        pedido = save_pedido_sequential(body)
+    
+    # Resposta de sucesso
+    return create_response(201, {
+        'message': 'Pedido criado com sucesso',
+        'pedidoId': pedido['id'],
+        'status': 'pendente',
+        'timestamp': pedido['timestamp']
+    })
+
+
+def handle_idempotent(idempotency_key, body):
+    """
+    Cria o pedido garantindo que a mesma Idempotency-Key gere um único pedido.
+    
+    1. Consulta o cache LRU do container (replay sem chamadas à AWS)
+    2. Reserva a chave na tabela de idempotência (put condicional)
+    3. Cria o pedido e grava a resposta associada à chave
+    
+    Se a chave já foi concluída, devolve a resposta original. Se ainda está
+    em andamento em outra requisição, retorna 409.
+    """
+    fingerprint = payload_fingerprint(body)
+    
+    cached = idempotency_cache.get(idempotency_key)
+    if cached is None:
+        existing = claim_idempotency_key(idempotency_key, fingerprint)
+        
+        if existing is None:
+            # Chave reservada: criar o pedido normalmente
+            try:
+                response = create_pedido(body)
+            except Exception:
+                release_idempotency_key(idempotency_key)
+                raise
+            
+            if response['statusCode'] != 201:
+                # Só respostas de sucesso ficam associadas à chave
+                release_idempotency_key(idempotency_key)
+                return response
+            
+            record = {
+                'fingerprint': fingerprint,
+                'statusCode': response['statusCode'],
+                'body': json_codec.loads(http_compression.response_text(response))
             }
-        )
-        print(f"Mensagem enviada para SQS: {pedido_id}")
+            try:
+                complete_idempotency_key(idempotency_key, record)
+            except Exception as e:
+                # O pedido já foi criado e enfileirado: responder 201 mesmo
+                # assim. A reserva vence em IDEMPOTENCY_LEASE_SEGUNDOS
+                logger.error("Erro ao concluir Idempotency-Key %s: %s", idempotency_key, e)
+            idempotency_cache.put(idempotency_key, record)
+            return response
         
-        # Resposta de sucesso
-        return create_response(201, {
-            'message': 'Pedido criado com sucesso',
-            'pedidoId': pedido_id,
-            'status': 'pendente',
-            'timestamp': pedido['timestamp']
+        if existing['estado'] != 'concluido':
+            return create_response(409, {
+                'error': 'Requisição com esta Idempotency-Key ainda está em processamento',
+                'idempotencyKey': idempotency_key
+            })
+        
+        cached = existing
+        idempotency_cache.put(idempotency_key, cached)
+    
+    if cached['fingerprint'] != fingerprint:
+        return create_response(422, {
+            'error': 'Idempotency-Key já utilizada com um payload diferente',
+            'idempotencyKey': idempotency_key
         })
+    
+    logger.info("Replay de requisição idempotente: %s", idempotency_key)
+    return create_response(cached['statusCode'], cached['body'], {'Idempotent-Replayed': 'true'})
+
+
+def handler(event, context):
+    """
+    Lambda handler para criar pedido.
+    
+    Rotas suportadas:
+    - POST /pedidos - Cria um pedido (aceita o header Idempotency-Key)
+    - POST /pedidos/lote - Cria vários pedidos (BatchWriteItem + SendMessageBatch)
+    """
+    start_request(context)
+    http_compression.start_request(event)
+    
+    try:
+        if is_lote_request(event):
+            return handle_lote(event)
+        
+        # Parse do body
+        body = parse_body(event)
         
-    except json.JSONDecodeError as e:
-        print(f"Erro ao parsear JSON: {str(e)}")
+        log_payload(logger, "Payload recebido", body)
+        
+        idempotency_key = get_header(event, IDEMPOTENCY_HEADER)
+        if idempotency_key:
+            bind(idempotencyKey=idempotency_key)
+            return handle_idempotent(idempotency_key, body)
+        
+        return create_pedido(body)
+    
+    except json_codec.JSONDecodeError as e:
+        logger.warning("Erro ao parsear JSON: %s", e)
         return create_response(400, {
             'error': 'JSON inválido',
             'details': str(e)
         })
     
     except Exception as e:
-        print(f"Erro inesperado: {str(e)}")
+        logger.exception("Erro inesperado: %s", e)
         return create_response(500, {
             'error': 'Erro interno do servidor',
             'details': str(e)
@@ -0,0 +1,144 @@
+"""
+Exportação de pedidos em NDJSON comprimido com gzip.
+
+Os pedidos são serializados um por linha e comprimidos à medida que o
+Scan avança: em memória fica só o trecho comprimido ainda não enviado,
+nunca a lista de pedidos.
+
+Destinos:
+- InlineBuffer: buffer em memória com limite de tamanho, para devolver o
+  arquivo na própria resposta da API (sujeita ao limite de payload do
+  API Gateway/Lambda)
+- S3MultipartWriter: envia o arquivo ao S3 em partes (multipart upload)
+  assim que cada parte enche, para exportações grandes
+"""
+import gzip
+
+# Nível de compressão: 6 é o padrão do gzip (9 custa bem mais CPU e ganha pouco)
+GZIP_NIVEL = 6
+
+# Linhas acumuladas antes de cada chamada ao compressor
+BLOCO_ESCRITA_BYTES = 64 * 1024
+
+# Menor parte aceita pelo S3 em um multipart upload (exceto a última)
+S3_PARTE_MINIMA_BYTES = 5 * 1024 * 1024
+
+
+class ExportTooLargeError(Exception):
+    """O arquivo comprimido passou do limite da resposta inline."""
+
+
+class InlineBuffer:
+    """Destino em memória que falha ao passar de `max_bytes`."""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._buffer = bytearray()
+    
+    def write(self, data):
+        if len(self._buffer) + len(data) > self.max_bytes:
+            raise ExportTooLargeError(f'Exportação maior que {self.max_bytes} bytes')
+        self._buffer += data
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def getvalue(self):
+        return bytes(self._buffer)
+
+
+class S3MultipartWriter:
+    """
+    Destino que envia o conteúdo ao S3 por multipart upload.
+    
+    Cada parte é enviada quando o buffer atinge `part_size` bytes, então a
+    memória usada não passa de uma parte. `close()` envia a última parte e
+    conclui o upload; `abort()` descarta as partes já enviadas. Não herda de
+    io.IOBase de propósito: um writer abandonado não deve concluir o upload.
+    """
+    
+    def __init__(self, s3_client, bucket, key, part_size, content_type='application/gzip'):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, S3_PARTE_MINIMA_BYTES)
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._parts = []
+        self.closed = False
+        self._upload_id = s3_client.create_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            ContentType=content_type
+        )['UploadId']
+    
+    def write(self, data):
+        self._buffer += data
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self.part_size:
+            self._upload_part()
+        return len(data)
+    
+    def flush(self):
+        # As partes só são enviadas cheias (o S3 exige ao menos 5 MB por parte)
+        pass
+    
+    def _upload_part(self):
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer)
+        )
+        self._parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self._buffer.clear()
+    
+    def close(self):
+        if self.closed:
+            return
+        if self._buffer or not self._parts:
+            self._upload_part()
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={'Parts': self._parts}
+        )
+        self.closed = True
+    
+    def abort(self):
+        """Cancela o upload (as partes enviadas são descartadas pelo S3)."""
+        if self.closed:
+            return
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        self._buffer.clear()
+        self.closed = True
+
+
+def write_ndjson_gzip(records, fileobj, serialize):
+    """
+    Escreve `records` em `fileobj` como NDJSON comprimido (gzip).
+    
+    - serialize(record) -> bytes: uma linha JSON, sem a quebra de linha
+    
+    As linhas são agrupadas em blocos de BLOCO_ESCRITA_BYTES antes de ir para
+    o compressor. Retorna o número de registros escritos.
+    """
+    count = 0
+    bloco = bytearray()
+    
+    with gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=GZIP_NIVEL) as gz:
+        for record in records:
+            bloco += serialize(record)
+            bloco += b'\n'
+            count += 1
+            if len(bloco) >= BLOCO_ESCRITA_BYTES:
+                gz.write(bloco)
+                bloco.clear()
+        if bloco:
+            gz.write(bloco)
+    
+    return count
@@ -1,40 +1,214 @@
-import json
+import base64
+import functools
+import hashlib
+import heapq
 import os
-import boto3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 
-# Configuração para LocalStack
-LOCALSTACK_HOSTNAME = os.getenv('LOCALSTACK_HOSTNAME', 'localhost')
-LOCALSTACK_ENDPOINT = f'http://{LOCALSTACK_HOSTNAME}:4566'
-AWS_ENDPOINT_URL = os.getenv('AWS_ENDPOINT_URL', LOCALSTACK_ENDPOINT)
+import http_compression
+import json_codec
+from aws_clients import AWS_ENDPOINT_URL, lazy_client
+from cache import TTLCache
+from dynamodb_batch import chunks, retry_unprocessed
+from dynamodb_codec import parse_number, unmarshal
+from export import ExportTooLargeError, InlineBuffer, S3MultipartWriter, write_ndjson_gzip
+from http_headers import get_header
+from pagination import InvalidTokenError, decode_token, encode_token, merge_partitions
+from parallel_scan import parallel_scan
+from pedido_id import is_seq, seq_dia, seq_from_timestamp_ms
+from pedido_itens import normalize_item
+from pedido_stats import STATS_CHAVE, STATS_TABLE, parse_stats
+from structured_log import bind, get_logger, log_payload, start_request
 
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE', 'Pedidos')
+STATUS_INDEX = os.getenv('STATUS_INDEX', 'status-timestamp-index')
+DIA_INDEX = os.getenv('DIA_INDEX', 'dia-timestamp-index')
+SYNC_INDEX = os.getenv('SYNC_INDEX', 'sync-index')
 
-print(f"Configuração: endpoint={AWS_ENDPOINT_URL}, table={DYNAMODB_TABLE}")
+# Status possíveis de um pedido (partições do índice status-timestamp-index)
+STATUS_PEDIDO = ('pendente', 'processado', 'erro')
 
-# Cliente DynamoDB
-dynamodb_client = boto3.client(
-    'dynamodb',
-    endpoint_url=AWS_ENDPOINT_URL,
-    region_name='us-east-1'
-)
+# Campos aceitos em `fields=`. id, status e timestamp sempre são lidos:
+# formam as chaves de paginação e a ordenação por recência.
+CAMPOS_PEDIDO = ('id', 'status', 'timestamp', 'cliente', 'mesa', 'itens', 'comprovante_url', 'updated_at')
+CAMPOS_OBRIGATORIOS = ('id', 'status', 'timestamp')
 
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = int(os.getenv('LISTAR_LIMITE_MAXIMO', '100'))
 
-def create_response(status_code, body):
-    """Cria resposta HTTP padronizada."""
-    return {
-        'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'GET, OPTIONS'
-        },
-        'body': json.dumps(body, ensure_ascii=False)
+# Intervalo (from/to): maior número de dias consultados (uma Query por dia)
+# e de Queries executadas ao mesmo tempo
+INTERVALO_MAXIMO_DIAS = int(os.getenv('LISTAR_INTERVALO_MAXIMO_DIAS', '31'))
+CONSULTAS_PARALELAS = int(os.getenv('LISTAR_CONSULTAS_PARALELAS', '8'))
+
+# Sincronização incremental (since=): escritas com `seq` mais recente que
+# SYNC_JANELA_MS ainda podem não estar visíveis (latência, relógios dos
+# containers) e são reenviadas na próxima sincronização; um watermark com
+# mais de SYNC_MAXIMO_DIAS dias exige recarregar a lista completa
+SYNC_JANELA_MS = int(os.getenv('SYNC_JANELA_MS', '5000'))
+SYNC_MAXIMO_DIAS = int(os.getenv('SYNC_MAXIMO_DIAS', '7'))
+
+# Segredo para assinar o nextToken (defina um valor próprio fora do ambiente local)
+PAGINATION_TOKEN_SECRET_PADRAO = 'pedidos-localstack-dev'
+PAGINATION_TOKEN_SECRET = os.getenv('PAGINATION_TOKEN_SECRET', PAGINATION_TOKEN_SECRET_PADRAO)
+
+# Cache de GET /pedidos/{id} no container quente: TTL (segundos) por status.
+# Pedidos pendentes mudam logo (processar-pedido); os finalizados quase nunca
+# ("erro" pode virar "processado" quando a mensagem é reprocessada).
+PEDIDO_CACHE_TAMANHO = int(os.getenv('PEDIDO_CACHE_TAMANHO', '500'))
+PEDIDO_CACHE_TTL = {
+    'pendente': float(os.getenv('PEDIDO_CACHE_TTL_PENDENTE', '2')),
+    'processado': float(os.getenv('PEDIDO_CACHE_TTL_PROCESSADO', '300')),
+    'erro': float(os.getenv('PEDIDO_CACHE_TTL_ERRO', '60'))
+}
+
+# Busca em lote (GET /pedidos?ids=): máximo de IDs por requisição e
+# tentativas para as chaves não processadas do BatchGetItem
+LISTAR_IDS_MAXIMO = int(os.getenv('LISTAR_IDS_MAXIMO', '500'))
+BATCH_MAX_TENTATIVAS = int(os.getenv('BATCH_MAX_TENTATIVAS', '5'))
+
+# Limite de chaves por chamada do BatchGetItem (imposto pela AWS)
+DYNAMODB_BATCH_GET_LIMITE = 100
+
+# Exportação (GET /pedidos/export): bucket/prefixo do destino S3, tamanho das
+# partes do multipart upload e limite do arquivo devolvido na resposta (o
+# payload da Lambda é de 6 MB, e o base64 aumenta o arquivo em 1/3). Com
+# destino=s3 a própria função é invocada de forma assíncrona para exportar
+EXPORT_FUNCTION_NAME = os.getenv('AWS_LAMBDA_FUNCTION_NAME', 'listar-pedidos')
+EXPORT_BUCKET = os.getenv('EXPORT_BUCKET', 'pedidos-comprovantes')
+EXPORT_PREFIX = os.getenv('EXPORT_PREFIX', 'exports/')
+EXPORT_PART_BYTES = int(os.getenv('EXPORT_PART_BYTES', str(8 * 1024 * 1024)))
+EXPORT_INLINE_MAX_BYTES = int(os.getenv('EXPORT_INLINE_MAX_BYTES', str(4 * 1024 * 1024)))
+
+# Scan paralelo (filtros sem índice): segmentos e máximo de segmentos lidos ao mesmo tempo
+SCAN_TOTAL_SEGMENTS = int(os.getenv('SCAN_TOTAL_SEGMENTS', '4'))
+SCAN_MAX_WORKERS = int(os.getenv('SCAN_MAX_WORKERS', str(SCAN_TOTAL_SEGMENTS)))
+
+# Atributos do ExclusiveStartKey de uma Query no status-timestamp-index
+STATUS_INDEX_KEY = ('id', 'status', 'timestamp')
+
+# Atributos do ExclusiveStartKey de uma Query no dia-timestamp-index
+DIA_INDEX_KEY = ('id', 'dia', 'timestamp')
+
+logger = get_logger('listar-pedidos')
+logger.info("Configuração carregada", extra={'endpoint': AWS_ENDPOINT_URL, 'table': DYNAMODB_TABLE})
+if PAGINATION_TOKEN_SECRET == PAGINATION_TOKEN_SECRET_PADRAO:
+    logger.warning("PAGINATION_TOKEN_SECRET não definido: usando o segredo padrão de desenvolvimento")
+
+# Cliente DynamoDB (criado sob demanda, configuração compartilhada em aws_clients)
+dynamodb_client = lazy_client('dynamodb')
+s3_client = lazy_client('s3')
+lambda_client = lazy_client('lambda')
+
+# Pedidos consultados recentemente neste container
+pedido_cache = TTLCache(PEDIDO_CACHE_TAMANHO)
+
+# Pool de threads reaproveitado entre invocações (criado sob demanda)
+_executor = None
+
+
+def get_executor():
+    """Retorna o pool usado para consultar as partições (status ou dias) em paralelo."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(CONSULTAS_PARALELAS, len(STATUS_PEDIDO)), thread_name_prefix='listar-pedidos')
+    return _executor
+
+
+def compute_etag(body_text):
+    """ETag forte a partir do hash (BLAKE2b, 128 bits) do body serializado."""
+    return '"' + hashlib.blake2b(body_text.encode('utf-8'), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """Verifica se o If-None-Match (lista de ETags ou *) inclui a ETag atual."""
+    for candidato in if_none_match.split(','):
+        candidato = candidato.strip()
+        if candidato == '*' or candidato.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def create_response(status_code, body, if_none_match=None):
+    """
+    Cria resposta HTTP padronizada.
+    
+    Respostas 200 levam ETag (hash do body) e `Cache-Control: no-cache`, para
+    o navegador revalidar a cada requisição. Se o `If-None-Match` da
+    requisição corresponder à ETag, devolve 304 sem body. O body é
+    comprimido conforme o Accept-Encoding (ver http_compression).
+    """
+    body_text = json_codec.dumps(body)
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type, If-None-Match',
+        'Access-Control-Allow-Methods': 'GET, OPTIONS',
+        'Access-Control-Expose-Headers': 'ETag'
     }
+    
+    if status_code == 200:
+        etag = compute_etag(body_text)
+        headers['ETag'] = etag
+        headers['Cache-Control'] = 'no-cache'
+        if if_none_match and etag_matches(if_none_match, etag):
+            return http_compression.compress_response({'statusCode': 304, 'headers': headers, 'body': ''})
+    
+    return http_compression.compress_response({
+        'statusCode': status_code,
+        'headers': headers,
+        'body': body_text
+    })
+
+
+def parse_fields(query_parameters):
+    """
+    Lê o parâmetro `fields` (lista separada por vírgulas).
+    
+    Retorna (campos ou None para todos, erro ou None). Os campos voltam na
+    ordem de CAMPOS_PEDIDO, sempre com os obrigatórios.
+    """
+    if not query_parameters.get('fields'):
+        return None, None
+    
+    campos = {campo.strip() for campo in query_parameters['fields'].split(',') if campo.strip()}
+    invalidos = sorted(campos.difference(CAMPOS_PEDIDO))
+    if invalidos:
+        return None, f'Campos inválidos em "fields": {", ".join(invalidos)} (aceitos: {", ".join(CAMPOS_PEDIDO)})'
+    
+    campos.update(CAMPOS_OBRIGATORIOS)
+    return tuple(campo for campo in CAMPOS_PEDIDO if campo in campos), None
 
 
-def parse_dynamodb_item(item):
-    """Converte item do DynamoDB para formato simples."""
+def projection_params(fields, names=None):
+    """
+    Parâmetros de leitura (ProjectionExpression) para os campos pedidos.
+    
+    `names` são os ExpressionAttributeNames já usados na operação; os nomes
+    da projeção são acrescentados a eles (vários campos são palavras
+    reservadas do DynamoDB, como status e timestamp).
+    """
+    params = {}
+    names = dict(names or {})
+    if fields:
+        params['ProjectionExpression'] = ', '.join(f'#{campo}' for campo in fields)
+        names.update({f'#{campo}': campo for campo in fields})
+    if names:
+        params['ExpressionAttributeNames'] = names
+    return params
+
+
+def parse_dynamodb_item(item, fields=None):
+    """
+    Converte item do DynamoDB para formato simples.
+    
+    Com `fields`, só os campos pedidos são convertidos e devolvidos.
+    """
+    def wanted(campo):
+        return campo in item and (fields is None or campo in fields)
+    
     pedido = {
         'id': item['id']['S'],
         'status': item.get('status', {}).get('S', ''),
@@ -42,116 +216,771 @@ def parse_dynamodb_item(item):
     }
     
     # Campos opcionais
-    if 'cliente' in item:
+    if wanted('cliente'):
         pedido['cliente'] = item['cliente']['S']
     
-    if 'mesa' in item:
-        pedido['mesa'] = int(item['mesa']['N'])
+    if wanted('mesa'):
+        pedido['mesa'] = parse_number(item['mesa']['N'])
     
-    if 'itens' in item and 'L' in item['itens']:
-        pedido['itens'] = [i.get('S', '') for i in item['itens']['L']]
+    if wanted('itens') and 'L' in item['itens']:
+        # Pedidos antigos guardam os itens como strings; normalize_item converte para objetos
+        pedido['itens'] = [normalize_item(i) for i in unmarshal(item['itens'])]
     
-    if 'comprovante_url' in item:
+    if wanted('comprovante_url'):
         pedido['comprovante_url'] = item['comprovante_url']['S']
     
-    if 'updated_at' in item:
+    if wanted('updated_at'):
         pedido['updated_at'] = item['updated_at']['S']
     
     return pedido
 
 
+def get_pedido(pedido_id, fields=None):
+    """
+    Busca um pedido pelo ID, passando pelo cache do container.
+    
+    Retorna (pedido ou None, True se veio do cache). Cada projeção
+    (`fields`) é cacheada separadamente. Pedidos inexistentes não são
+    cacheados (podem ser criados logo em seguida).
+    """
+    cache_key = (pedido_id, fields)
+    pedido = pedido_cache.get(cache_key)
+    if pedido is not None:
+        return pedido, True
+    
+    response = dynamodb_client.get_item(
+        TableName=DYNAMODB_TABLE,
+        Key={'id': {'S': pedido_id}},
+        **projection_params(fields)
+    )
+    if 'Item' not in response:
+        return None, False
+    
+    pedido = parse_dynamodb_item(response['Item'], fields)
+    pedido_cache.put(cache_key, pedido, PEDIDO_CACHE_TTL.get(pedido['status'], PEDIDO_CACHE_TTL['pendente']))
+    return pedido, False
+
+
+def parse_ids(query_parameters):
+    """
+    Lê o parâmetro `ids` (lista separada por vírgulas).
+    
+    Retorna (IDs sem repetição, na ordem pedida; erro ou None).
+    """
+    ids = list(dict.fromkeys(i.strip() for i in query_parameters['ids'].split(',') if i.strip()))
+    if not ids:
+        return None, 'Parâmetro "ids" deve conter ao menos um ID'
+    if len(ids) > LISTAR_IDS_MAXIMO:
+        return None, f'Parâmetro "ids" aceita no máximo {LISTAR_IDS_MAXIMO} IDs'
+    return ids, None
+
+
+def batch_get_items(pedido_ids, fields=None):
+    """
+    Lê os itens brutos de vários pedidos com BatchGetItem (blocos de 100).
+    
+    Chaves não processadas (throttling) são repetidas com backoff. Retorna
+    ({id: item}, IDs que continuaram sem leitura após as tentativas).
+    """
+    encontrados = {}
+    pendentes = []
+    
+    for bloco in chunks(pedido_ids, DYNAMODB_BATCH_GET_LIMITE):
+        request_items = {
+            DYNAMODB_TABLE: {
+                'Keys': [{'id': {'S': pedido_id}} for pedido_id in bloco],
+                **projection_params(fields)
+            }
+        }
+        
+        def read(items):
+            response = dynamodb_client.batch_get_item(RequestItems=items)
+            for item in response.get('Responses', {}).get(DYNAMODB_TABLE, []):
+                encontrados[item['id']['S']] = item
+            return response
+        
+        request_items = retry_unprocessed(read, request_items, 'UnprocessedKeys', BATCH_MAX_TENTATIVAS)
+        if request_items:
+            pendentes.extend(key['id']['S'] for key in request_items[DYNAMODB_TABLE]['Keys'])
+    
+    if pendentes:
+        logger.warning("%d pedidos não foram lidos pelo BatchGetItem", len(pendentes))
+    return encontrados, pendentes
+
+
+def get_pedidos(pedido_ids, fields=None):
+    """
+    Busca vários pedidos de uma vez, passando pelo cache do container.
+    
+    Retorna uma entrada por ID, na ordem pedida: o pedido, ou
+    {'id', 'encontrado': False} se ele não existir. IDs que o DynamoDB não
+    conseguiu ler (throttling persistente) vêm com 'erro'.
+    """
+    pedidos = {}
+    faltando = []
+    for pedido_id in pedido_ids:
+        pedido = pedido_cache.get((pedido_id, fields))
+        if pedido is None:
+            faltando.append(pedido_id)
+        else:
+            pedidos[pedido_id] = pedido
+    
+    pendentes = []
+    if faltando:
+        encontrados, pendentes = batch_get_items(faltando, fields)
+        for pedido_id, item in encontrados.items():
+            pedido = parse_dynamodb_item(item, fields)
+            pedido_cache.put((pedido_id, fields), pedido, PEDIDO_CACHE_TTL.get(pedido['status'], PEDIDO_CACHE_TTL['pendente']))
+            pedidos[pedido_id] = pedido
+    
+    pendentes = set(pendentes)
+    resultado = []
+    for pedido_id in pedido_ids:
+        if pedido_id in pedidos:
+            resultado.append(pedidos[pedido_id])
+        elif pedido_id in pendentes:
+            resultado.append({'id': pedido_id, 'erro': 'Leitura não concluída, tente novamente'})
+        else:
+            resultado.append({'id': pedido_id, 'encontrado': False})
+    
+    logger.info("Pedidos consultados em lote", extra={'ids': len(pedido_ids), 'lidos': len(faltando), **pedido_cache.stats()})
+    return resultado, len(pedidos)
+
+
+def parse_limit(query_parameters):
+    """Lê o parâmetro `limit`; retorna None se for inválido."""
+    try:
+        limit = int(query_parameters.get('limit', LIMITE_PADRAO))
+    except (TypeError, ValueError):
+        return None
+    return limit if 1 <= limit <= LIMITE_MAXIMO else None
+
+
+def query_status(status, limit, start_key=None, fields=None):
+    """
+    Busca até `limit` pedidos de um status, do mais recente para o mais antigo.
+    
+    Query no índice status-timestamp-index: lê no máximo `limit` itens,
+    independente do tamanho da tabela. Com `fields`, só esses atributos
+    são lidos. Retorna (itens, LastEvaluatedKey).
+    """
+    query_params = {
+        'TableName': DYNAMODB_TABLE,
+        'IndexName': STATUS_INDEX,
+        'KeyConditionExpression': '#status = :status',
+        'ExpressionAttributeValues': {':status': {'S': status}},
+        'ScanIndexForward': False,
+        'Limit': limit,
+        **projection_params(fields, {'#status': 'status'})
+    }
+    if start_key:
+        query_params['ExclusiveStartKey'] = start_key
+    
+    response = dynamodb_client.query(**query_params)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def list_pedidos(status_filter, limit, next_token=None, fields=None):
+    """
+    Lista uma página de pedidos (timestamp desc), opcionalmente por status.
+    
+    Sem filtro, consulta a partição de cada status em paralelo e intercala
+    os resultados (já ordenados), lendo no máximo `limit` itens por status.
+    Retorna (pedidos, nextToken ou None na última página).
+    """
+    filters = {'status': status_filter}
+    
+    if next_token:
+        start_keys = decode_token(next_token, filters, PAGINATION_TOKEN_SECRET)
+    else:
+        statuses = [status_filter] if status_filter else STATUS_PEDIDO
+        start_keys = {status: None for status in statuses}
+    
+    items, next_keys = merge_partitions(
+        functools.partial(query_status, fields=fields),
+        start_keys,
+        limit,
+        sort_key=lambda item: item['timestamp']['S'],
+        key_attrs=STATUS_INDEX_KEY,
+        executor=get_executor()
+    )
+    
+    token = encode_token(next_keys, filters, PAGINATION_TOKEN_SECRET) if next_keys else None
+    return [parse_dynamodb_item(item, fields) for item in items], token
+
+
+def parse_timestamp(text):
+    """
+    Converte um instante ISO 8601 para o formato do atributo `timestamp`.
+    
+    Os pedidos são gravados em UTC sem fuso (`datetime.utcnow().isoformat()`);
+    instantes com fuso (`Z`, `-03:00`) são convertidos para UTC.
+    """
+    text = text.strip()
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    instante = datetime.fromisoformat(text)
+    if instante.tzinfo is not None:
+        instante = instante.astimezone(timezone.utc).replace(tzinfo=None)
+    return instante
+
+
+def parse_time_range(query_parameters):
+    """
+    Lê o intervalo `from`/`to` (inclusivo).
+    
+    Retorna ((início, fim) ou None se não houver intervalo, erro ou None).
+    """
+    if 'from' not in query_parameters and 'to' not in query_parameters:
+        return None, None
+    if not query_parameters.get('from') or not query_parameters.get('to'):
+        return None, 'Parâmetros "from" e "to" devem ser informados juntos'
+    
+    try:
+        inicio = parse_timestamp(query_parameters['from'])
+        fim = parse_timestamp(query_parameters['to'])
+    except ValueError:
+        return None, 'Parâmetros "from" e "to" devem estar no formato ISO 8601 (ex.: 2024-11-12T18:00:00)'
+    
+    if inicio > fim:
+        return None, 'Parâmetro "from" deve ser anterior a "to"'
+    if (fim.date() - inicio.date()).days + 1 > INTERVALO_MAXIMO_DIAS:
+        return None, f'Intervalo entre "from" e "to" deve ter no máximo {INTERVALO_MAXIMO_DIAS} dias'
+    return (inicio, fim), None
+
+
+def query_dia(dia, limit, start_key=None, inicio=None, fim=None, fields=None):
+    """
+    Busca até `limit` pedidos de um dia entre `inicio` e `fim` (timestamp desc).
+    
+    Query na partição do dia no índice dia-timestamp-index, com o intervalo
+    na condição de chave: só os pedidos do intervalo são lidos.
+    Retorna (itens, LastEvaluatedKey).
+    """
+    query_params = {
+        'TableName': DYNAMODB_TABLE,
+        'IndexName': DIA_INDEX,
+        'KeyConditionExpression': '#dia = :dia AND #ts BETWEEN :inicio AND :fim',
+        'ExpressionAttributeValues': {
+            ':dia': {'S': dia},
+            ':inicio': {'S': inicio.isoformat()},
+            ':fim': {'S': fim.isoformat()}
+        },
+        'ScanIndexForward': False,
+        'Limit': limit,
+        # `dia` entra na projeção porque faz parte da chave de paginação
+        **projection_params(fields and fields + ('dia',), {'#dia': 'dia', '#ts': 'timestamp'})
+    }
+    if start_key:
+        query_params['ExclusiveStartKey'] = start_key
+    
+    response = dynamodb_client.query(**query_params)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def list_pedidos_intervalo(inicio, fim, limit, next_token=None, fields=None):
+    """
+    Lista uma página dos pedidos criados entre `inicio` e `fim` (timestamp desc).
+    
+    Os pedidos ficam particionados por dia (`dia`, gravado pelo
+    criar-pedido): o intervalo vira uma Query por dia, executadas em
+    paralelo, e os resultados são intercalados como na listagem por status.
+    O custo depende dos dias e dos pedidos do intervalo, não do tamanho da
+    tabela. Retorna (pedidos, nextToken ou None na última página).
+    """
+    filters = {'from': inicio.isoformat(), 'to': fim.isoformat()}
+    
+    if next_token:
+        start_keys = decode_token(next_token, filters, PAGINATION_TOKEN_SECRET)
+    else:
+        dias = (fim.date() - inicio.date()).days + 1
+        start_keys = {(fim.date() - timedelta(days=i)).isoformat(): None for i in range(dias)}
+    
+    items, next_keys = merge_partitions(
+        functools.partial(query_dia, inicio=inicio, fim=fim, fields=fields),
+        start_keys,
+        limit,
+        sort_key=lambda item: item['timestamp']['S'],
+        key_attrs=DIA_INDEX_KEY,
+        executor=get_executor()
+    )
+    
+    token = encode_token(next_keys, filters, PAGINATION_TOKEN_SECRET) if next_keys else None
+    return [parse_dynamodb_item(item, fields) for item in items], token
+
+
+def parse_since(query_parameters):
+    """
+    Lê o parâmetro `since`: o `watermark` de uma sincronização anterior ou
+    um instante ISO 8601 (ex.: o horário da última listagem completa).
+    
+    Retorna (seq a partir do qual buscar, erro ou None).
+    """
+    since = query_parameters['since'].strip()
+    if is_seq(since):
+        return since.upper(), None
+    
+    try:
+        instante = parse_timestamp(since)
+    except ValueError:
+        return None, 'Parâmetro "since" deve ser um watermark ou um instante ISO 8601'
+    timestamp_ms = int(instante.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return seq_from_timestamp_ms(max(timestamp_ms, 0)), None
+
+
+def query_seq(dia, since, limit, start_key=None, fields=None):
+    """
+    Busca até `limit` pedidos escritos em `dia` com `seq` depois de `since`.
+    
+    Query no índice sync-index (`seq_dia` + `seq`), em ordem crescente de
+    `seq`. Retorna (itens, LastEvaluatedKey).
+    """
+    query_params = {
+        'TableName': DYNAMODB_TABLE,
+        'IndexName': SYNC_INDEX,
+        'KeyConditionExpression': '#seq_dia = :dia AND #seq > :since',
+        'ExpressionAttributeValues': {':dia': {'S': dia}, ':since': {'S': since}},
+        'Limit': limit,
+        # `seq` entra na projeção porque vira o watermark da resposta
+        **projection_params(fields and fields + ('seq',), {'#seq_dia': 'seq_dia', '#seq': 'seq'})
+    }
+    if start_key:
+        query_params['ExclusiveStartKey'] = start_key
+    
+    response = dynamodb_client.query(**query_params)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def sync_pedidos(since, limit, fields=None):
+    """
+    Pedidos criados ou atualizados depois do watermark `since`, em ordem de escrita.
+    
+    Cada escrita grava um novo `seq` (ULID) e o dia dele (`seq_dia`), então
+    a busca é uma Query por dia desde o watermark (normalmente só o dia
+    atual) e lê apenas os pedidos alterados. Retorna (itens, novo
+    watermark, se há mais alterações) ou None se o watermark for antigo
+    demais.
+    
+    O novo watermark não passa de agora - SYNC_JANELA_MS: alterações mais
+    recentes voltam na próxima chamada junto com as que ainda não estavam
+    visíveis, e o cliente as aplica de novo pelo `id`.
+    """
+    assentado = seq_from_timestamp_ms(int(time.time() * 1000) - SYNC_JANELA_MS)
+    primeiro_dia = date.fromisoformat(seq_dia(since))
+    dias = (datetime.utcnow().date() - primeiro_dia).days + 1
+    if dias > SYNC_MAXIMO_DIAS:
+        return None
+    
+    items = []
+    mais = False
+    for i in range(dias):
+        dia = (primeiro_dia + timedelta(days=i)).isoformat()
+        start_key = None
+        while True:
+            page, start_key = query_seq(dia, since, limit - len(items), start_key, fields)
+            items.extend(page)
+            if len(items) >= limit or not start_key:
+                break
+        if len(items) >= limit:
+            mais = bool(start_key) or i < dias - 1
+            break
+    
+    watermark = min(items[-1]['seq']['S'], assentado) if mais else assentado
+    return items, max(watermark, since), mais
+
+
+def handle_sync(query_parameters, limit, fields, if_none_match=None):
+    """Trata GET /pedidos?since= (sincronização incremental)."""
+    since, since_error = parse_since(query_parameters)
+    if since_error:
+        return create_response(400, {
+            'error': 'Parâmetro inválido',
+            'details': since_error
+        })
+    
+    resultado = sync_pedidos(since, limit, fields)
+    if resultado is None:
+        return create_response(410, {
+            'error': 'Watermark expirado',
+            'details': f'Watermark com mais de {SYNC_MAXIMO_DIAS} dias: recarregue a lista completa'
+        })
+    
+    items, watermark, mais = resultado
+    logger.info("Pedidos sincronizados", extra={'count': len(items), 'since': since, 'watermark': watermark})
+    return create_response(200, {
+        'pedidos': [parse_dynamodb_item(item, fields) for item in items],
+        'count': len(items),
+        'watermark': watermark,
+        'hasMore': mais
+    }, if_none_match)
+
+
+def scan_pedidos(filter_expression=None, names=None, values=None, fields=None):
+    """
+    Gera os itens que passam no filtro (ou todos), página a página (Scan).
+    
+    As páginas não são acumuladas: quem consome o gerador decide o que
+    manter em memória. Com SCAN_TOTAL_SEGMENTS > 1 a tabela é lida em
+    segmentos paralelos e os itens chegam sem ordem definida.
+    """
+    scan_params = {'TableName': DYNAMODB_TABLE, **projection_params(fields, names)}
+    if filter_expression:
+        scan_params['FilterExpression'] = filter_expression
+        scan_params['ExpressionAttributeValues'] = values
+    
+    if SCAN_TOTAL_SEGMENTS > 1:
+        yield from parallel_scan(dynamodb_client, scan_params, SCAN_TOTAL_SEGMENTS, SCAN_MAX_WORKERS)
+        return
+    
+    while True:
+        response = dynamodb_client.scan(**scan_params)
+        yield from response.get('Items', [])
+        
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def recency_key(item):
+    """Ordenação por recência de um item bruto: (timestamp, id)."""
+    return item.get('timestamp', {}).get('S', ''), item['id']['S']
+
+
+def list_pedidos_scan(mesa, status_filter, limit, next_token=None, fields=None):
+    """
+    Lista uma página de pedidos por filtros sem índice (ex.: `mesa`).
+    
+    Os itens do Scan são consumidos em streaming e só os `limit` mais
+    recentes ficam em memória (heapq.nlargest: O(n log limit)); apenas
+    eles são convertidos para o formato da API. O nextToken guarda o
+    (timestamp, id) do último item da página, e a página seguinte filtra
+    os itens anteriores a ele.
+    Retorna (pedidos, nextToken ou None na última página).
+    """
+    filters = {'status': status_filter, 'mesa': mesa}
+    conditions = ['#mesa = :mesa']
+    names = {'#mesa': 'mesa'}
+    values = {':mesa': {'N': str(mesa)}}
+    
+    if status_filter:
+        conditions.append('#status = :status')
+        names['#status'] = 'status'
+        values[':status'] = {'S': status_filter}
+    
+    if next_token:
+        antes_timestamp, antes_id = decode_token(next_token, filters, PAGINATION_TOKEN_SECRET)['antes']
+        conditions.append('(#ts < :antes_ts OR (#ts = :antes_ts AND #id < :antes_id))')
+        names.update({'#ts': 'timestamp', '#id': 'id'})
+        values.update({':antes_ts': {'S': antes_timestamp}, ':antes_id': {'S': antes_id}})
+    
+    # Conta os itens vistos para saber se existe uma próxima página
+    matched = 0
+    
+    def counted(items):
+        nonlocal matched
+        for item in items:
+            matched += 1
+            yield item
+    
+    top = heapq.nlargest(limit, counted(scan_pedidos(' AND '.join(conditions), names, values, fields)), key=recency_key)
+    
+    token = None
+    if matched > limit:
+        token = encode_token({'antes': list(recency_key(top[-1]))}, filters, PAGINATION_TOKEN_SECRET)
+    
+    return [parse_dynamodb_item(item, fields) for item in top], token
+
+
+def export_pedidos(status_filter, fields, fileobj):
+    """
+    Escreve os pedidos (todos ou de um status) em `fileobj` como NDJSON gzip.
+    
+    Os itens do Scan paralelo são convertidos e comprimidos um a um, sem
+    acumular a lista. Retorna o número de pedidos exportados.
+    """
+    if status_filter:
+        items = scan_pedidos('#status = :status', {'#status': 'status'}, {':status': {'S': status_filter}}, fields)
+    else:
+        items = scan_pedidos(fields=fields)
+    
+    return write_ndjson_gzip(
+        items,
+        fileobj,
+        lambda item: json_codec.dumps_bytes(parse_dynamodb_item(item, fields))
+    )
+
+
+def export_to_s3(status_filter, fields, key):
+    """
+    Exporta os pedidos para `s3://EXPORT_BUCKET/<key>` por multipart upload.
+    
+    As partes sobem enquanto o Scan avança; se a exportação falhar no meio,
+    o upload é abortado. Retorna bucket, key, count e bytes.
+    """
+    writer = S3MultipartWriter(s3_client, EXPORT_BUCKET, key, EXPORT_PART_BYTES)
+    try:
+        count = export_pedidos(status_filter, fields, writer)
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    
+    logger.info("Pedidos exportados", extra={'count': count, 'bytes': writer.bytes_written, 'destino': key})
+    return {
+        'bucket': EXPORT_BUCKET,
+        'key': key,
+        'count': count,
+        'bytes': writer.bytes_written
+    }
+
+
+def start_export(status_filter, fields, key):
+    """
+    Inicia a exportação para o S3 em uma invocação assíncrona desta função.
+    
+    A requisição do API Gateway termina em 29 s; a invocação assíncrona
+    tem o timeout da Lambda inteiro para o Scan e o upload.
+    """
+    lambda_client.invoke(
+        FunctionName=EXPORT_FUNCTION_NAME,
+        InvocationType='Event',
+        Payload=json_codec.dumps_bytes({
+            'exportacao': {
+                'status': status_filter,
+                'fields': list(fields) if fields else None,
+                'key': key
+            }
+        })
+    )
+    logger.info("Exportação iniciada", extra={'destino': key})
+
+
+def handle_export(query_parameters, fields):
+    """
+    GET /pedidos/export - Exporta os pedidos em NDJSON comprimido (gzip).
+    
+    Por padrão o arquivo volta na resposta (base64), até
+    EXPORT_INLINE_MAX_BYTES comprimidos. Com `destino=s3`, a exportação
+    roda em segundo plano (`start_export`) e a resposta (202) traz a chave
+    em que o arquivo vai aparecer quando terminar.
+    """
+    status_filter = query_parameters.get('status')
+    destino = query_parameters.get('destino', 'resposta')
+    nome = f"pedidos-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.ndjson.gz"
+    
+    if destino == 's3':
+        key = f'{EXPORT_PREFIX}{nome}'
+        start_export(status_filter, fields, key)
+        return create_response(202, {
+            'bucket': EXPORT_BUCKET,
+            'key': key
+        })
+    
+    if destino != 'resposta':
+        return create_response(400, {
+            'error': 'Parâmetro inválido',
+            'details': 'Parâmetro "destino" deve ser "resposta" ou "s3"'
+        })
+    
+    buffer = InlineBuffer(EXPORT_INLINE_MAX_BYTES)
+    try:
+        count = export_pedidos(status_filter, fields, buffer)
+    except ExportTooLargeError:
+        return create_response(413, {
+            'error': 'Exportação grande demais para a resposta',
+            'details': 'Use destino=s3 para gravar o arquivo no bucket'
+        })
+    
+    data = buffer.getvalue()
+    logger.info("Pedidos exportados", extra={'count': count, 'bytes': len(data), 'destino': 'resposta'})
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/gzip',
+            'Content-Disposition': f'attachment; filename="{nome}"',
+            'Access-Control-Allow-Origin': '*',
+            'X-Export-Count': str(count)
+        },
+        'body': base64.b64encode(data).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+
+def get_stats():
+    """Contadores de pedidos por status e por mesa (um GetItem)."""
+    response = dynamodb_client.get_item(
+        TableName=STATS_TABLE,
+        Key={'chave': {'S': STATS_CHAVE}}
+    )
+    return parse_stats(response.get('Item'))
+
+
+def is_route(event, path_parameters, nome):
+    """Verifica se a requisição é para GET /pedidos/<nome> (ex.: export, stats)."""
+    # Com o LocalStack, a rota pode chegar como /pedidos/{id} com id=<nome>
+    return event.get('resource') == f'/pedidos/{nome}' or path_parameters.get('id') == nome
+
+
+def parse_mesa(query_parameters):
+    """Lê o filtro `mesa`; retorna (mesa ou None, erro ou None)."""
+    if 'mesa' not in query_parameters:
+        return None, None
+    try:
+        mesa = int(query_parameters['mesa'])
+    except (TypeError, ValueError):
+        mesa = 0
+    if mesa <= 0:
+        return None, 'Parâmetro "mesa" deve ser um inteiro maior que zero'
+    return mesa, None
+
+
 def handler(event, context):
     """
     Lambda handler para listar ou buscar pedidos.
     
     Rotas suportadas:
-    - GET /pedidos - Lista todos os pedidos
+    - GET /pedidos - Lista os pedidos (paginação por nextToken)
+    - GET /pedidos?from=...&to=... - Pedidos criados no intervalo
+    - GET /pedidos?since=<watermark> - Pedidos alterados desde o watermark
     - GET /pedidos/{id} - Busca pedido específico
+    - GET /pedidos?ids=a,b,c - Busca vários pedidos (BatchGetItem)
+    - GET /pedidos/export - Exporta os pedidos em NDJSON gzip
+    - GET /pedidos/stats - Contadores por status e por mesa
+    
+    As duas aceitam `fields=id,status,mesa` para devolver só alguns campos.
+    
+    Um evento `{"exportacao": {...}}` (invocação assíncrona feita por
+    `start_export`) executa a exportação para o S3.
     """
+    start_request(context)
+    
+    if 'exportacao' in event:
+        exportacao = event['exportacao']
+        fields = tuple(exportacao['fields']) if exportacao.get('fields') else None
+        return export_to_s3(exportacao.get('status'), fields, exportacao['key'])
+    
+    http_compression.start_request(event)
+    
     try:
-        print(f"Evento recebido: {json.dumps(event)}")
+        log_payload(logger, "Evento recebido", event)
         
         # Extrair parâmetros
         path_parameters = event.get('pathParameters') or {}
         query_parameters = event.get('queryStringParameters') or {}
         pedido_id = path_parameters.get('id')
+        if_none_match = get_header(event, 'If-None-Match')
+        
+        fields, fields_error = parse_fields(query_parameters)
+        if fields_error:
+            return create_response(400, {
+                'error': 'Parâmetro inválido',
+                'details': fields_error
+            })
+        
+        # GET /pedidos/export - Exportar pedidos
+        if is_route(event, path_parameters, 'export'):
+            return handle_export(query_parameters, fields)
+        
+        # GET /pedidos/stats - Estatísticas (contadores mantidos na escrita)
+        elif is_route(event, path_parameters, 'stats'):
+            return create_response(200, get_stats(), if_none_match)
         
         # GET /pedidos/{id} - Buscar pedido específico
-        if pedido_id:
-            print(f"Buscando pedido: {pedido_id}")
+        elif pedido_id:
+            bind(pedidoId=pedido_id)
+            logger.debug("Buscando pedido: %s", pedido_id)
             
-            response = dynamodb_client.get_item(
-                TableName=DYNAMODB_TABLE,
-                Key={'id': {'S': pedido_id}}
-            )
+            pedido, cache_hit = get_pedido(pedido_id, fields)
+            logger.info("Pedido consultado", extra={'cache': 'hit' if cache_hit else 'miss', **pedido_cache.stats()})
             
-            if 'Item' not in response:
+            if pedido is None:
                 return create_response(404, {
                     'error': 'Pedido não encontrado',
                     'pedidoId': pedido_id
                 })
             
-            pedido = parse_dynamodb_item(response['Item'])
-            print(f"Pedido encontrado: {pedido_id}")
+            return create_response(200, pedido, if_none_match)
+        
+        # GET /pedidos?ids=a,b,c - Buscar vários pedidos
+        elif 'ids' in query_parameters:
+            ids, ids_error = parse_ids(query_parameters)
+            if ids_error:
+                return create_response(400, {
+                    'error': 'Parâmetro inválido',
+                    'details': ids_error
+                })
             
-            return create_response(200, pedido)
+            pedidos, encontrados = get_pedidos(ids, fields)
+            return create_response(200, {
+                'pedidos': pedidos,
+                'count': encontrados
+            }, if_none_match)
         
         # GET /pedidos - Listar todos os pedidos
         else:
-            print("Listando todos os pedidos")
-            
-            # Parâmetros de paginação
-            limit = int(query_parameters.get('limit', 50))
-            
-            # Parâmetro de filtro por status
-            status_filter = query_parameters.get('status')
-            
-            # Scan DynamoDB - pegar TODOS os itens para ordenar corretamente
-            scan_params = {
-                'TableName': DYNAMODB_TABLE
-            }
+            logger.debug("Listando pedidos")
             
-            if status_filter:
-                scan_params['FilterExpression'] = '#status = :status'
-                scan_params['ExpressionAttributeNames'] = {'#status': 'status'}
-                scan_params['ExpressionAttributeValues'] = {':status': {'S': status_filter}}
-            
-            # Fazer scan completo (pode ter múltiplas páginas)
-            all_items = []
-            while True:
-                response = dynamodb_client.scan(**scan_params)
-                all_items.extend(response.get('Items', []))
-                
-                # Se não tem mais páginas, sair do loop
-                if 'LastEvaluatedKey' not in response:
-                    break
-                    
-                # Configurar para próxima página
-                scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            limit = parse_limit(query_parameters)
+            if limit is None:
+                return create_response(400, {
+                    'error': 'Parâmetro inválido',
+                    'details': f'Parâmetro "limit" deve ser um inteiro entre 1 e {LIMITE_MAXIMO}'
+                })
             
-            # Parsear itens
-            pedidos = [parse_dynamodb_item(item) for item in all_items]
+            # GET /pedidos?since= - Sincronização incremental
+            if 'since' in query_parameters:
+                if any(p in query_parameters for p in ('status', 'mesa', 'from', 'to', 'nextToken')):
+                    return create_response(400, {
+                        'error': 'Parâmetro inválido',
+                        'details': 'Parâmetro "since" não pode ser combinado com filtros nem com "nextToken"'
+                    })
+                return handle_sync(query_parameters, limit, fields, if_none_match)
             
-            # Ordenar por timestamp (mais recente primeiro)
-            pedidos.sort(key=lambda x: x['timestamp'], reverse=True)
+            # Parâmetros de filtro (status e intervalo usam índices; mesa exige Scan)
+            status_filter = query_parameters.get('status')
+            mesa, mesa_error = parse_mesa(query_parameters)
+            intervalo, intervalo_error = parse_time_range(query_parameters)
+            if intervalo and (status_filter or mesa is not None):
+                intervalo_error = 'Parâmetros "from"/"to" não podem ser combinados com "status" ou "mesa"'
+            if mesa_error or intervalo_error:
+                return create_response(400, {
+                    'error': 'Parâmetro inválido',
+                    'details': mesa_error or intervalo_error
+                })
             
-            # Aplicar limite APÓS ordenar
-            pedidos = pedidos[:limit]
+            try:
+                if intervalo:
+                    pedidos, next_token = list_pedidos_intervalo(*intervalo, limit, query_parameters.get('nextToken'), fields)
+                elif mesa is not None:
+                    pedidos, next_token = list_pedidos_scan(mesa, status_filter, limit, query_parameters.get('nextToken'), fields)
+                else:
+                    pedidos, next_token = list_pedidos(status_filter, limit, query_parameters.get('nextToken'), fields)
+            except InvalidTokenError as e:
+                return create_response(400, {
+                    'error': 'Parâmetro inválido',
+                    'details': str(e)
+                })
             
-            print(f"Encontrados {len(pedidos)} pedidos (ordenados por timestamp desc)")
+            logger.info("Pedidos listados", extra={
+                'count': len(pedidos),
+                'status': status_filter,
+                'mesa': mesa,
+                'from': query_parameters.get('from'),
+                'to': query_parameters.get('to')
+            })
             
             # Resposta
             result = {
                 'pedidos': pedidos,
                 'count': len(pedidos)
             }
+            if next_token:
+                result['nextToken'] = next_token
             
-            return create_response(200, result)
-        
+            return create_response(200, result, if_none_match)
+    
     except Exception as e:
-        print(f"Erro: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erro: %s", e)
         
         return create_response(500, {
             'error': 'Erro interno do servidor',
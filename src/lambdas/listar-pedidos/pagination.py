@@ -0,0 +1,121 @@
+"""
+Paginação por cursor (`nextToken`) para as listagens de pedidos.
+
+O token é opaco para o cliente: `<payload>.<assinatura>`, com o estado da
+paginação em JSON (base64url) assinado com HMAC-SHA256. A assinatura impede
+que o cliente monte ou altere chaves de início arbitrárias, e o token é
+vinculado aos filtros da consulta que o gerou (`f`).
+
+Listagens que intercalam várias partições (ex.: um Query por status) guardam
+uma chave de início por partição; partições esgotadas saem do estado. Cada
+página lê no máximo `limit` itens por partição ativa, então memória e
+latência não dependem da profundidade da paginação.
+"""
+import base64
+import hashlib
+import hmac
+import heapq
+import itertools
+
+import json_codec
+
+
+class InvalidTokenError(ValueError):
+    """Token de paginação malformado, adulterado ou de outra consulta."""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(payload, secret):
+    return _b64encode(hmac.new(secret.encode('utf-8'), payload.encode('ascii'), hashlib.sha256).digest()[:16])
+
+
+def filters_fingerprint(filters):
+    """Resumo dos filtros da consulta (ignora os que não foram informados)."""
+    canonical = json_codec.dumps({key: value for key, value in filters.items() if value is not None}, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def encode_token(state, filters, secret):
+    """Gera o nextToken para o estado de paginação e os filtros informados."""
+    payload = _b64encode(json_codec.dumps_bytes({'f': filters_fingerprint(filters), 's': state}))
+    return f'{payload}.{_sign(payload, secret)}'
+
+
+def decode_token(token, filters, secret):
+    """Valida o nextToken e retorna o estado de paginação."""
+    # Tokens legítimos são base64url (ASCII); compare_digest e o HMAC do
+    # payload falhariam com TypeError/UnicodeEncodeError em outros caracteres
+    try:
+        token.encode('ascii')
+        payload, signature = token.split('.')
+    except (AttributeError, ValueError):
+        raise InvalidTokenError('Formato de nextToken inválido')
+    
+    if not hmac.compare_digest(signature, _sign(payload, secret)):
+        raise InvalidTokenError('Assinatura do nextToken inválida')
+    
+    try:
+        data = json_codec.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidTokenError('Conteúdo do nextToken inválido')
+    
+    if data.get('f') != filters_fingerprint(filters):
+        raise InvalidTokenError('nextToken pertence a outra consulta (filtros diferentes)')
+    
+    return data['s']
+
+
+def merge_partitions(fetch, start_keys, limit, sort_key, key_attrs, executor=None):
+    """
+    Busca uma página intercalando partições já ordenadas (ordem decrescente).
+    
+    - fetch(partition, limit, start_key) -> (items, last_evaluated_key)
+    - start_keys: {partition: chave de início ou None (início da partição)}
+    - sort_key(item): chave de ordenação de um item bruto
+    - key_attrs: atributos que formam o ExclusiveStartKey (chave da tabela
+      + chave do índice)
+    
+    Retorna (itens da página, novo start_keys). O novo estado retoma cada
+    partição logo após o último item dela que entrou na página; um estado
+    vazio significa que não há mais páginas.
+    """
+    partitions = list(start_keys)
+    if executor is not None and len(partitions) > 1:
+        futures = [executor.submit(fetch, p, limit, start_keys[p]) for p in partitions]
+        results = [future.result() for future in futures]
+    else:
+        results = [fetch(p, limit, start_keys[p]) for p in partitions]
+    
+    tagged = [
+        [(sort_key(item), indice, item) for item in items]
+        for indice, (items, _) in enumerate(results)
+    ]
+    merged = heapq.merge(*tagged, key=lambda entry: entry[0], reverse=True)
+    page = list(itertools.islice(merged, limit))
+    
+    consumed = [0] * len(partitions)
+    last_item = [None] * len(partitions)
+    for _, indice, item in page:
+        consumed[indice] += 1
+        last_item[indice] = item
+    
+    next_keys = {}
+    for indice, partition in enumerate(partitions):
+        items, last_evaluated_key = results[indice]
+        if consumed[indice] < len(items):
+            # Sobraram itens desta partição: retomar após o último consumido
+            if last_item[indice] is None:
+                next_keys[partition] = start_keys[partition]
+            else:
+                next_keys[partition] = {attr: last_item[indice][attr] for attr in key_attrs}
+        elif last_evaluated_key:
+            next_keys[partition] = last_evaluated_key
+    
+    return [item for _, _, item in page], next_keys
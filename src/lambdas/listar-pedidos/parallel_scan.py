@@ -0,0 +1,141 @@
+"""
+Scan paralelo (Segment/TotalSegments) para varreduras completas da tabela.
+
+Cada segmento é lido por uma thread; as páginas entram em uma fila limitada
+e são entregues a quem consome o gerador na ordem em que chegam (sem esperar
+os demais segmentos). O número de Scans simultâneos se adapta à capacidade
+da tabela: cai pela metade a cada throttling e volta a subir, um a um, após
+uma sequência de páginas sem erro.
+"""
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Códigos de erro do DynamoDB que indicam falta de capacidade
+THROTTLING_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded'
+}
+
+MAX_TENTATIVAS_THROTTLING = 8
+
+_FIM_SEGMENTO = object()
+
+
+def is_throttling(error):
+    """Indica se a exceção do boto3 é um throttling do DynamoDB."""
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in THROTTLING_CODES
+
+
+class AdaptiveLimiter:
+    """Limite de chamadas simultâneas com ajuste AIMD (aumento aditivo, corte pela metade)."""
+    
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self.limite = maximo
+        self.em_uso = 0
+        self.throttlings = 0
+        self._sucessos = 0
+        self._cond = threading.Condition()
+    
+    def acquire(self):
+        with self._cond:
+            while self.em_uso >= self.limite:
+                self._cond.wait()
+            self.em_uso += 1
+    
+    def release(self, throttled=False):
+        with self._cond:
+            self.em_uso -= 1
+            if throttled:
+                self.throttlings += 1
+                self.limite = max(1, self.limite // 2)
+                self._sucessos = 0
+            else:
+                self._sucessos += 1
+                if self.limite < self.maximo and self._sucessos >= self.limite:
+                    self.limite += 1
+                    self._sucessos = 0
+            self._cond.notify_all()
+
+
+def _scan_page(client, params, limiter):
+    """Lê uma página respeitando o limiter; throttling reduz o limite e tenta de novo."""
+    for tentativa in range(MAX_TENTATIVAS_THROTTLING):
+        limiter.acquire()
+        try:
+            response = client.scan(**params)
+        except Exception as e:
+            throttled = is_throttling(e)
+            limiter.release(throttled)
+            if not throttled or tentativa == MAX_TENTATIVAS_THROTTLING - 1:
+                raise
+            time.sleep(min(0.05 * (2 ** tentativa), 2.0) * random.uniform(0.5, 1.0))
+            continue
+        limiter.release()
+        return response
+
+
+def _scan_segment(client, scan_params, segment, total_segments, limiter, pages, stop):
+    """Lê todas as páginas de um segmento e as coloca na fila."""
+    params = dict(scan_params, Segment=segment, TotalSegments=total_segments)
+    try:
+        while not stop.is_set():
+            response = _scan_page(client, params, limiter)
+            _put(pages, response.get('Items', []), stop)
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    except Exception as e:
+        _put(pages, e, stop)
+    finally:
+        _put(pages, _FIM_SEGMENTO, stop)
+
+
+def _put(pages, value, stop):
+    # Fila limitada: espera o consumidor, mas desiste se a varredura foi interrompida
+    while not stop.is_set():
+        try:
+            pages.put(value, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def parallel_scan(client, scan_params, total_segments, max_workers=None, limiter=None):
+    """
+    Gera os itens de um Scan dividido em `total_segments` segmentos.
+    
+    Os itens chegam na ordem em que as páginas ficam prontas (sem ordem
+    global). No máximo `max_workers` segmentos são lidos ao mesmo tempo,
+    limite que o AdaptiveLimiter reduz sob throttling. Se o consumidor
+    parar de iterar, as threads são encerradas. Erros de um segmento são
+    relançados no consumidor.
+    """
+    max_workers = max(1, min(max_workers or total_segments, total_segments))
+    limiter = limiter or AdaptiveLimiter(max_workers)
+    pages = queue.Queue(maxsize=max_workers * 2)
+    stop = threading.Event()
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='parallel-scan')
+    for segment in range(total_segments):
+        executor.submit(_scan_segment, client, scan_params, segment, total_segments, limiter, pages, stop)
+    
+    try:
+        pendentes = total_segments
+        while pendentes:
+            page = pages.get()
+            if page is _FIM_SEGMENTO:
+                pendentes -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
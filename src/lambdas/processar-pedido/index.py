@@ -1,39 +1,68 @@
-import json
+import contextvars
 import os
-import boto3
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from io import BytesIO
-from fpdf import FPDF
 
-# Configuração para LocalStack
-LOCALSTACK_HOSTNAME = os.getenv('LOCALSTACK_HOSTNAME', 'localhost')
-LOCALSTACK_ENDPOINT = f'http://{LOCALSTACK_HOSTNAME}:4566'
-AWS_ENDPOINT_URL = os.getenv('AWS_ENDPOINT_URL', LOCALSTACK_ENDPOINT)
+import json_codec
+from aws_clients import AWS_ENDPOINT_URL, lazy_client
+from pedido_id import new_seq_attributes
+from pedido_itens import format_item
+from pedido_stats import apply_counters, transition_counters
+from structured_log import bind, get_logger, log_payload, start_request, unbind
 
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE', 'Pedidos')
 S3_BUCKET = os.getenv('S3_BUCKET', 'pedidos-comprovantes')
 SNS_TOPIC_ARN = os.getenv('SNS_TOPIC_ARN', 'arn:aws:sns:us-east-1:000000000000:PedidosConcluidos')
 
-print(f"Configuração: endpoint={AWS_ENDPOINT_URL}, table={DYNAMODB_TABLE}, bucket={S3_BUCKET}, topic={SNS_TOPIC_ARN}")
+# Records do batch processados ao mesmo tempo (1 = um de cada vez)
+PROCESSAR_CONCORRENCIA = max(1, int(os.getenv('PROCESSAR_CONCORRENCIA', '4')))
 
-# Clientes AWS
-dynamodb_client = boto3.client(
-    'dynamodb',
-    endpoint_url=AWS_ENDPOINT_URL,
-    region_name='us-east-1'
-)
+# Tempo mínimo restante da invocação para começar um record; abaixo disso
+# ele volta para a fila sem ser processado
+PROCESSAR_MARGEM_MS = int(os.getenv('PROCESSAR_MARGEM_MS', '10000'))
 
-s3_client = boto3.client(
-    's3',
-    endpoint_url=AWS_ENDPOINT_URL,
-    region_name='us-east-1'
-)
+# Tempo reservado para o handler responder depois de parar de esperar os records
+RETORNO_MARGEM_MS = 1000
 
-sns_client = boto3.client(
-    'sns',
-    endpoint_url=AWS_ENDPOINT_URL,
-    region_name='us-east-1'
-)
+logger = get_logger('processar-pedido')
+logger.info("Configuração carregada", extra={'endpoint': AWS_ENDPOINT_URL, 'table': DYNAMODB_TABLE, 'bucket': S3_BUCKET, 'topic': SNS_TOPIC_ARN})
+
+# Clientes AWS (criados sob demanda, configuração compartilhada em aws_clients)
+dynamodb_client = lazy_client('dynamodb')
+s3_client = lazy_client('s3')
+sns_client = lazy_client('sns')
+
+# Pool de threads reaproveitado entre invocações (criado sob demanda)
+_executor = None
+
+
+def get_executor():
+    """Retorna o pool usado para processar os records do batch em paralelo."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PROCESSAR_CONCORRENCIA, thread_name_prefix='processar-pedido')
+    return _executor
+
+
+def discard_executor():
+    """
+    Descarta o pool atual; a próxima invocação cria outro.
+    
+    Usado quando o handler responde sem esperar records em andamento: as
+    threads deles ficam congeladas junto com o container e ocupariam os
+    workers do pool nas invocações seguintes.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def remaining_ms(context):
+    """Tempo restante da invocação em ms (None sem context, ex.: execução local)."""
+    if context is None:
+        return None
+    return context.get_remaining_time_in_millis()
 
 
 def generate_pdf_content(pedido_data):
@@ -47,6 +76,10 @@ def generate_pdf_content(pedido_data):
     itens = pedido_data.get('itens', [])
     timestamp = pedido_data.get('timestamp')
     
+    # Import tardio: o fpdf (e o Pillow, usado para a logo) só é carregado
+    # quando o primeiro PDF é gerado, não no cold start
+    from fpdf import FPDF
+    
     # Criar PDF com tamanho customizado (80mm x 210mm)
     # 80mm = 80/25.4 = 3.15 polegadas = 226.77 pontos
     # 210mm = 210/25.4 = 8.27 polegadas = 595.28 pontos
@@ -73,7 +106,7 @@ def generate_pdf_content(pedido_data):
             pdf.image(logo_path, x=logo_x, y=y_position, w=logo_width)
             y_position += 30  # Espaço reduzido após logo
         except Exception as e:
-            print(f"Aviso: Não foi possível adicionar logo: {e}")
+            logger.warning("Não foi possível adicionar logo: %s", e)
             # Continuar sem logo
     
     # =======================
@@ -164,7 +197,7 @@ def generate_pdf_content(pedido_data):
     for idx, item in enumerate(itens, 1):
         # Quebrar item em múltiplas linhas se necessário (máx 32 caracteres por linha)
         max_width = 32
-        item_text = f"{idx}. {item}"
+        item_text = f"{idx}. {format_item(item)}"
         
         if len(item_text) <= max_width:
             pdf.set_y(y_position)
@@ -249,16 +282,28 @@ def generate_pdf_content(pedido_data):
     return pdf.output()
 
 
-def update_pedido_status(pedido_id, status, s3_key=None):
-    """Atualiza o status do pedido no DynamoDB."""
-    update_expression = "SET #status = :status, #updated_at = :updated_at"
+def update_pedido_status(pedido_id, status, s3_key=None, mesa=None):
+    """
+    Atualiza o status do pedido no DynamoDB.
+    
+    O status anterior (UPDATED_OLD) é usado para mover o pedido entre os
+    contadores de estatísticas; reprocessar um pedido no mesmo status não
+    altera os contadores. Um novo `seq` coloca o pedido na sincronização
+    incremental (`GET /pedidos?since=`).
+    """
+    seq = new_seq_attributes()
+    update_expression = "SET #status = :status, #updated_at = :updated_at, #seq = :seq, #seq_dia = :seq_dia"
     expression_values = {
         ':status': {'S': status},
-        ':updated_at': {'S': datetime.utcnow().isoformat()}
+        ':updated_at': {'S': datetime.utcnow().isoformat()},
+        ':seq': seq['seq'],
+        ':seq_dia': seq['seq_dia']
     }
     expression_names = {
         '#status': 'status',
-        '#updated_at': 'updated_at'
+        '#updated_at': 'updated_at',
+        '#seq': 'seq',
+        '#seq_dia': 'seq_dia'
     }
     
     if s3_key:
@@ -266,13 +311,26 @@ def update_pedido_status(pedido_id, status, s3_key=None):
         expression_values[':comprovante_url'] = {'S': s3_key}
         expression_names['#comprovante_url'] = 'comprovante_url'
     
-    dynamodb_client.update_item(
+    # Exigir que o pedido exista: evita criar itens parciais a partir de
+    # mensagens cujo pedido ainda não foi (ou nunca será) gravado. A falha
+    # devolve o record em batchItemFailures; a fila o entrega de novo depois
+    # do VisibilityTimeout e, após maxReceiveCount tentativas, manda para a DLQ
+    response = dynamodb_client.update_item(
         TableName=DYNAMODB_TABLE,
         Key={'id': {'S': pedido_id}},
         UpdateExpression=update_expression,
         ExpressionAttributeValues=expression_values,
-        ExpressionAttributeNames=expression_names
+        ExpressionAttributeNames=expression_names,
+        ConditionExpression='attribute_exists(id)',
+        ReturnValues='UPDATED_OLD'
     )
+    
+    # Sem o status em Attributes, o valor não mudou
+    status_antigo = response.get('Attributes', {}).get('status', {}).get('S', status)
+    try:
+        apply_counters(dynamodb_client, transition_counters(mesa, status_antigo, status))
+    except Exception as e:
+        logger.error("Erro ao atualizar estatísticas: %s", e)
 
 
 def publish_notification(pedido_data, s3_key):
@@ -288,7 +346,7 @@ def publish_notification(pedido_data, s3_key):
     
     sns_client.publish(
         TopicArn=SNS_TOPIC_ARN,
-        Message=json.dumps(message, ensure_ascii=False),
+        Message=json_codec.dumps(message),
         Subject=f"Pedido Processado: {pedido_data.get('pedidoId')}",
         MessageAttributes={
             'pedidoId': {
@@ -312,16 +370,17 @@ def process_pedido(pedido_data):
     4. Notifica via SNS
     """
     pedido_id = pedido_data.get('pedidoId')
-    print(f"Processando pedido: {pedido_id}")
+    bind(pedidoId=pedido_id)
+    logger.debug("Processando pedido: %s", pedido_id)
     
     try:
         # 1. Gerar PDF
-        print(f"Gerando PDF para {pedido_id}...")
+        logger.debug("Gerando PDF para %s", pedido_id)
         pdf_content = generate_pdf_content(pedido_data)
         
         # 2. Upload para S3
         s3_key = f"comprovantes/{pedido_id}.pdf"
-        print(f"Fazendo upload para S3: {s3_key}...")
+        logger.debug("Fazendo upload para S3: %s", s3_key)
         
         s3_client.put_object(
             Bucket=S3_BUCKET,
@@ -334,80 +393,122 @@ def process_pedido(pedido_data):
                 'generated-at': datetime.utcnow().isoformat()
             }
         )
-        print(f"PDF salvo no S3: {s3_key}")
+        logger.debug("PDF salvo no S3: %s", s3_key)
         
         # 3. Atualizar status no DynamoDB
-        print(f"Atualizando status no DynamoDB para {pedido_id}...")
-        update_pedido_status(pedido_id, 'processado', s3_key)
-        print(f"Status atualizado: processado")
+        update_pedido_status(pedido_id, 'processado', s3_key, pedido_data.get('mesa'))
+        logger.debug("Status atualizado: processado")
         
         # 4. Notificar via SNS
-        print(f"Publicando notificação no SNS para {pedido_id}...")
         publish_notification(pedido_data, s3_key)
-        print(f"Notificação enviada para SNS")
+        logger.debug("Notificação enviada para SNS")
         
         return {
             'success': True,
             'pedidoId': pedido_id,
             's3Key': s3_key
         }
-        
+    
     except Exception as e:
-        print(f"Erro ao processar pedido {pedido_id}: {str(e)}")
+        logger.error("Erro ao processar pedido %s: %s", pedido_id, e)
         # Atualizar status para erro
         try:
-            update_pedido_status(pedido_id, 'erro')
+            update_pedido_status(pedido_id, 'erro', mesa=pedido_data.get('mesa'))
         except:
             pass
         raise
 
 
+def process_record(record, context=None):
+    """
+    Processa um record da SQS.
+    
+    Retorna True se o pedido foi processado. Em caso de falha, o erro vai
+    para o log e o record deve voltar para a fila (batchItemFailures).
+    O record nem começa se restar menos de PROCESSAR_MARGEM_MS da invocação.
+    """
+    message_id = record.get('messageId')
+    bind(messageId=message_id)
+    
+    try:
+        restante = remaining_ms(context)
+        if restante is not None and restante < PROCESSAR_MARGEM_MS:
+            logger.warning("Mensagem %s não iniciada: restam %dms da invocação", message_id, restante)
+            return False
+        
+        # Parse da mensagem
+        body = json_codec.loads(record.get('body', '{}'))
+        
+        # Processar pedido
+        result = process_pedido(body)
+        logger.info("Pedido processado com sucesso", extra={'s3Key': result['s3Key']})
+        return True
+    
+    except json_codec.JSONDecodeError as e:
+        logger.error("Erro ao parsear mensagem %s: %s", message_id, e)
+        return False
+    
+    except Exception as e:
+        logger.exception("Erro ao processar mensagem %s: %s", message_id, e)
+        return False
+    
+    finally:
+        unbind('messageId', 'pedidoId')
+
+
 def handler(event, context):
     """
     Lambda handler para processar pedidos da SQS.
     
     Fluxo:
     1. Recebe mensagens da SQS (batch)
-    2. Para cada mensagem:
+    2. Para cada mensagem, até PROCESSAR_CONCORRENCIA ao mesmo tempo:
        - Gera PDF do comprovante
        - Upload para S3
        - Atualiza status no DynamoDB
        - Publica notificação no SNS
-    3. Retorna resultado do processamento
+    3. Retorna as mensagens que falharam (batchItemFailures), para que só
+       elas voltem para a fila
+    
+    Perto do fim do timeout o handler para de começar records e responde
+    sem esperar os que ainda estão em andamento: eles voltam para a fila,
+    o pool é descartado e o que já foi concluído não é reprocessado.
     """
-    print(f"Evento recebido: {json.dumps(event)}")
+    start_request(context)
+    log_payload(logger, "Evento recebido", event)
     
-    results = {
-        'batchItemFailures': []
-    }
+    records = event.get('Records', [])
     
-    # Processar cada record do SQS
-    for record in event.get('Records', []):
-        message_id = record.get('messageId')
-        receipt_handle = record.get('receiptHandle')
+    if PROCESSAR_CONCORRENCIA > 1 and len(records) > 1:
+        # Cada record roda em uma cópia do contexto de log da invocação
+        # (requestId), onde liga o próprio messageId/pedidoId
+        executor = get_executor()
+        futures = [executor.submit(contextvars.copy_context().run, process_record, record, context) for record in records]
         
-        try:
-            # Parse da mensagem
-            body = json.loads(record.get('body', '{}'))
-            print(f"Processando mensagem {message_id}: {json.dumps(body)}")
-            
-            # Processar pedido
-            result = process_pedido(body)
-            print(f"✅ Pedido processado com sucesso: {result['pedidoId']}")
-            
-        except json.JSONDecodeError as e:
-            print(f"❌ Erro ao parsear mensagem {message_id}: {str(e)}")
-            # Adicionar à lista de falhas para reprocessamento
-            results['batchItemFailures'].append({
-                'itemIdentifier': message_id
-            })
-            
-        except Exception as e:
-            print(f"❌ Erro ao processar mensagem {message_id}: {str(e)}")
-            # Adicionar à lista de falhas para reprocessamento
-            results['batchItemFailures'].append({
-                'itemIdentifier': message_id
+        restante = remaining_ms(context)
+        timeout = None if restante is None else max(0, restante - RETORNO_MARGEM_MS) / 1000
+        concluidos, pendentes = wait(futures, timeout=timeout)
+        if pendentes:
+            # Os que ainda estão na fila do pool são cancelados. Os que já
+            # começaram não podem ser interrompidos: o pool é trocado para
+            # que as threads presas não ocupem workers das próximas invocações
+            discard_executor()
+            logger.warning("Limite de tempo da invocação: mensagens em andamento devolvidas para a fila", extra={
+                'mensagensPendentes': [record.get('messageId') for record, future in zip(records, futures) if future in pendentes]
             })
+        sucessos = [future in concluidos and future.result() for future in futures]
+    else:
+        sucessos = [process_record(record, context) for record in records]
+    
+    results = {
+        'batchItemFailures': [
+            {'itemIdentifier': record.get('messageId')}
+            for record, sucesso in zip(records, sucessos) if not sucesso
+        ]
+    }
     
-    print(f"Processamento concluído. Falhas: {len(results['batchItemFailures'])}")
+    logger.info("Processamento concluído", extra={
+        'mensagens': len(records),
+        'falhas': len(results['batchItemFailures'])
+    })
     return results
@@ -0,0 +1,150 @@
+import os
+import time
+
+import json_codec
+from aws_clients import AWS_ENDPOINT_URL, LOCALSTACK_HOSTNAME, lazy_client
+from dynamodb_batch import chunks, retry_unprocessed
+from structured_log import get_logger, start_request
+
+OUTBOX_TABLE = os.getenv('OUTBOX_TABLE', 'PedidosOutbox')
+SQS_QUEUE_URL = os.getenv('SQS_QUEUE_URL', f'http://{LOCALSTACK_HOSTNAME}:4566/000000000000/pedidos-queue')
+
+# Registros mais novos que isso são deixados para o stream (evita envio duplicado na varredura)
+OUTBOX_IDADE_MINIMA_SEGUNDOS = int(os.getenv('OUTBOX_IDADE_MINIMA_SEGUNDOS', '60'))
+BATCH_MAX_TENTATIVAS = int(os.getenv('BATCH_MAX_TENTATIVAS', '5'))
+
+# Limites impostos pelas APIs da AWS
+SQS_BATCH_LIMITE = 10
+DYNAMODB_BATCH_WRITE_LIMITE = 25
+
+logger = get_logger('relay-outbox')
+logger.info("Configuração carregada", extra={'endpoint': AWS_ENDPOINT_URL, 'outbox': OUTBOX_TABLE, 'queue': SQS_QUEUE_URL})
+
+# Clientes AWS (criados sob demanda, configuração compartilhada em aws_clients)
+dynamodb_client = lazy_client('dynamodb')
+sqs = lazy_client('sqs')
+
+
+def outbox_to_entry(record, entry_id):
+    """Converte um registro de outbox (formato DynamoDB) em entrada do SendMessageBatch."""
+    return {
+        'Id': entry_id,
+        'MessageBody': record['message_body']['S'],
+        'MessageAttributes': json_codec.loads(record['message_attributes']['S'])
+    }
+
+
+def send_outbox_records(records, sqs_client):
+    """
+    Envia os registros para a fila em blocos de 10 (SendMessageBatch).
+    
+    Retorna a lista de IDs enviados com sucesso e a de IDs que falharam.
+    """
+    enviados = []
+    falhas = []
+    
+    for bloco in chunks(records, SQS_BATCH_LIMITE):
+        entries = [outbox_to_entry(record, str(i)) for i, record in enumerate(bloco)]
+        ids = [record['id']['S'] for record in bloco]
+        
+        try:
+            response = sqs_client.send_message_batch(QueueUrl=SQS_QUEUE_URL, Entries=entries)
+        except Exception as e:
+            logger.error("Erro no SendMessageBatch: %s", e)
+            falhas.extend(ids)
+            continue
+        
+        failed = {int(entry['Id']) for entry in response.get('Failed', [])}
+        for i, pedido_id in enumerate(ids):
+            (falhas if i in failed else enviados).append(pedido_id)
+    
+    return enviados, falhas
+
+
+def delete_outbox_records(pedido_ids, dynamodb):
+    """Remove da outbox os registros já enviados (BatchWriteItem, blocos de 25)."""
+    for bloco in chunks(pedido_ids, DYNAMODB_BATCH_WRITE_LIMITE):
+        request_items = {
+            OUTBOX_TABLE: [
+                {'DeleteRequest': {'Key': {'id': {'S': pedido_id}}}}
+                for pedido_id in bloco
+            ]
+        }
+        
+        request_items = retry_unprocessed(
+            lambda items: dynamodb.batch_write_item(RequestItems=items),
+            request_items, 'UnprocessedItems', BATCH_MAX_TENTATIVAS
+        )
+        if request_items:
+            # Registro não removido será reenviado na próxima varredura (entrega at-least-once)
+            pendentes = len(request_items.get(OUTBOX_TABLE, []))
+            logger.warning("%d registros de outbox não foram removidos", pendentes)
+
+
+def drain_outbox(records, sqs_client=None, dynamodb=None):
+    """
+    Envia os registros de outbox para a fila e remove os que foram enviados.
+    
+    Os clientes podem ser injetados (ex.: fakes em memória nos testes).
+    Retorna os IDs dos registros que falharam e continuam na outbox.
+    """
+    sqs_client = sqs_client or sqs
+    dynamodb = dynamodb or dynamodb_client
+    
+    if not records:
+        return []
+    
+    enviados, falhas = send_outbox_records(records, sqs_client)
+    if enviados:
+        delete_outbox_records(enviados, dynamodb)
+    
+    logger.info("Outbox drenada", extra={'enviados': len(enviados), 'falhas': len(falhas)})
+    return falhas
+
+
+def scan_pending_records(dynamodb=None, idade_minima=OUTBOX_IDADE_MINIMA_SEGUNDOS):
+    """Lista (página a página) os registros de outbox mais antigos que `idade_minima`."""
+    dynamodb = dynamodb or dynamodb_client
+    scan_params = {
+        'TableName': OUTBOX_TABLE,
+        'FilterExpression': 'created_at < :limite',
+        'ExpressionAttributeValues': {':limite': {'N': str(int(time.time()) - idade_minima)}}
+    }
+    
+    while True:
+        response = dynamodb.scan(**scan_params)
+        yield response.get('Items', [])
+        
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def handler(event, context):
+    """
+    Lambda handler do relay da outbox de pedidos.
+    
+    Gatilhos suportados:
+    - DynamoDB Stream da tabela de outbox: envia os registros inseridos
+    - Agendamento (EventBridge) ou invocação manual: varre a outbox e
+      envia registros que ficaram para trás (ex.: falhas anteriores)
+    """
+    start_request(context)
+    records = event.get('Records')
+    
+    # Varredura da outbox
+    if not records:
+        total_falhas = 0
+        for page in scan_pending_records():
+            total_falhas += len(drain_outbox(page))
+        return {'falhas': total_falhas}
+    
+    # Registros do DynamoDB Stream (apenas inserções). Registros que falharem
+    # continuam na outbox e são enviados pela próxima varredura agendada, em vez
+    # de reprocessar o lote do stream (o que reenviaria os que já foram entregues).
+    novos = [
+        record['dynamodb']['NewImage'] for record in records
+        if record.get('eventName') == 'INSERT'
+    ]
+    falhas = drain_outbox(novos)
+    return {'enviados': len(novos) - len(falhas), 'falhas': len(falhas)}
@@ -0,0 +1,89 @@
+"""
+Fábrica de clientes boto3 compartilhada pelas Lambdas.
+
+Todos os clientes usam a mesma configuração do botocore (pool de
+conexões, keep-alive TCP, retries adaptativos e timeouts explícitos),
+ajustável por variáveis de ambiente. Os clientes são criados sob demanda
+e reaproveitados entre invocações do mesmo container: uma Lambda que
+nunca usa S3/SNS não paga o custo de criá-los no cold start.
+
+No deploy, os módulos de `src/lambdas/shared/` são copiados para a raiz
+do pacote de cada Lambda (ver `infra/cloudformation/deploy.ps1`).
+"""
+import os
+import threading
+
+# Configuração para LocalStack
+LOCALSTACK_HOSTNAME = os.getenv('LOCALSTACK_HOSTNAME', 'localhost')
+LOCALSTACK_ENDPOINT = f'http://{LOCALSTACK_HOSTNAME}:4566'
+AWS_ENDPOINT_URL = os.getenv('AWS_ENDPOINT_URL', LOCALSTACK_ENDPOINT)
+AWS_REGION = 'us-east-1'
+
+# Ajustes do botocore
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '25'))
+AWS_CONNECT_TIMEOUT = float(os.getenv('AWS_CONNECT_TIMEOUT', '2'))
+AWS_READ_TIMEOUT = float(os.getenv('AWS_READ_TIMEOUT', '10'))
+AWS_MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', '3'))  # inclui a tentativa inicial
+AWS_RETRY_MODE = os.getenv('AWS_RETRY_MODE', 'adaptive')
+AWS_TCP_KEEPALIVE = os.getenv('AWS_TCP_KEEPALIVE', 'true').lower() == 'true'
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def build_config():
+    """Configuração do botocore aplicada a todos os clientes."""
+    from botocore.config import Config
+    
+    return Config(
+        region_name=AWS_REGION,
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_READ_TIMEOUT,
+        tcp_keepalive=AWS_TCP_KEEPALIVE,
+        retries={
+            'mode': AWS_RETRY_MODE,
+            'total_max_attempts': AWS_MAX_ATTEMPTS
+        }
+    )
+
+
+def get_client(service):
+    """
+    Retorna o cliente do serviço, criando-o na primeira chamada.
+    
+    A criação é protegida por lock: a sessão padrão do boto3 não é
+    thread-safe, e o cliente resultante é compartilhado entre threads.
+    """
+    client = _clients.get(service)
+    if client is None:
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                import boto3
+                
+                client = boto3.client(
+                    service,
+                    endpoint_url=AWS_ENDPOINT_URL,
+                    config=build_config()
+                )
+                _clients[service] = client
+    return client
+
+
+class LazyClient:
+    """Proxy que cria o cliente real só no primeiro uso."""
+    
+    def __init__(self, service):
+        self._service = service
+    
+    def __getattr__(self, name):
+        return getattr(get_client(self._service), name)
+    
+    def __repr__(self):
+        return f"LazyClient({self._service!r})"
+
+
+def lazy_client(service):
+    """Cliente boto3 criado sob demanda (ver LazyClient)."""
+    return LazyClient(service)
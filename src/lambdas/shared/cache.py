@@ -0,0 +1,80 @@
+"""
+Caches em memória, mantidos entre invocações do container quente.
+
+- BoundedLRU: número máximo de entradas, descarta a menos usada
+- TTLCache: BoundedLRU em que cada entrada expira após o seu próprio TTL
+
+Os dois contam acertos e faltas (`stats()`), para que os handlers possam
+registrar a eficácia do cache nos logs.
+"""
+import time
+from collections import OrderedDict
+
+
+class BoundedLRU:
+    """Cache LRU com número máximo de entradas, mantido no container quente."""
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def get(self, key):
+        if key not in self._items:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return self._items[key]
+    
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+    
+    def invalidate(self, key):
+        self._items.pop(key, None)
+    
+    def stats(self):
+        """Contadores de uso do cache (para logs)."""
+        total = self.hits + self.misses
+        return {
+            'cacheHits': self.hits,
+            'cacheMisses': self.misses,
+            'cacheHitRate': round(self.hits / total, 3) if total else 0.0,
+            'cacheSize': len(self._items)
+        }
+
+
+class TTLCache(BoundedLRU):
+    """Cache LRU em que cada entrada tem seu próprio tempo de vida (segundos)."""
+    
+    def __init__(self, max_size, clock=time.monotonic):
+        super().__init__(max_size)
+        self._clock = clock
+    
+    def get(self, key):
+        entry = self._items.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            # Expirada: conta como falta e libera o espaço
+            del self._items[key]
+            entry = None
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._items.move_to_end(key)
+        return entry[1]
+    
+    def put(self, key, value, ttl):
+        if ttl <= 0:
+            self.invalidate(key)
+            return
+        super().put(key, (self._clock() + ttl, value))
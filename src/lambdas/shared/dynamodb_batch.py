@@ -0,0 +1,36 @@
+"""
+Chamadas em lote do DynamoDB (BatchWriteItem, BatchGetItem).
+
+As duas APIs podem devolver parte do pedido sem processar (throttling),
+em `UnprocessedItems` / `UnprocessedKeys`, com o mesmo formato de
+`RequestItems`. `retry_unprocessed` reenvia só essa sobra, com backoff
+exponencial.
+"""
+import time
+
+
+def chunks(items, size):
+    """Divide uma lista em blocos de no máximo `size` elementos."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def retry_unprocessed(call, request_items, unprocessed_key, max_tentativas):
+    """
+    Chama `call(request_items)` até que não sobre nada sem processar.
+    
+    - call(request_items) -> resposta da API (ex.: batch_write_item)
+    - unprocessed_key: 'UnprocessedItems' ou 'UnprocessedKeys'
+    
+    Entre as tentativas espera 50ms, 100ms, 200ms... (no máximo 1s).
+    Retorna o `request_items` que continuou sem processar após
+    `max_tentativas` chamadas ({} se tudo foi processado).
+    """
+    for tentativa in range(max_tentativas):
+        response = call(request_items)
+        request_items = response.get(unprocessed_key) or {}
+        if not request_items:
+            break
+        if tentativa < max_tentativas - 1:
+            time.sleep(min(0.05 * (2 ** tentativa), 1.0))
+    return request_items
@@ -0,0 +1,98 @@
+"""
+Conversão entre valores Python e o formato de atributos do DynamoDB.
+
+Implementação enxuta e sem dependências, usada no caminho quente das
+Lambdas no lugar de `boto3.dynamodb.types.TypeSerializer` /
+`TypeDeserializer` (ver `benchmarks/bench_dynamodb_codec.py`):
+- números viram `int` quando inteiros e `float` caso contrário (prontos
+  para `json.dumps`, sem `Decimal`)
+- floats são aceitos diretamente na serialização
+"""
+import math
+from decimal import Decimal
+
+
+def _marshal_number(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"Número inválido para o DynamoDB: {value}")
+    return {'N': str(value)}
+
+
+def _marshal_map(value):
+    return {'M': {key: marshal(item) for key, item in value.items()}}
+
+
+def _marshal_list(value):
+    return {'L': [marshal(item) for item in value]}
+
+
+# Despacho pelo tipo exato (caminho rápido); subclasses caem no isinstance abaixo
+_MARSHALLERS = {
+    str: lambda value: {'S': value},
+    bool: lambda value: {'BOOL': value},
+    int: _marshal_number,
+    float: _marshal_number,
+    Decimal: _marshal_number,
+    type(None): lambda value: {'NULL': True},
+    dict: _marshal_map,
+    list: _marshal_list,
+    tuple: _marshal_list,
+}
+
+
+def marshal(value):
+    """Converte um valor Python em atributo do DynamoDB."""
+    marshaller = _MARSHALLERS.get(type(value))
+    if marshaller is not None:
+        return marshaller(value)
+    
+    if isinstance(value, str):
+        return {'S': str(value)}
+    if isinstance(value, bool):
+        return {'BOOL': bool(value)}
+    if isinstance(value, (int, float, Decimal)):
+        return _marshal_number(value)
+    if isinstance(value, dict):
+        return _marshal_map(value)
+    if isinstance(value, (list, tuple)):
+        return _marshal_list(value)
+    raise TypeError(f"Tipo não suportado pelo DynamoDB: {type(value).__name__}")
+
+
+def marshal_item(values):
+    """Converte um dicionário Python em item do DynamoDB (atributos de topo)."""
+    return {key: marshal(value) for key, value in values.items()}
+
+
+def parse_number(text):
+    """Converte o valor de um atributo `N` em int ou float."""
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+_UNMARSHALLERS = {
+    'S': lambda value: value,
+    'N': parse_number,
+    'BOOL': lambda value: value,
+    'NULL': lambda value: None,
+    'M': lambda value: {key: unmarshal(item) for key, item in value.items()},
+    'L': lambda value: [unmarshal(item) for item in value],
+    'SS': lambda value: set(value),
+    'NS': lambda value: {parse_number(item) for item in value},
+}
+
+
+def unmarshal(attribute):
+    """Converte um atributo do DynamoDB em valor Python."""
+    for type_key, value in attribute.items():
+        unmarshaller = _UNMARSHALLERS.get(type_key)
+        if unmarshaller is None:
+            raise TypeError(f"Tipo do DynamoDB não suportado: {type_key}")
+        return unmarshaller(value)
+    raise ValueError("Atributo do DynamoDB vazio")
+
+
+def unmarshal_item(item):
+    """Converte um item do DynamoDB em dicionário Python."""
+    return {key: unmarshal(value) for key, value in item.items()}
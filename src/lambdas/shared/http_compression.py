@@ -0,0 +1,147 @@
+"""
+Compressão negociada das respostas HTTP (API Gateway, integração proxy).
+
+O handler chama `start_request(event)` no início de cada invocação; daí em
+diante `compress_response(response)` (chamado pelo `create_response`)
+comprime o body com a melhor codificação que o cliente aceita em
+`Accept-Encoding`:
+
+- `br` (Brotli), se o pacote `brotli` estiver no pacote da Lambda
+- `gzip`, sempre disponível
+
+Bodies menores que COMPRESSION_MIN_BYTES não são comprimidos (o ganho não
+paga o custo). O body comprimido vai em base64 com `isBase64Encoded`, e o
+API Gateway o converte em binário (`BinaryMediaTypes` da stack).
+
+`decode_request_body(event)` faz o caminho inverso para o body da
+requisição: base64 (quando o API Gateway o trata como binário) e
+`Content-Encoding: gzip`.
+"""
+import base64
+import contextvars
+import gzip
+import os
+
+from http_headers import get_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do pacote da Lambda
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+
+# Níveis com boa relação tamanho/CPU para respostas geradas a cada requisição
+GZIP_NIVEL = 6
+BROTLI_NIVEL = 5
+
+# Codificações suportadas, da preferida para a menos preferida
+CODIFICACOES = ('br', 'gzip') if brotli else ('gzip',)
+
+# Accept-Encoding da requisição em andamento
+_accept_encoding = contextvars.ContextVar('accept_encoding', default=None)
+
+
+def start_request(event):
+    """Guarda o Accept-Encoding da requisição (chamar no início do handler)."""
+    _accept_encoding.set(get_header(event, 'Accept-Encoding'))
+
+
+def choose_encoding(accept_encoding):
+    """
+    Escolhe a codificação a partir do Accept-Encoding; None = sem compressão.
+    
+    Respeita pesos (`gzip;q=0.5`), `q=0` (recusa) e `*`. Em caso de empate,
+    vale a ordem de CODIFICACOES.
+    """
+    if not accept_encoding:
+        return None
+    
+    pesos = {}
+    for parte in accept_encoding.split(','):
+        nome, _, parametros = parte.strip().partition(';')
+        peso = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        pesos[nome.strip().lower()] = peso
+    
+    melhor, melhor_peso = None, 0.0
+    for codificacao in CODIFICACOES:
+        peso = pesos.get(codificacao, pesos.get('*', 0.0))
+        if peso > melhor_peso:
+            melhor, melhor_peso = codificacao, peso
+    return melhor
+
+
+def compress(data, encoding):
+    """Comprime bytes com a codificação escolhida."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_NIVEL)
+    return gzip.compress(data, compresslevel=GZIP_NIVEL)
+
+
+def compress_response(response):
+    """
+    Comprime o body da resposta se o cliente aceitar e valer a pena.
+    
+    Acrescenta `Vary: Accept-Encoding` e, quando comprime, `Content-Encoding`
+    e `isBase64Encoded`. Uma ETag forte vira fraca (W/), já que os bytes
+    enviados dependem da codificação. Retorna a própria resposta.
+    """
+    headers = response.setdefault('headers', {})
+    headers['Vary'] = 'Accept-Encoding'
+    
+    body = response.get('body')
+    if not body or response.get('isBase64Encoded'):
+        return response
+    
+    data = body.encode('utf-8')
+    encoding = choose_encoding(_accept_encoding.get())
+    if encoding is None or len(data) < COMPRESSION_MIN_BYTES:
+        return response
+    
+    response['body'] = base64.b64encode(compress(data, encoding)).decode('ascii')
+    response['isBase64Encoded'] = True
+    headers['Content-Encoding'] = encoding
+    
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        headers['ETag'] = 'W/' + etag
+    return response
+
+
+def response_text(response):
+    """Body de uma resposta gerada por `compress_response`, sem compressão."""
+    body = response.get('body') or ''
+    if not response.get('isBase64Encoded'):
+        return body
+    
+    data = base64.b64decode(body)
+    if response['headers'].get('Content-Encoding') == 'br':
+        data = brotli.decompress(data)
+    elif response['headers'].get('Content-Encoding') == 'gzip':
+        data = gzip.decompress(data)
+    return data.decode('utf-8')
+
+
+def decode_request_body(event):
+    """
+    Body da requisição como texto, desfazendo base64 e gzip quando houver.
+    
+    Retorna None se a requisição não tiver body.
+    """
+    body = event.get('body')
+    if body is None:
+        return None
+    
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+        if (get_header(event, 'Content-Encoding') or '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        return body.decode('utf-8')
+    
+    return body
@@ -0,0 +1,16 @@
+"""
+Headers das requisições do API Gateway (integração proxy).
+
+O API Gateway repassa os headers com a grafia enviada pelo cliente
+(`If-None-Match`, `if-none-match`...), então a busca ignora maiúsculas e
+minúsculas.
+"""
+
+
+def get_header(event, name):
+    """Busca um header da requisição sem diferenciar maiúsculas/minúsculas."""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
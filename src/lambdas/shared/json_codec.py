@@ -0,0 +1,56 @@
+"""
+Serialização JSON das Lambdas.
+
+Usa `orjson` quando está instalado no pacote da Lambda e, se não estiver,
+o `json` da biblioteca padrão. As duas implementações produzem a mesma
+saída: JSON compacto, com caracteres não ASCII sem escape (equivalente a
+`ensure_ascii=False`), que é o que o frontend espera.
+
+- `dumps(obj)` -> str (corpo de respostas, mensagens SQS/SNS)
+- `dumps_bytes(obj)` -> bytes UTF-8 (evita um encode extra)
+- `loads(data)` aceita str, bytes ou bytearray
+- `JSONDecodeError` é capturável nos dois casos (`orjson.JSONDecodeError`
+  é subclasse de `json.JSONDecodeError`)
+"""
+import json
+from json import JSONDecodeError  # noqa: F401 (reexportado)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do pacote da Lambda
+    orjson = None
+
+BACKEND = 'orjson' if orjson else 'json'
+
+_SEPARADORES = (',', ':')
+
+
+def _dumps_stdlib(obj, sort_keys=False):
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARADORES, sort_keys=sort_keys, default=str)
+
+
+if orjson:
+    def dumps_bytes(obj, sort_keys=False):
+        """Serializa para bytes UTF-8."""
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except TypeError:
+            # Casos que o orjson não cobre (ex.: chaves não-str, inteiros > 64 bits)
+            return _dumps_stdlib(obj, sort_keys).encode('utf-8')
+    
+    def dumps(obj, sort_keys=False):
+        """Serializa para str."""
+        return dumps_bytes(obj, sort_keys).decode('utf-8')
+    
+    loads = orjson.loads
+
+else:
+    def dumps_bytes(obj, sort_keys=False):
+        """Serializa para bytes UTF-8."""
+        return _dumps_stdlib(obj, sort_keys).encode('utf-8')
+    
+    def dumps(obj, sort_keys=False):
+        """Serializa para str."""
+        return _dumps_stdlib(obj, sort_keys)
+    
+    loads = json.loads
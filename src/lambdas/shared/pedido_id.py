@@ -0,0 +1,130 @@
+"""
+Geração de IDs de pedido únicos e ordenáveis por tempo (estilo ULID).
+
+Formato: `pedido-` + 26 caracteres em Base32 Crockford, codificando
+48 bits de timestamp em milissegundos seguidos de 80 bits aleatórios.
+A ordem lexicográfica dos IDs segue a ordem de criação, o que permite
+usá-los em ordenações e consultas por intervalo.
+
+Dentro do mesmo container, IDs gerados no mesmo milissegundo
+incrementam a parte aleatória (monotonicidade). Entre containers, a
+entropia de 80 bits torna colisões desprezíveis.
+
+O mesmo gerador produz o número de sequência de atualização (`seq`, ULID
+sem prefixo), gravado a cada criação ou mudança de status do pedido. O
+`seq` e o dia em que foi gerado (`seq_dia`) formam o índice usado na
+sincronização incremental (`GET /pedidos?since=`).
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+PREFIXO = 'pedido-'
+
+# Alfabeto Base32 Crockford (sem I, L, O e U)
+CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+TAMANHO_ID = 26
+BITS_ALEATORIOS = 80
+MAX_ALEATORIO = (1 << BITS_ALEATORIOS) - 1
+
+
+def encode_base32(value, length=TAMANHO_ID):
+    """Codifica um inteiro em Base32 Crockford com tamanho fixo."""
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_BASE32[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def decode_base32(text):
+    """Decodifica uma string Base32 Crockford para inteiro."""
+    value = 0
+    for char in text.upper():
+        value = (value << 5) | CROCKFORD_BASE32.index(char)
+    return value
+
+
+class PedidoIdGenerator:
+    """Gerador monotônico de IDs, seguro para uso entre threads."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+    
+    def _next_components(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = int.from_bytes(os.urandom(10), 'big')
+            elif self._last_random < MAX_ALEATORIO:
+                # Mesmo milissegundo (ou relógio voltou): incrementar para manter a ordem
+                self._last_random += 1
+            else:
+                # Parte aleatória esgotada no milissegundo: avançar o tempo lógico
+                self._last_ms += 1
+                self._last_random = int.from_bytes(os.urandom(10), 'big')
+            
+            return self._last_ms, self._last_random
+    
+    def new_ulid(self):
+        """Gera um novo ULID (26 caracteres, sem prefixo)."""
+        timestamp_ms, random_bits = self._next_components()
+        return encode_base32((timestamp_ms << BITS_ALEATORIOS) | random_bits)
+    
+    def new_id(self):
+        """Gera um novo ID de pedido."""
+        return PREFIXO + self.new_ulid()
+
+
+def timestamp_ms_from_id(pedido_id):
+    """Extrai o timestamp (ms desde epoch) embutido em um ID de pedido."""
+    return timestamp_ms_from_seq(pedido_id[len(PREFIXO):])
+
+
+def timestamp_ms_from_seq(seq):
+    """Extrai o timestamp (ms desde epoch) embutido em um ULID."""
+    return decode_base32(seq[:10])
+
+
+def seq_from_timestamp_ms(timestamp_ms):
+    """Menor ULID do milissegundo informado (limite para consultas por `seq`)."""
+    return encode_base32(timestamp_ms << BITS_ALEATORIOS)
+
+
+def is_seq(text):
+    """Verifica se o texto é um ULID válido (26 caracteres Base32 Crockford)."""
+    return (
+        len(text) == TAMANHO_ID
+        and all(char in CROCKFORD_BASE32 for char in text.upper())
+        and text[0] <= '7'
+    )
+
+
+def seq_dia(seq):
+    """Dia (UTC, YYYY-MM-DD) em que o ULID foi gerado: partição do índice de sincronização."""
+    return datetime.utcfromtimestamp(timestamp_ms_from_seq(seq) / 1000).date().isoformat()
+
+
+# Instância por container (reaproveitada entre invocações)
+_generator = PedidoIdGenerator()
+
+
+def new_pedido_id():
+    """Gera um novo ID de pedido usando o gerador do container."""
+    return _generator.new_id()
+
+
+def new_seq_attributes():
+    """
+    Gera o número de sequência de uma escrita do pedido.
+    
+    Retorna os atributos `seq` e `seq_dia` no formato do DynamoDB.
+    """
+    seq = _generator.new_ulid()
+    return {'seq': {'S': seq}, 'seq_dia': {'S': seq_dia(seq)}}
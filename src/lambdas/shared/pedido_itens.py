@@ -0,0 +1,88 @@
+"""
+Modelo dos itens de um pedido.
+
+Cada item é um dicionário com os campos:
+- `nome` (str, obrigatório)
+- `quantidade` (int >= 1, padrão 1)
+- `preco` (número >= 0, preço unitário, opcional)
+- `observacao` (str, opcional; ex.: "sem cebola")
+
+Por compatibilidade, um item enviado como string (formato antigo) é
+tratado como `{"nome": <string>, "quantidade": 1}`.
+"""
+import math
+
+MAX_OBSERVACAO = 200
+
+
+def validate_item(item, posicao):
+    """Valida um item do pedido; `posicao` começa em 1 (usada nas mensagens)."""
+    prefixo = f'Item {posicao}'
+    
+    if isinstance(item, str):
+        return [] if item.strip() else [f'{prefixo}: nome não pode ser vazio']
+    
+    if not isinstance(item, dict):
+        return [f'{prefixo}: deve ser um objeto com "nome", "quantidade" e "preco"']
+    
+    errors = []
+    
+    nome = item.get('nome')
+    if not isinstance(nome, str) or not nome.strip():
+        errors.append(f'{prefixo}: campo "nome" é obrigatório')
+    
+    quantidade = item.get('quantidade', 1)
+    if isinstance(quantidade, bool) or not isinstance(quantidade, int):
+        errors.append(f'{prefixo}: campo "quantidade" deve ser um número inteiro')
+    elif quantidade <= 0:
+        errors.append(f'{prefixo}: campo "quantidade" deve ser maior que zero')
+    
+    if 'preco' in item:
+        preco = item['preco']
+        if isinstance(preco, bool) or not isinstance(preco, (int, float)) or not math.isfinite(preco):
+            errors.append(f'{prefixo}: campo "preco" deve ser um número')
+        elif preco < 0:
+            errors.append(f'{prefixo}: campo "preco" não pode ser negativo')
+    
+    observacao = item.get('observacao')
+    if observacao is not None:
+        if not isinstance(observacao, str):
+            errors.append(f'{prefixo}: campo "observacao" deve ser um texto')
+        elif len(observacao) > MAX_OBSERVACAO:
+            errors.append(f'{prefixo}: campo "observacao" deve ter no máximo {MAX_OBSERVACAO} caracteres')
+    
+    return errors
+
+
+def normalize_item(item):
+    """
+    Converte um item no formato canônico.
+    
+    Usado tanto na criação (item já validado) quanto na leitura de pedidos
+    gravados no formato antigo (lista de strings).
+    """
+    if isinstance(item, str):
+        return {'nome': item.strip(), 'quantidade': 1}
+    
+    normalized = {
+        'nome': item['nome'].strip(),
+        'quantidade': item.get('quantidade', 1)
+    }
+    if 'preco' in item:
+        normalized['preco'] = item['preco']
+    if item.get('observacao'):
+        normalized['observacao'] = item['observacao'].strip()
+    return normalized
+
+
+def format_item(item):
+    """Texto de exibição do item (ex.: comprovante): "2x Pizza - R$ 30.00"."""
+    if isinstance(item, str):
+        return item
+    
+    texto = f"{item.get('quantidade', 1)}x {item.get('nome', '')}"
+    if item.get('preco') is not None:
+        texto += f" - R$ {item['preco']:.2f}"
+    if item.get('observacao'):
+        texto += f" ({item['observacao']})"
+    return texto
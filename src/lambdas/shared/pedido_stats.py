@@ -0,0 +1,96 @@
+"""
+Contadores materializados de pedidos (por status e por mesa).
+
+Os contadores ficam em um único item da tabela de estatísticas
+(`chave = 'geral'`), atualizados com `ADD` (atômico) a cada criação de
+pedido e a cada mudança de status. Ler as estatísticas custa um GetItem,
+qualquer que seja o número de pedidos.
+
+Atributos do item:
+- `total`: pedidos criados
+- `status_<status>`: pedidos em cada status
+- `mesa_<mesa>_total` e `mesa_<mesa>_<status>`: o mesmo, por mesa
+
+Os contadores começam a contar a partir do deploy da tabela; pedidos
+anteriores não entram.
+"""
+import os
+from collections import Counter
+
+STATS_TABLE = os.getenv('STATS_TABLE', 'PedidosStats')
+STATS_CHAVE = 'geral'
+
+
+def creation_counters(pedidos):
+    """Incrementos para a criação de `pedidos` (dicts com `mesa` e `status`)."""
+    counters = Counter()
+    for pedido in pedidos:
+        mesa, status = pedido['mesa'], pedido['status']
+        counters['total'] += 1
+        counters[f'status_{status}'] += 1
+        counters[f'mesa_{mesa}_total'] += 1
+        counters[f'mesa_{mesa}_{status}'] += 1
+    return counters
+
+
+def transition_counters(mesa, status_antigo, status_novo):
+    """Incrementos para um pedido que passou de `status_antigo` para `status_novo`."""
+    counters = Counter()
+    if status_antigo == status_novo:
+        return counters
+    
+    for status, delta in ((status_antigo, -1), (status_novo, 1)):
+        if not status:
+            continue
+        counters[f'status_{status}'] += delta
+        if mesa is not None:
+            counters[f'mesa_{mesa}_{status}'] += delta
+    return counters
+
+
+def update_params(counters):
+    """
+    Parâmetros de um Update com `ADD` para os contadores (zeros ignorados).
+    
+    Servem tanto para `update_item` quanto para um item `Update` de
+    `transact_write_items`. Retorna None se não houver o que atualizar.
+    """
+    deltas = [(nome, delta) for nome, delta in counters.items() if delta]
+    if not deltas:
+        return None
+    
+    return {
+        'TableName': STATS_TABLE,
+        'Key': {'chave': {'S': STATS_CHAVE}},
+        'UpdateExpression': 'ADD ' + ', '.join(f'#c{i} :c{i}' for i in range(len(deltas))),
+        'ExpressionAttributeNames': {f'#c{i}': nome for i, (nome, _) in enumerate(deltas)},
+        'ExpressionAttributeValues': {f':c{i}': {'N': str(delta)} for i, (_, delta) in enumerate(deltas)}
+    }
+
+
+def apply_counters(dynamodb_client, counters):
+    """Aplica os incrementos (um UpdateItem); não faz nada se forem todos zero."""
+    params = update_params(counters)
+    if params:
+        dynamodb_client.update_item(**params)
+
+
+def parse_stats(item):
+    """Converte o item de contadores (formato DynamoDB) na resposta da API."""
+    stats = {'total': 0, 'porStatus': {}, 'porMesa': {}}
+    
+    for nome, valor in (item or {}).items():
+        if 'N' not in valor:
+            continue
+        contagem = int(valor['N'])
+        
+        if nome == 'total':
+            stats['total'] = contagem
+        elif nome.startswith('status_'):
+            stats['porStatus'][nome[len('status_'):]] = contagem
+        elif nome.startswith('mesa_'):
+            mesa, _, campo = nome[len('mesa_'):].partition('_')
+            stats['porMesa'].setdefault(mesa, {})[campo] = contagem
+    
+    stats['porMesa'] = dict(sorted(stats['porMesa'].items(), key=lambda entry: int(entry[0])))
+    return stats
@@ -0,0 +1,113 @@
+"""
+Logging estruturado (uma linha JSON por evento) para as Lambdas.
+
+- Nível configurável por `LOG_LEVEL` (padrão: INFO)
+- Contexto por requisição (`requestId`, `pedidoId`, ...) incluído em todas as
+  linhas, guardado em `contextvars` (seguro entre threads e invocações)
+- Formatação preguiçosa: use `logger.info("Pedido %s salvo", pedido_id)`; a
+  mensagem só é montada se o nível estiver habilitado
+- Campos extras: `logger.info("Lote processado", extra={'criados': 10})`
+- Payloads completos (evento, corpo da requisição) só são registrados por
+  `log_payload`, em uma fração das invocações definida por
+  `LOG_PAYLOAD_SAMPLE_RATE` (padrão: 0, desligado)
+"""
+import contextvars
+import logging
+import os
+import random
+import sys
+import time
+
+import json_codec
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0'))
+
+_contexto = contextvars.ContextVar('log_contexto', default={})
+_amostrado = contextvars.ContextVar('log_payload_amostrado', default=False)
+
+# Atributos padrão do LogRecord; o que não estiver aqui veio de `extra=`
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma única linha."""
+    
+    def format(self, record):
+        entry = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(_contexto.get())
+        
+        for key, value in vars(record).items():
+            if key not in _ATRIBUTOS_PADRAO and not key.startswith('_'):
+                entry[key] = value
+        
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        
+        return json_codec.dumps(entry)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Handler que escreve sempre no `sys.stdout` atual (mesmo se for substituído)."""
+    
+    def __init__(self):
+        logging.Handler.__init__(self)
+    
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+def get_logger(name):
+    """Retorna o logger estruturado da Lambda (configurado uma única vez)."""
+    logger = logging.getLogger(f'pedidos.{name}')
+    
+    if not logger.handlers:
+        handler = _StdoutHandler()
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        # Não repassar ao handler padrão do runtime (evita linhas duplicadas)
+        logger.propagate = False
+    
+    return logger
+
+
+def start_request(context=None, **campos):
+    """
+    Inicia o contexto de log de uma invocação.
+    
+    Descarta o contexto da invocação anterior, registra o `requestId` do
+    context da Lambda e sorteia se os payloads desta invocação serão logados.
+    """
+    request_id = getattr(context, 'aws_request_id', None)
+    novo_contexto = {'requestId': request_id} if request_id else {}
+    novo_contexto.update(campos)
+    _contexto.set(novo_contexto)
+    _amostrado.set(LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE)
+
+
+def bind(**campos):
+    """Adiciona campos (ex.: `pedidoId`) ao contexto de log atual."""
+    _contexto.set({**_contexto.get(), **campos})
+
+
+def unbind(*nomes):
+    """Remove campos do contexto de log atual."""
+    _contexto.set({key: value for key, value in _contexto.get().items() if key not in nomes})
+
+
+def payload_sampled():
+    """Indica se os payloads da invocação atual devem ser logados."""
+    return _amostrado.get()
+
+
+def log_payload(logger, message, payload):
+    """Loga um payload completo, apenas nas invocações amostradas."""
+    if _amostrado.get() and logger.isEnabledFor(logging.INFO):
+        logger.info(message, extra={'payload': payload})
@@ -0,0 +1,174 @@
+"""
+Testes do nextToken e da intercalação de partições do listar-pedidos.
+
+    python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'lambdas')
+
+# No deploy os módulos compartilhados vão para a raiz do pacote da Lambda
+sys.path.insert(0, os.path.join(LAMBDAS_DIR, 'shared'))
+
+SECRET = 'segredo-de-teste'
+FILTROS = {'status': 'pendente', 'fields': None}
+
+
+def load_pagination():
+    spec = importlib.util.spec_from_file_location('pagination', os.path.join(LAMBDAS_DIR, 'listar-pedidos', 'pagination.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+pagination = load_pagination()
+
+
+class FakePartitions:
+    """
+    Partições já ordenadas (timestamp decrescente), lidas como um Query
+    paginado: `fetch` retoma após `start_key` e devolve LastEvaluatedKey
+    quando a partição tem mais itens além do limite.
+    """
+    
+    def __init__(self, partitions):
+        self.partitions = {
+            nome: sorted(items, key=lambda item: item['timestamp'], reverse=True)
+            for nome, items in partitions.items()
+        }
+        self.chamadas = []
+    
+    def fetch(self, partition, limit, start_key):
+        self.chamadas.append((partition, start_key))
+        items = self.partitions[partition]
+        inicio = 0
+        if start_key is not None:
+            inicio = next(i for i, item in enumerate(items) if item['id'] == start_key['id']) + 1
+        lidos = items[inicio:inicio + limit]
+        last_evaluated_key = None
+        if inicio + limit < len(items):
+            last_evaluated_key = {'id': lidos[-1]['id'], 'timestamp': lidos[-1]['timestamp']}
+        return lidos, last_evaluated_key
+
+
+def pedido(pedido_id, timestamp):
+    return {'id': pedido_id, 'timestamp': timestamp}
+
+
+def merge(fake, start_keys, limit):
+    return pagination.merge_partitions(
+        fake.fetch, start_keys, limit,
+        sort_key=lambda item: item['timestamp'],
+        key_attrs=('id', 'timestamp')
+    )
+
+
+def test_token_ida_e_volta():
+    state = {'pendente': {'id': 'pedido-1', 'timestamp': '2024-11-12T01:02:03'}}
+    
+    token = pagination.encode_token(state, FILTROS, SECRET)
+    
+    assert pagination.decode_token(token, FILTROS, SECRET) == state
+
+
+def test_token_adulterado_e_rejeitado():
+    token = pagination.encode_token({'pendente': None}, FILTROS, SECRET)
+    payload, signature = token.split('.')
+    outro_payload = pagination.encode_token({'pendente': {'id': 'x'}}, FILTROS, SECRET).split('.')[0]
+    outra_signature = ('B' if signature[0] == 'A' else 'A') + signature[1:]
+    
+    for adulterado in (f'{outro_payload}.{signature}', f'{payload}.{outra_signature}', f'{payload}x.{signature}'):
+        with pytest.raises(pagination.InvalidTokenError, match='Assinatura'):
+            pagination.decode_token(adulterado, FILTROS, SECRET)
+    
+    with pytest.raises(pagination.InvalidTokenError, match='Assinatura'):
+        pagination.decode_token(token, FILTROS, 'outro-segredo')
+
+
+@pytest.mark.parametrize('token', ['abc.dé', 'é.abc', 'pagé', 'sem-ponto', 'a.b.c', None, 123])
+def test_token_malformado_e_rejeitado(token):
+    with pytest.raises(pagination.InvalidTokenError, match='Formato'):
+        pagination.decode_token(token, FILTROS, SECRET)
+
+
+def test_token_de_outros_filtros_e_rejeitado():
+    token = pagination.encode_token({'pendente': None}, FILTROS, SECRET)
+    
+    with pytest.raises(pagination.InvalidTokenError, match='outra consulta'):
+        pagination.decode_token(token, {'status': 'processado', 'fields': None}, SECRET)
+    
+    # Filtros não informados (None) não mudam a consulta
+    assert pagination.decode_token(token, {'status': 'pendente'}, SECRET) == {'pendente': None}
+
+
+def test_merge_retoma_no_meio_da_particao():
+    fake = FakePartitions({
+        'pendente': [pedido('p1', '05'), pedido('p2', '03'), pedido('p3', '01')],
+        'processado': [pedido('x1', '04'), pedido('x2', '02')]
+    })
+    
+    page, next_keys = merge(fake, {'pendente': None, 'processado': None}, limit=2)
+    
+    assert [item['id'] for item in page] == ['p1', 'x1']
+    # Cada partição retoma logo após o último item dela que entrou na página
+    assert next_keys == {
+        'pendente': {'id': 'p1', 'timestamp': '05'},
+        'processado': {'id': 'x1', 'timestamp': '04'}
+    }
+
+
+def test_merge_particao_sem_itens_na_pagina_mantem_a_chave():
+    fake = FakePartitions({
+        'pendente': [pedido('p1', '09'), pedido('p2', '08'), pedido('p3', '07')],
+        'processado': [pedido('x1', '02'), pedido('x2', '01')]
+    })
+    start_keys = {'pendente': None, 'processado': {'id': 'x1', 'timestamp': '02'}}
+    
+    page, next_keys = merge(fake, start_keys, limit=2)
+    
+    assert [item['id'] for item in page] == ['p1', 'p2']
+    assert next_keys['processado'] == {'id': 'x1', 'timestamp': '02'}
+
+
+def test_merge_particao_esgotada_sai_do_estado():
+    fake = FakePartitions({
+        'pendente': [pedido('p1', '05'), pedido('p2', '04'), pedido('p3', '03')],
+        'processado': [pedido('x1', '06')]
+    })
+    
+    page, next_keys = merge(fake, {'pendente': None, 'processado': None}, limit=3)
+    
+    assert [item['id'] for item in page] == ['x1', 'p1', 'p2']
+    assert next_keys == {'pendente': {'id': 'p2', 'timestamp': '04'}}
+    
+    page, next_keys = merge(fake, next_keys, limit=3)
+    
+    assert [item['id'] for item in page] == ['p3']
+    assert next_keys == {}
+
+
+def test_paginacao_completa_sem_duplicados_nem_lacunas():
+    partitions = {
+        status: [pedido(f'{status}-{i}', f'{i * 3 + deslocamento:03d}') for i in range(7)]
+        for deslocamento, status in enumerate(('pendente', 'processado', 'erro'))
+    }
+    fake = FakePartitions(partitions)
+    esperado = sorted(
+        (item for items in partitions.values() for item in items),
+        key=lambda item: item['timestamp'], reverse=True
+    )
+    
+    vistos, state = [], {status: None for status in partitions}
+    while state:
+        page, state = merge(fake, state, limit=4)
+        vistos.extend(page)
+        if state:
+            # O estado atravessa o nextToken entre uma página e outra
+            token = pagination.encode_token(state, FILTROS, SECRET)
+            state = pagination.decode_token(token, FILTROS, SECRET)
+    
+    assert [item['id'] for item in vistos] == [item['id'] for item in esperado]
@@ -0,0 +1,137 @@
+"""
+Testes do limite de tempo do processar-pedido (records não iniciados e
+records presos no pool), com S3, DynamoDB e SNS em memória.
+
+    python -m pytest tests
+"""
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'lambdas')
+
+# No deploy os módulos compartilhados vão para a raiz do pacote da Lambda
+sys.path.insert(0, os.path.join(LAMBDAS_DIR, 'shared'))
+
+
+def load_processar():
+    spec = importlib.util.spec_from_file_location('processar_pedido', os.path.join(LAMBDAS_DIR, 'processar-pedido', 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeContext:
+    """Context da Lambda com `restante_ms` de tempo a partir da criação."""
+    
+    aws_request_id = 'request-teste'
+    
+    def __init__(self, restante_ms):
+        self.fim = time.monotonic() + restante_ms / 1000
+    
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self.fim - time.monotonic()) * 1000))
+
+
+class FakeS3:
+    """put_object em memória; pedidos cujo id contém `travado` esperam `liberar`."""
+    
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.chaves = []
+    
+    def put_object(self, Bucket, Key, **kwargs):
+        if 'travado' in Key:
+            self.liberar.wait()
+        self.chaves.append(Key)
+        return {}
+
+
+class FakeDynamoDB:
+    def update_item(self, **kwargs):
+        return {'Attributes': {'status': {'S': 'pendente'}}}
+
+
+class FakeSNS:
+    def __init__(self):
+        self.publicados = 0
+    
+    def publish(self, **kwargs):
+        self.publicados += 1
+        return {'MessageId': str(self.publicados)}
+
+
+def sqs_record(message_id, pedido_id):
+    pedido = {'pedidoId': pedido_id, 'cliente': 'Cliente', 'mesa': 1, 'itens': ['Pizza'], 'timestamp': '2024-11-12T01:02:03'}
+    return {'messageId': message_id, 'body': json.dumps(pedido)}
+
+
+def falhas(result):
+    return [falha['itemIdentifier'] for falha in result['batchItemFailures']]
+
+
+@pytest.fixture
+def processar(monkeypatch):
+    module = load_processar()
+    s3 = FakeS3()
+    monkeypatch.setattr(module, 's3_client', s3)
+    monkeypatch.setattr(module, 'dynamodb_client', FakeDynamoDB())
+    monkeypatch.setattr(module, 'sns_client', FakeSNS())
+    # O PDF não importa aqui; evita o fpdf
+    monkeypatch.setattr(module, 'generate_pdf_content', lambda pedido_data: b'%PDF')
+    monkeypatch.setattr(module, 'PROCESSAR_MARGEM_MS', 300)
+    monkeypatch.setattr(module, 'RETORNO_MARGEM_MS', 100)
+    yield module
+    # Solta as threads presas e espera que terminem com os fakes ainda no lugar
+    s3.liberar.set()
+    module.discard_executor()
+    for thread in threading.enumerate():
+        if thread.name.startswith('processar-pedido'):
+            thread.join(timeout=5)
+
+
+@pytest.mark.parametrize('concorrencia', [1, 4])
+def test_records_nao_iniciados_perto_do_timeout(processar, monkeypatch, concorrencia):
+    monkeypatch.setattr(processar, 'PROCESSAR_CONCORRENCIA', concorrencia)
+    event = {'Records': [sqs_record('m1', 'pedido-1'), sqs_record('m2', 'pedido-2')]}
+    
+    result = processar.handler(event, FakeContext(restante_ms=200))
+    
+    assert falhas(result) == ['m1', 'm2']
+    assert processar.s3_client.chaves == []
+
+
+def test_records_com_tempo_sao_processados(processar, monkeypatch):
+    monkeypatch.setattr(processar, 'PROCESSAR_CONCORRENCIA', 4)
+    event = {'Records': [sqs_record(f'm{i}', f'pedido-{i}') for i in range(6)]}
+    
+    result = processar.handler(event, FakeContext(restante_ms=5000))
+    
+    assert falhas(result) == []
+    assert sorted(processar.s3_client.chaves) == [f'comprovantes/pedido-{i}.pdf' for i in range(6)]
+
+
+def test_record_travado_e_devolvido_e_pool_descartado(processar, monkeypatch):
+    monkeypatch.setattr(processar, 'PROCESSAR_CONCORRENCIA', 2)
+    event = {'Records': [sqs_record('m1', 'pedido-travado'), sqs_record('m2', 'pedido-2')]}
+    
+    inicio = time.monotonic()
+    result = processar.handler(event, FakeContext(restante_ms=800))
+    
+    # Responde antes do fim da invocação, sem esperar o record preso
+    assert time.monotonic() - inicio < 0.8
+    assert falhas(result) == ['m1']
+    assert processar._executor is None
+    
+    # A thread presa não ocupa um worker do pool da próxima invocação
+    event = {'Records': [sqs_record('m3', 'pedido-3'), sqs_record('m4', 'pedido-4')]}
+    result = processar.handler(event, FakeContext(restante_ms=800))
+    
+    assert falhas(result) == []
+    assert processar._executor is not None
+    assert 'comprovantes/pedido-travado.pdf' not in processar.s3_client.chaves
@@ -0,0 +1,149 @@
+"""
+Testes do relay-outbox com SQS e DynamoDB em memória (sem AWS/LocalStack).
+
+    python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'lambdas')
+
+# No deploy os módulos compartilhados vão para a raiz do pacote da Lambda
+sys.path.insert(0, os.path.join(LAMBDAS_DIR, 'shared'))
+
+
+def load_relay():
+    spec = importlib.util.spec_from_file_location('relay_outbox', os.path.join(LAMBDAS_DIR, 'relay-outbox', 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeSQS:
+    """SendMessageBatch em memória; os pedidos em `falhar` voltam em `Failed`."""
+
+    def __init__(self, falhar=()):
+        self.falhar = set(falhar)
+        self.mensagens = []
+        self.chamadas = 0
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.chamadas += 1
+        assert len(Entries) <= 10
+        successful, failed = [], []
+        for entry in Entries:
+            if entry['MessageBody'] in self.falhar:
+                failed.append({'Id': entry['Id'], 'SenderFault': False, 'Code': 'InternalError'})
+            else:
+                self.mensagens.append(entry['MessageBody'])
+                successful.append({'Id': entry['Id'], 'MessageId': f'msg-{len(self.mensagens)}'})
+        return {'Successful': successful, 'Failed': failed}
+
+
+class FakeDynamoDB:
+    """
+    Tabela de outbox em memória para BatchWriteItem (DeleteRequest) e Scan.
+    
+    As primeiras `rodadas_unprocessed` chamadas de batch_write_item devolvem
+    o último delete do bloco em UnprocessedItems, sem aplicá-lo.
+    """
+
+    def __init__(self, records, rodadas_unprocessed=0):
+        self.items = {record['id']['S']: record for record in records}
+        self.rodadas_unprocessed = rodadas_unprocessed
+        self.chamadas = 0
+
+    def batch_write_item(self, RequestItems):
+        self.chamadas += 1
+        ((tabela, requests),) = RequestItems.items()
+        assert len(requests) <= 25
+        
+        unprocessed = []
+        if self.rodadas_unprocessed > 0:
+            self.rodadas_unprocessed -= 1
+            requests, unprocessed = requests[:-1], requests[-1:]
+        for request in requests:
+            self.items.pop(request['DeleteRequest']['Key']['id']['S'], None)
+        return {'UnprocessedItems': {tabela: unprocessed} if unprocessed else {}}
+
+    def scan(self, **params):
+        return {'Items': list(self.items.values())}
+
+
+def outbox_record(pedido_id):
+    return {
+        'id': {'S': pedido_id},
+        'message_body': {'S': pedido_id},
+        'message_attributes': {'S': '{}'},
+        'created_at': {'N': '0'}
+    }
+
+
+@pytest.fixture
+def relay(monkeypatch):
+    module = load_relay()
+    monkeypatch.setattr(module.time, 'sleep', lambda segundos: None)
+    return module
+
+
+def test_falhas_parciais_do_sqs_ficam_na_outbox(relay):
+    records = [outbox_record(f'pedido-{i}') for i in range(12)]
+    sqs, dynamodb = FakeSQS(falhar={'pedido-3', 'pedido-11'}), FakeDynamoDB(records)
+    
+    falhas = relay.drain_outbox(records, sqs_client=sqs, dynamodb=dynamodb)
+    
+    assert falhas == ['pedido-3', 'pedido-11']
+    assert sqs.chamadas == 2
+    assert len(sqs.mensagens) == 10
+    assert sorted(dynamodb.items) == ['pedido-11', 'pedido-3']
+
+
+def test_unprocessed_items_sao_repetidos(relay):
+    records = [outbox_record(f'pedido-{i}') for i in range(30)]
+    dynamodb = FakeDynamoDB(records, rodadas_unprocessed=2)
+    
+    falhas = relay.drain_outbox(records, sqs_client=FakeSQS(), dynamodb=dynamodb)
+    
+    assert falhas == []
+    assert dynamodb.items == {}
+    # Bloco de 25: 2 tentativas com sobra + 1 completa; bloco de 5: 1
+    assert dynamodb.chamadas == 4
+
+
+def test_unprocessed_items_que_sobram_ficam_para_a_varredura(relay, monkeypatch):
+    monkeypatch.setattr(relay, 'BATCH_MAX_TENTATIVAS', 3)
+    records = [outbox_record(f'pedido-{i}') for i in range(5)]
+    sqs, dynamodb = FakeSQS(), FakeDynamoDB(records, rodadas_unprocessed=10)
+    
+    falhas = relay.drain_outbox(records, sqs_client=sqs, dynamodb=dynamodb)
+    
+    # Enviado, mas não removido: a próxima varredura reenvia (at-least-once)
+    assert falhas == []
+    assert len(sqs.mensagens) == 5
+    assert dynamodb.chamadas == 3
+    assert list(dynamodb.items) == ['pedido-4']
+    
+    sqs_varredura = FakeSQS()
+    monkeypatch.setattr(relay, 'sqs', sqs_varredura)
+    monkeypatch.setattr(relay, 'dynamodb_client', FakeDynamoDB(dynamodb.items.values()))
+    assert relay.handler({}, None) == {'falhas': 0}
+    assert sqs_varredura.mensagens == ['pedido-4']
+
+
+def test_handler_stream_envia_so_insercoes(relay, monkeypatch):
+    records = [outbox_record(f'pedido-{i}') for i in range(3)]
+    sqs, dynamodb = FakeSQS(falhar={'pedido-2'}), FakeDynamoDB(records)
+    monkeypatch.setattr(relay, 'sqs', sqs)
+    monkeypatch.setattr(relay, 'dynamodb_client', dynamodb)
+    event = {'Records': [
+        {'eventName': 'INSERT', 'dynamodb': {'NewImage': records[0]}},
+        {'eventName': 'REMOVE', 'dynamodb': {}},
+        {'eventName': 'INSERT', 'dynamodb': {'NewImage': records[2]}}
+    ]}
+    
+    assert relay.handler(event, None) == {'enviados': 1, 'falhas': 1}
+    assert sqs.mensagens == ['pedido-0']
+    assert sorted(dynamodb.items) == ['pedido-1', 'pedido-2']